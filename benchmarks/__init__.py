@@ -0,0 +1,3 @@
+"""
+Benchmarks for ULTRA DEEP RESEARCH that run against a local mock of OpenRouter.
+"""
@@ -0,0 +1,109 @@
+"""
+In-process stand-in for OpenRouter's chat completions endpoint.
+"""
+
+import asyncio
+import json
+import math
+import random
+import re
+from dataclasses import dataclass, field
+from typing import Dict
+
+import httpx
+
+_WORDS = (
+    "research analysis market growth evidence data trend policy energy health technology adoption "
+    "investment risk regulation innovation survey study impact cost efficiency model forecast region "
+    "industry consumer supply demand network platform security privacy performance quality"
+).split()
+
+@dataclass
+class MockSettings:
+    """Behaviour of the mock API."""
+    latency_median: float = 0.05  # Seconds; latencies are log-normally distributed around this
+    latency_sigma: float = 0.5  # Log-normal shape; larger values give a heavier tail
+    error_rate: float = 0.0  # Fraction of requests answered with HTTP 500
+    rate_limit_rate: float = 0.0  # Fraction of requests answered with HTTP 429
+    retry_after: float = 0.05  # Retry-After seconds sent with 429 responses
+    response_chars: int = 2000  # Approximate length of search answers
+    seed: int = 0
+
+@dataclass
+class MockStats:
+    """Counts of what the mock API served."""
+    requests: int = 0
+    errors: int = 0
+    rate_limited: int = 0
+    by_model: Dict[str, int] = field(default_factory=dict)
+
+class MockOpenRouter:
+    """Answers chat completion requests with plausible, deterministic-shaped content.
+
+    Query generation prompts get as many unique queries as they ask
+    for, filename prompts get a short slug, and everything else gets a
+    research-style answer of roughly `response_chars` characters.
+    """
+
+    def __init__(self, settings: MockSettings = None):
+        self.settings = settings or MockSettings()
+        self.stats = MockStats()
+        self.random = random.Random(self.settings.seed)
+        self._query_counter = 0
+
+    def transport(self) -> httpx.MockTransport:
+        """Return a transport that routes every request to this mock."""
+        return httpx.MockTransport(self.handle)
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content)
+        model = body.get("model", "")
+        self.stats.requests += 1
+        self.stats.by_model[model] = self.stats.by_model.get(model, 0) + 1
+
+        settings = self.settings
+        await asyncio.sleep(self.random.lognormvariate(math.log(settings.latency_median), settings.latency_sigma))
+
+        roll = self.random.random()
+        if roll < settings.rate_limit_rate:
+            self.stats.rate_limited += 1
+            return httpx.Response(429, headers={"retry-after": str(settings.retry_after)},
+                                  json={"error": {"message": "Rate limited"}})
+        if roll < settings.rate_limit_rate + settings.error_rate:
+            self.stats.errors += 1
+            return httpx.Response(500, json={"error": {"message": "Upstream error"}})
+
+        content = self._content(body)
+        usage = {"prompt_tokens": len(request.content) // 4, "completion_tokens": len(content) // 4}
+        usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+        return httpx.Response(200, json={
+            "choices": [{"message": {"role": "assistant", "content": content}}],
+            "usage": usage,
+        })
+
+    def _content(self, body: dict) -> str:
+        messages = body.get("messages") or [{"content": ""}]
+        system_prompt = messages[0].get("content", "")
+        if "filename generator" in system_prompt:
+            return "benchmark_report"
+        if "query generator" in system_prompt:
+            match = re.search(r"generate (?:exactly )?(\d+)", system_prompt, re.IGNORECASE)
+            count = int(match.group(1)) if match else 10
+            return "\n".join(self._query() for _ in range(count))
+        if "broad search query" in system_prompt:
+            return "Comprehensive overview of the benchmark topic"
+        return self._answer()
+
+    def _query(self) -> str:
+        self._query_counter += 1
+        words = " ".join(self.random.sample(_WORDS, 4))
+        return f"Benchmark query {self._query_counter} about {words}"
+
+    def _answer(self) -> str:
+        sentences = []
+        length = 0
+        while length < self.settings.response_chars:
+            sentence = "Research shows " + " ".join(self.random.choices(_WORDS, k=14)) + "."
+            sentences.append(sentence)
+            length += len(sentence) + 1
+        return " ".join(sentences)
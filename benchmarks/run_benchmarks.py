@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+End-to-end pipeline benchmarks against a local mock of OpenRouter.
+
+Each scenario runs the full research pipeline in a fresh process, so peak
+RSS is measured per scenario, and reports wall time, request throughput and
+event-loop lag. Results are written as JSON and can be compared against a
+previous run with --baseline.
+
+    python -m benchmarks.run_benchmarks --scenarios 100,1k --output bench.json
+"""
+
+import asyncio
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import click
+
+from benchmarks.mock_openrouter import MockOpenRouter, MockSettings
+
+# Metrics compared against a baseline, with True where higher is better
+COMPARED_METRICS = {
+    "wall_time": False,
+    "requests_per_second": True,
+    "loop_lag_p99_ms": False,
+    "loop_lag_max_ms": False,
+    "peak_rss_mb": False,
+}
+
+def parse_scenario(name: str) -> int:
+    """Turn a scenario name such as '100', '1k' or '10k' into a query count."""
+    name = name.strip().lower()
+    if name.endswith("k"):
+        return int(float(name[:-1]) * 1000)
+    return int(name)
+
+class LoopLagMonitor:
+    """Measures how late the event loop wakes a task that sleeps for `interval` seconds."""
+
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.lags: List[float] = []
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        self._task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await self._task
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            self.lags.append(max(0.0, loop.time() - expected))
+
+def peak_rss_mb() -> float:
+    """Return this process's peak resident set size in MiB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+async def run_pipeline_benchmark(num_queries: int, settings: MockSettings, concurrency: int) -> Dict[str, Any]:
+    """Run the research pipeline once against the mock API and return its metrics."""
+    from config import config
+    from main import run_research_pipeline
+    from src.api_client import create_http_client
+    from src.cli_formatter import CLIFormatter
+    from src.rate_limiter import reset_rate_limiter
+    from src.retry import reset_retry_state
+    from src.utils import percentile
+
+    work_dir = tempfile.mkdtemp(prefix="udr-bench-")
+    config.num_queries = num_queries
+    config.query_shards = 1
+    config.query_dedup = False  # Keep the number of searches equal to the scenario size
+    config.cache_enabled = False
+    config.pdf_mode = "off"
+    config.api_rate_limit = 0
+    config.max_concurrent_searches = concurrency
+    config.retry_base_delay = 0.01
+    config.reports_dir = os.path.join(work_dir, "reports")
+    config.runs_dir = os.path.join(work_dir, "runs")
+    reset_rate_limiter()
+    reset_retry_state()
+
+    mock = MockOpenRouter(settings)
+    monitor = LoopLagMonitor()
+    client = create_http_client(transport=mock.transport())
+    monitor.start()
+    start = time.perf_counter()
+    try:
+        # The pipeline is chatty; keep its output out of the benchmark report
+        with contextlib.redirect_stdout(io.StringIO()):
+            summary = await run_research_pipeline(
+                "Benchmark topic", None, CLIFormatter(quiet=True), verbose=False, save_steps=False, client=client
+            )
+    finally:
+        wall_time = time.perf_counter() - start
+        await monitor.stop()
+        await client.aclose()
+
+    lags_ms = [lag * 1000 for lag in monitor.lags]
+    return {
+        "queries": num_queries,
+        "status": summary["status"],
+        "completed_searches": summary["completed_searches"],
+        "results": summary["results"],
+        "wall_time": round(wall_time, 3),
+        "requests": mock.stats.requests,
+        "requests_per_second": round(mock.stats.requests / wall_time, 1) if wall_time else 0.0,
+        "errors_served": mock.stats.errors,
+        "rate_limits_served": mock.stats.rate_limited,
+        "loop_lag_p50_ms": round(percentile(lags_ms, 50), 2),
+        "loop_lag_p99_ms": round(percentile(lags_ms, 99), 2),
+        "loop_lag_max_ms": round(max(lags_ms, default=0.0), 2),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+    }
+
+def _run_scenario(num_queries: int, settings: MockSettings, concurrency: int) -> Dict[str, Any]:
+    """Process entry point for one scenario."""
+    return asyncio.run(run_pipeline_benchmark(num_queries, settings, concurrency))
+
+def run_scenario(num_queries: int, settings: MockSettings, concurrency: int) -> Dict[str, Any]:
+    """Run one scenario in a freshly spawned process so its peak RSS is its own."""
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+        return pool.submit(_run_scenario, num_queries, settings, concurrency).result()
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+def compare_to_baseline(results: Dict[str, Any], baseline: Dict[str, Any]):
+    """Print the change of each compared metric against a previous results file."""
+    previous = baseline.get("scenarios", {})
+    for name, metrics in results["scenarios"].items():
+        if name not in previous:
+            continue
+        changes = []
+        for metric, higher_is_better in COMPARED_METRICS.items():
+            old, new = previous[name].get(metric), metrics.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old * 100
+            better = change > 0 if higher_is_better else change < 0
+            marker = "+" if better else "-" if abs(change) >= 5 else " "
+            changes.append(f"{marker} {metric} {old} -> {new} ({change:+.1f}%)")
+        print(f"\n{name} vs baseline:")
+        for line in changes:
+            print(f"  {line}")
+
+@click.command()
+@click.option('--scenarios', '-s', default='100,1k,10k', help='Comma-separated query counts, e.g. 100,1k,10k')
+@click.option('--concurrency', '-c', type=int, default=100, help='Concurrent searches')
+@click.option('--latency', type=float, default=0.05, help='Median mock response latency in seconds')
+@click.option('--latency-sigma', type=float, default=0.5, help='Log-normal spread of the latency')
+@click.option('--error-rate', type=float, default=0.0, help='Fraction of requests answered with HTTP 500')
+@click.option('--rate-limit-rate', type=float, default=0.0, help='Fraction of requests answered with HTTP 429')
+@click.option('--response-chars', type=int, default=2000, help='Approximate size of each search answer')
+@click.option('--seed', type=int, default=0, help='Seed for the mock\'s random choices')
+@click.option('--output', '-o', default=None, help='Write results to this JSON file')
+@click.option('--baseline', '-b', type=click.Path(exists=True), default=None,
+              help='Previous results file to compare against')
+def main(scenarios: str, concurrency: int, latency: float, latency_sigma: float, error_rate: float,
+         rate_limit_rate: float, response_chars: int, seed: int, output: str, baseline: str):
+    """Benchmark the research pipeline end to end against a mock OpenRouter."""
+    settings = MockSettings(
+        latency_median=latency,
+        latency_sigma=latency_sigma,
+        error_rate=error_rate,
+        rate_limit_rate=rate_limit_rate,
+        response_chars=response_chars,
+        seed=seed,
+    )
+    results = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "git_revision": git_revision(),
+        "python": platform.python_version(),
+        "concurrency": concurrency,
+        "mock": asdict(settings),
+        "scenarios": {},
+    }
+
+    for name in [name.strip() for name in scenarios.split(",") if name.strip()]:
+        print(f"Running scenario {name}...", flush=True)
+        metrics = run_scenario(parse_scenario(name), settings, concurrency)
+        results["scenarios"][name] = metrics
+        print(f"  {metrics['wall_time']:.2f}s wall, {metrics['requests_per_second']} req/s, "
+              f"loop lag p99 {metrics['loop_lag_p99_ms']}ms (max {metrics['loop_lag_max_ms']}ms), "
+              f"peak RSS {metrics['peak_rss_mb']} MiB, status {metrics['status']}")
+
+    if output:
+        with open(output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {output}")
+
+    if baseline:
+        with open(baseline, 'r', encoding='utf-8') as f:
+            compare_to_baseline(results, json.load(f))
+
+if __name__ == "__main__":
+    main()
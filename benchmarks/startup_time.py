@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+CLI startup-time benchmark.
+
+Runs `main.py --help` under `python -X importtime` several times and checks
+the median import time of main.py's own imports against a budget. Timings
+depend on the machine and its load, so this lives here rather than in the
+unit tests.
+
+    python -m benchmarks.startup_time --runs 5 --budget-ms 150
+"""
+
+import os
+import statistics
+import subprocess
+import sys
+
+import click
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Import time of main.py's own imports (interpreter startup excluded) for --help.
+# About 40 ms when this was set; the margin absorbs slow machines.
+STARTUP_BUDGET_MS = 150
+
+def import_times(*args: str) -> dict:
+    """Run Python with -X importtime and return {module: self time in microseconds}."""
+    env = {**os.environ, "OPENROUTER_API_KEY": ""}
+    completed = subprocess.run([sys.executable, "-X", "importtime", *args], cwd=ROOT, env=env,
+                               capture_output=True, text=True, timeout=60)
+    times = {}
+    for line in completed.stderr.splitlines():
+        if line.startswith("import time:") and "|" in line:
+            self_time, _, name = line[len("import time:"):].split("|")
+            if self_time.strip().isdigit():
+                times[name.strip()] = int(self_time)
+    return times
+
+def cli_import_times(*cli_args: str) -> dict:
+    """Import times of main.py run with `cli_args`, minus the interpreter's own startup imports."""
+    startup = import_times("-c", "pass")
+    return {name: value for name, value in import_times("main.py", *cli_args).items() if name not in startup}
+
+@click.command()
+@click.option('--runs', '-n', type=int, default=5, help='Number of timed runs (the median is checked)')
+@click.option('--budget-ms', type=float, default=STARTUP_BUDGET_MS, help='Import time budget for --help')
+def main(runs: int, budget_ms: float):
+    """Check the import time of `main.py --help` against a budget."""
+    totals = [sum(cli_import_times("--help").values()) / 1000 for _ in range(max(1, runs))]
+    median = statistics.median(totals)
+    print(f"--help import time: median {median:.0f} ms, min {min(totals):.0f} ms, "
+          f"max {max(totals):.0f} ms over {len(totals)} runs (budget {budget_ms:.0f} ms)")
+    if median >= budget_ms:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
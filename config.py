@@ -20,9 +20,59 @@ class Config:
         self.summarizer_model: str = os.getenv("SUMMARIZER_MODEL", "claude-3-sonnet-4.5")
         self.fast_model: str = os.getenv("FAST_MODEL", "anthropic/claude-haiku")
         self.num_queries: int = int(os.getenv("NUM_QUERIES", "100"))
+        self.query_shards: int = int(os.getenv("QUERY_SHARDS", "1"))
+        self.query_top_up_rounds: int = int(os.getenv("QUERY_TOP_UP_ROUNDS", "2"))
+        self.query_dedup: bool = os.getenv("QUERY_DEDUP", "false").lower() == "true"
+        self.query_dedup_threshold: float = float(os.getenv("QUERY_DEDUP_THRESHOLD", "0.7"))
         self.max_concurrent_searches: int = int(os.getenv("MAX_CONCURRENT_SEARCHES", "10"))
+        self.adaptive_concurrency: bool = os.getenv("ADAPTIVE_CONCURRENCY", "false").lower() == "true"
+        self.min_concurrent_searches: int = int(os.getenv("MIN_CONCURRENT_SEARCHES", "2"))
+        self.max_adaptive_concurrency: int = int(os.getenv("MAX_ADAPTIVE_CONCURRENCY", "50"))
+        self.hedge_requests: bool = os.getenv("HEDGE_REQUESTS", "false").lower() == "true"
+        self.hedge_percentile: float = float(os.getenv("HEDGE_PERCENTILE", "90"))
+        self.hedge_max_ratio: float = float(os.getenv("HEDGE_MAX_RATIO", "0.1"))
+        self.hedge_min_samples: int = int(os.getenv("HEDGE_MIN_SAMPLES", "20"))
         self.search_timeout: int = int(os.getenv("SEARCH_TIMEOUT", "30"))
+        self.stream_searches: bool = os.getenv("STREAM_SEARCHES", "false").lower() == "true"
+        self.stream_max_chars: int = int(os.getenv("STREAM_MAX_CHARS", "0"))
+        self.stream_max_seconds: float = float(os.getenv("STREAM_MAX_SECONDS", "0"))
+        self.context_token_budget: int = int(os.getenv("CONTEXT_TOKEN_BUDGET", "32000"))
+        self.context_max_tokens_per_result: int = int(os.getenv("CONTEXT_MAX_TOKENS_PER_RESULT", "1500"))
+        self.synthesis_mode: str = os.getenv("SYNTHESIS_MODE", "auto").lower()
+        self.map_chunk_size: int = int(os.getenv("MAP_CHUNK_SIZE", "8"))
+        self.map_result_chars: int = int(os.getenv("MAP_RESULT_CHARS", "3000"))
+        self.reduce_fan_in: int = int(os.getenv("REDUCE_FAN_IN", "4"))
+        self.synthesis_concurrency: int = int(os.getenv("SYNTHESIS_CONCURRENCY", "8"))
+        self.stream_report: bool = os.getenv("STREAM_REPORT", "false").lower() == "true"
+        self.reports_dir: str = os.getenv("REPORTS_DIR", "reports")
+        self.reports_pdf_dir: str = os.getenv("REPORTS_PDF_DIR", "reports-pdf")
+        self.pdf_mode: str = os.getenv("PDF_MODE", "sync").lower()
+        self.pdf_workers: int = int(os.getenv("PDF_WORKERS", "2"))
+        self.runs_dir: str = os.getenv("RUNS_DIR", "runs")
+        self.runs_retention_days: float = float(os.getenv("RUNS_RETENTION_DAYS", "0"))
+        self.service_host: str = os.getenv("SERVICE_HOST", "127.0.0.1")
+        self.service_port: int = int(os.getenv("SERVICE_PORT", "8765"))
+        self.service_workers: int = int(os.getenv("SERVICE_WORKERS", "4"))
+        self.stream_results: bool = os.getenv("STREAM_RESULTS", "false").lower() == "true"
+        self.spool_results: bool = os.getenv("SPOOL_RESULTS", "false").lower() == "true"
+        self.spool_dir: str = os.getenv("SPOOL_DIR", "")
+        self.dedup_method: str = os.getenv("DEDUP_METHOD", "exact")
+        self.dedup_threshold: float = float(os.getenv("DEDUP_THRESHOLD", "0.5"))
+        self.cache_enabled: bool = os.getenv("CACHE_ENABLED", "false").lower() == "true"
+        self.cache_path: str = os.getenv("CACHE_PATH", ".cache/openrouter_responses.sqlite")
+        self.cache_ttl: int = int(os.getenv("CACHE_TTL", "604800"))  # 7 days
+        self.cache_max_mb: int = int(os.getenv("CACHE_MAX_MB", "200"))
         self.api_rate_limit: int = int(os.getenv("API_RATE_LIMIT", "60"))
+        self.api_token_limit: int = int(os.getenv("API_TOKEN_LIMIT", "0"))
+        self.api_burst: int = int(os.getenv("API_BURST", "10"))
+        self.retry_max_attempts: int = int(os.getenv("RETRY_MAX_ATTEMPTS", "3"))
+        self.retry_base_delay: float = float(os.getenv("RETRY_BASE_DELAY", "1.0"))
+        self.retry_max_delay: float = float(os.getenv("RETRY_MAX_DELAY", "30"))
+        self.retry_budget_ratio: float = float(os.getenv("RETRY_BUDGET_RATIO", "0.2"))
+        self.breaker_failure_threshold: int = int(os.getenv("BREAKER_FAILURE_THRESHOLD", "5"))
+        self.breaker_reset_seconds: float = float(os.getenv("BREAKER_RESET_SECONDS", "30"))
+        self.max_rate_limit_retries: int = int(os.getenv("MAX_RATE_LIMIT_RETRIES", "5"))
+        self.estimated_completion_tokens: int = int(os.getenv("ESTIMATED_COMPLETION_TOKENS", "1000"))
     
     def validate(self) -> bool:
         """Validate configuration settings."""
@@ -47,7 +97,14 @@ class Config:
         print(f"   • Fast Model: {self.fast_model}")
         print(f"   • Number of Queries: {self.num_queries}")
         print(f"   • Max Concurrent Searches: {self.max_concurrent_searches}")
+        if self.adaptive_concurrency:
+            print(f"   • Adaptive Concurrency: {self.min_concurrent_searches}-{self.max_adaptive_concurrency}")
+        if self.hedge_requests:
+            print(f"   • Hedging: after p{self.hedge_percentile:g} latency, at most {self.hedge_max_ratio:.0%} extra requests")
         print(f"   • Search Timeout: {self.search_timeout}s")
+        print(f"   • Response Cache: {'on' if self.cache_enabled else 'off'} (TTL {self.cache_ttl}s)")
+        print(f"   • Streamed Searches: {'on' if self.stream_searches else 'off'}")
+        print(f"   • Rate Limit: {self.api_rate_limit} req/min, {self.api_token_limit or 'unlimited'} tokens/min")
 
 # Global config instance
 config = Config()
@@ -1,106 +1,136 @@
 #!/usr/bin/env python3
+"""
+Convert markdown research reports to PDF, skipping reports that have not changed.
+"""
+
+import hashlib
+import json
 import os
-import markdown
-from weasyprint import HTML, CSS
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, List, Optional, Tuple
+
+import click
+
+from src.pdf_renderer import RENDER_VERSION, write_pdf
+from config import config
+
+MANIFEST_NAME = ".convert_manifest.json"
+
+def file_hash(path: str) -> str:
+    """Return the SHA-256 of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 16), b""):
+            digest.update(block)
+    return digest.hexdigest()
 
-def convert_md_to_pdf(md_file, pdf_file):
-    """Convert a markdown file to PDF"""
+def load_manifest(pdf_dir: str) -> Dict[str, Dict]:
+    """Load the record of previously converted reports."""
     try:
-        # Read markdown content
-        with open(md_file, 'r', encoding='utf-8') as f:
+        with open(os.path.join(pdf_dir, MANIFEST_NAME), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_manifest(pdf_dir: str, manifest: Dict[str, Dict]):
+    """Write the manifest atomically."""
+    path = os.path.join(pdf_dir, MANIFEST_NAME)
+    with open(path + ".tmp", 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(path + ".tmp", path)
+
+def needs_conversion(md_path: str, pdf_path: str, entry: Optional[Dict]) -> Tuple[bool, Optional[str]]:
+    """Decide whether a report must be (re)converted.
+
+    Returns (convert, content hash). The hash is only computed when the
+    modification time changed since the last conversion, so unchanged
+    archives are checked with one stat() per file.
+    """
+    if not entry or entry.get("render") != RENDER_VERSION or not os.path.exists(pdf_path):
+        return True, None
+    if os.path.getmtime(md_path) == entry.get("mtime"):
+        return False, entry.get("sha256")
+    digest = file_hash(md_path)
+    return digest != entry.get("sha256"), digest
+
+def convert_md_to_pdf(md_path: str, pdf_path: str) -> Tuple[str, bool, str]:
+    """Convert one markdown file to PDF. Runs in a worker process."""
+    try:
+        with open(md_path, 'r', encoding='utf-8') as f:
             md_content = f.read()
-        
-        # Convert to HTML
-        html_content = markdown.markdown(md_content, extensions=['tables', 'fenced_code'])
-        
-        # Add basic HTML structure and styling
-        full_html = f"""
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <meta charset="utf-8">
-            <title>{os.path.basename(md_file)}</title>
-            <style>
-                body {{ 
-                    font-family: Arial, sans-serif; 
-                    line-height: 1.6; 
-                    margin: 40px;
-                    max-width: 800px;
-                }}
-                h1, h2, h3, h4, h5, h6 {{ 
-                    color: #333; 
-                    margin-top: 30px;
-                }}
-                code {{ 
-                    background-color: #f4f4f4; 
-                    padding: 2px 4px; 
-                    border-radius: 3px;
-                    font-family: monospace;
-                }}
-                pre {{ 
-                    background-color: #f4f4f4; 
-                    padding: 10px; 
-                    border-radius: 5px;
-                    overflow-x: auto;
-                }}
-                table {{ 
-                    border-collapse: collapse; 
-                    width: 100%;
-                    margin: 20px 0;
-                }}
-                th, td {{ 
-                    border: 1px solid #ddd; 
-                    padding: 8px; 
-                    text-align: left;
-                }}
-                th {{ 
-                    background-color: #f2f2f2;
-                }}
-                blockquote {{
-                    border-left: 4px solid #ccc;
-                    margin: 0;
-                    padding-left: 20px;
-                    color: #666;
-                }}
-            </style>
-        </head>
-        <body>
-            {html_content}
-        </body>
-        </html>
-        """
-        
-        # Convert to PDF
-        HTML(string=full_html).write_pdf(pdf_file)
-        print(f"Converted: {md_file} -> {pdf_file}")
-        return True
-        
+        write_pdf(md_content, pdf_path, title=os.path.basename(md_path))
+        return md_path, True, ""
     except Exception as e:
-        print(f"Error converting {md_file}: {e}")
-        return False
-
-def main():
-    reports_dir = "/home/ivan/utra-deep-research/reports"
-    pdf_dir = "/home/ivan/utra-deep-research/reports-pdf"
-    
-    # Ensure PDF directory exists
+        return md_path, False, str(e)
+
+def convert_reports(reports_dir: str, pdf_dir: str, jobs: int = 1, force: bool = False) -> Dict[str, int]:
+    """Convert every changed report in `reports_dir` and return counts per outcome."""
     os.makedirs(pdf_dir, exist_ok=True)
-    
-    # Convert all markdown files
-    converted = 0
-    total = 0
-    
-    for filename in os.listdir(reports_dir):
-        if filename.endswith('.md'):
-            total += 1
-            md_path = os.path.join(reports_dir, filename)
-            pdf_filename = filename.replace('.md', '.pdf')
-            pdf_path = os.path.join(pdf_dir, pdf_filename)
-            
-            if convert_md_to_pdf(md_path, pdf_path):
-                converted += 1
-    
-    print(f"\nConversion complete: {converted}/{total} files converted")
+    manifest = {} if force else load_manifest(pdf_dir)
+    counts = {"converted": 0, "skipped": 0, "failed": 0}
+
+    pending: List[Tuple[str, str, str]] = []
+    for filename in sorted(os.listdir(reports_dir)):
+        if not filename.endswith('.md'):
+            continue
+        md_path = os.path.join(reports_dir, filename)
+        pdf_path = os.path.join(pdf_dir, filename[:-len('.md')] + '.pdf')
+        convert, digest = needs_conversion(md_path, pdf_path, manifest.get(filename))
+        if convert:
+            pending.append((filename, md_path, pdf_path))
+        else:
+            counts["skipped"] += 1
+            # Refresh the mtime so a touched-but-unchanged file is cheap next time
+            manifest[filename]["mtime"] = os.path.getmtime(md_path)
+            manifest[filename]["sha256"] = digest
+
+    def record(filename: str, md_path: str, ok: bool, error: str):
+        if ok:
+            counts["converted"] += 1
+            manifest[filename] = {
+                "mtime": os.path.getmtime(md_path),
+                "sha256": file_hash(md_path),
+                "render": RENDER_VERSION,
+            }
+            print(f"Converted: {md_path}")
+        else:
+            counts["failed"] += 1
+            manifest.pop(filename, None)
+            print(f"Error converting {md_path}: {error}")
+
+    if jobs <= 1 or len(pending) <= 1:
+        for filename, md_path, pdf_path in pending:
+            record(filename, *convert_md_to_pdf(md_path, pdf_path))
+    else:
+        # WeasyPrint is CPU-bound, so convert in separate processes
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            futures = {
+                pool.submit(convert_md_to_pdf, md_path, pdf_path): filename
+                for filename, md_path, pdf_path in pending
+            }
+            for future in as_completed(futures):
+                record(futures[future], *future.result())
+
+    save_manifest(pdf_dir, manifest)
+    return counts
+
+@click.command()
+@click.option('--input-dir', '-i', default=None, help='Directory of markdown reports (default: REPORTS_DIR)')
+@click.option('--output-dir', '-o', default=None, help='Directory for PDFs (default: REPORTS_PDF_DIR)')
+@click.option('--jobs', '-j', type=int, default=None, help='Parallel conversions (default: CPU count)')
+@click.option('--force', is_flag=True, help='Convert every report, even if unchanged')
+def main(input_dir: str, output_dir: str, jobs: int, force: bool):
+    """Convert markdown reports to PDF, skipping reports that are already up to date."""
+    reports_dir = input_dir or config.reports_dir
+    pdf_dir = output_dir or config.reports_pdf_dir
+    if not os.path.isdir(reports_dir):
+        raise click.ClickException(f"Reports directory not found: {reports_dir}")
+
+    start = time.time()
+    counts = convert_reports(reports_dir, pdf_dir, jobs or os.cpu_count() or 1, force)
+    print(f"\nConversion complete: {counts['converted']} converted, {counts['skipped']} up to date, "
+          f"{counts['failed']} failed ({time.time() - start:.1f}s)")
 
 if __name__ == "__main__":
     main()
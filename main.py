@@ -3,19 +3,21 @@ ULTRA DEEP RESEARCH - Main CLI Application
 An army of AI agents for comprehensive research and analysis.
 """
 
-import asyncio
+from __future__ import annotations
+
 import click
 import time
-from rich.console import Console
-
-from src.cli_formatter import CLIFormatter
-from src.query_generator import QueryGenerator
-from src.search_executor import SearchExecutor
-from src.result_aggregator import ResultAggregator
-from src.report_generator import ReportGenerator
-from config import config
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
 
-console = Console()
+# asyncio, httpx, rich, config (.env loading) and the pipeline modules are
+# imported by the commands that use them, so --help and argument errors
+# return without loading them. tests/test_startup.py holds the budget.
+if TYPE_CHECKING:
+    import httpx
+    from src.checkpoint import RunCheckpoint
+    from src.cli_formatter import CLIFormatter
+    from src.concurrency import ConcurrencyBudget
+    from src.service import ResearchService
 
 def clean_topic(topic: str) -> str:
     """Clean and normalize the topic input."""
@@ -29,188 +31,586 @@ def clean_topic(topic: str) -> str:
     topic = ' '.join(topic.split())
     return topic.strip()
 
-@click.command()
-@click.argument('topic', type=str)
+class DefaultCommandGroup(click.Group):
+    """Click group that runs a default command when no subcommand is named.
+    
+    Keeps `python main.py "topic"` working alongside named subcommands.
+    """
+    
+    def __init__(self, *args, default_command: str = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.default_command = default_command
+    
+    def parse_args(self, ctx, args):
+        if args and args[0] not in self.commands and args[0] not in ctx.help_option_names:
+            args = [self.default_command] + list(args)
+        return super().parse_args(ctx, args)
+
+@click.group(cls=DefaultCommandGroup, default_command='research')
+def cli():
+    """🚀 ULTRA DEEP RESEARCH - An army of AI agents for comprehensive research"""
+
+def apply_config_overrides(queries: Optional[int], cache: Optional[bool], cache_ttl: Optional[int],
+                           pdf: Optional[str] = None, stream_report: Optional[bool] = None):
+    """Override config values with command line options."""
+    from config import config
+    
+    if queries:
+        config.num_queries = queries
+    if cache is not None:
+        config.cache_enabled = cache
+    if cache_ttl is not None:
+        config.cache_ttl = cache_ttl
+    if pdf is not None:
+        config.pdf_mode = pdf
+    if stream_report is not None:
+        config.stream_report = stream_report
+
+def run_with_tracing(pipeline, trace_file: Optional[str], formatter: CLIFormatter):
+    """Run a pipeline coroutine, exporting a trace of it to `trace_file` if given.
+    
+    The PDF render workers are stopped once the run is over.
+    """
+    import asyncio
+    from src.pdf_renderer import shutdown_render_pool
+    from src.tracing import start_tracing, stop_tracing
+    
+    if trace_file:
+        start_tracing()
+    try:
+        return asyncio.run(pipeline)
+    finally:
+        shutdown_render_pool()
+        tracer = stop_tracing() if trace_file else None
+        if tracer is not None:
+            tracer.export(trace_file)
+            formatter.print_trace_summary(tracer)
+            formatter.print_info(f"Trace written to {trace_file}")
+
+@cli.command()
+@click.argument('topic', type=str, required=False)
 @click.option('--output', '-o', type=str, help='Output filename for the report (saved in reports folder)')
 @click.option('--queries', '-q', type=int, help='Number of queries to generate (default: from config)')
 @click.option('--verbose', '-v', is_flag=True, help='Enable verbose output')
 @click.option('--save-steps', is_flag=True, help='Save intermediate steps')
-def research(topic: str, output: str, queries: int, verbose: bool, save_steps: bool):
+@click.option('--cache/--no-cache', default=None, help='Reuse cached API responses (default: from config)')
+@click.option('--cache-ttl', type=int, help='Maximum age of cached responses in seconds (default: from config)')
+@click.option('--pdf', type=click.Choice(['sync', 'async', 'off']), help='PDF rendering: wait for it, render in the background, or skip (default: from config)')
+@click.option('--stream/--no-stream', 'stream_report', default=None, help='Write the report to disk and the terminal as it is generated (default: from config)')
+@click.option('--resume', 'resume_run_id', type=str, help='Resume an interrupted run by its run ID')
+@click.option('--trace', 'trace_file', type=click.Path(dir_okay=False), help='Write stage and API call timings to FILE (.json: Chrome trace, otherwise JSON lines)')
+@click.option('--quiet', is_flag=True, help='Only print errors and the final summary')
+@click.option('--json-progress', is_flag=True, help='Print search progress as JSON lines instead of the live view (implies --quiet)')
+def research(topic: str, output: str, queries: int, verbose: bool, save_steps: bool, cache: bool, cache_ttl: int,
+             pdf: str, stream_report: bool, resume_run_id: str, trace_file: str, quiet: bool, json_progress: bool):
     """
     🚀 ULTRA DEEP RESEARCH - Comprehensive AI-powered research
     
-    TOPIC: The research topic you want to investigate
+    TOPIC: The research topic you want to investigate (optional with --resume)
     """
-    
-    # Clean the topic input
-    topic = clean_topic(topic)
+    from config import config
+    from src.cli_formatter import CLIFormatter
+    from src.output import configure_output
     
     # Initialize CLI formatter
-    formatter = CLIFormatter()
+    configure_output(quiet, json_progress)
+    formatter = CLIFormatter(quiet=quiet, json_progress=json_progress)
     formatter.print_welcome()
     
+    checkpoint = None
+    if resume_run_id:
+        from src.checkpoint import RunCheckpoint
+        try:
+            checkpoint = RunCheckpoint.load(resume_run_id)
+        except FileNotFoundError as e:
+            formatter.print_error(str(e))
+            return
+        topic = checkpoint.topic
+    elif not topic:
+        formatter.print_error("Missing TOPIC (or --resume RUN_ID).")
+        return
+    
+    # Clean the topic input
+    topic = clean_topic(topic)
+    
     # Validate configuration
     if not config.validate():
         formatter.print_error("Configuration validation failed. Please check your .env file.")
         return
     
     # Override config with command line options
-    if queries:
-        config.num_queries = queries
+    apply_config_overrides(queries, cache, cache_ttl, pdf, stream_report)
     
     # Print configuration
     if verbose:
         formatter.print_config(config)
     
     # Run the research pipeline
-    asyncio.run(run_research_pipeline(topic, output, formatter, verbose, save_steps))
+    run_with_tracing(run_research_pipeline(topic, output, formatter, verbose, save_steps, checkpoint=checkpoint),
+                     trace_file, formatter)
 
-async def run_research_pipeline(topic: str, output: str, formatter: CLIFormatter, verbose: bool, save_steps: bool):
-    """Execute the complete research pipeline."""
+async def run_research_pipeline(topic: str, output: str, formatter: CLIFormatter, verbose: bool, save_steps: bool,
+                                client: Optional[httpx.AsyncClient] = None,
+                                search_budget: Optional[ConcurrencyBudget] = None,
+                                checkpoint: Optional[RunCheckpoint] = None) -> Dict[str, Any]:
+    """Execute the complete research pipeline and return a summary of the run.
+    
+    All components share one HTTP client. Pass `client` to reuse an existing
+    one; otherwise the pipeline creates its own and closes it when done.
+    Pipelines given the same `search_budget` share one search concurrency
+    limit, with free slots handed out fairly between topics.
+    
+    Every stage's output is saved to `checkpoint` (a new run is created if
+    none is given). Stages already recorded in the checkpoint are skipped.
+    """
+    from config import config
+    from src.api_client import create_http_client
+    from src.checkpoint import RunCheckpoint
+    from src.dedup import deduplicate_queries
+    from src.query_generator import QueryGenerator
+    from src.report_generator import ReportGenerator
+    from src.response_cache import track_cache_usage
+    from src.result_aggregator import ResultAggregator
+    from src.result_store import ResultStore
+    from src.search_executor import SearchExecutor
+    from src.tracing import StageSpans
+    
+    if checkpoint is None:
+        checkpoint = RunCheckpoint.create(topic)
+    formatter.print_info(f"Run ID: {checkpoint.run_id} (resume with --resume {checkpoint.run_id})")
+    
+    owns_client = client is None
+    if owns_client:
+        client = create_http_client()
+    # Pipelines in one process share the cache; count only this topic's lookups
+    cache_usage = track_cache_usage()
     
     # Initialize components
-    query_generator = QueryGenerator()
-    search_executor = SearchExecutor()
-    result_aggregator = ResultAggregator()
-    report_generator = ReportGenerator()
+    query_generator = QueryGenerator(client)
+    search_executor = SearchExecutor(client, budget=search_budget, budget_key=topic)
+    result_store = ResultStore(config.spool_dir) if config.spool_results else None
+    result_aggregator = ResultAggregator(store=result_store)
+    report_generator = ReportGenerator(client)
+    
+    stages = StageSpans(topic)
+    pipeline_start = time.time()
+    summary = {
+        "run_id": checkpoint.run_id,
+        "topic": topic,
+        "status": "failed",
+        "completed_searches": 0,
+        "queries_merged": 0,
+        "total_queries": 0,
+        "results": 0,
+        "report_file": "",
+        "pdf_file": "",
+        "time": 0.0
+    }
     
-    # Create progress tracker
-    progress = formatter.create_progress()
+    def on_pdf_complete(pdf_path: str, error: Optional[Exception]):
+        # Background PDFs finish before the pipeline returns (report_generator.close() waits for them)
+        summary["pdf_file"] = "" if error else pdf_path
+    
+    report_generator.on_pdf_complete = on_pdf_complete
     
     try:
         # Start research without progress tracking
         # Stage 1: Initial Context Search
+            stages.start("Initial Context Search")
             formatter.print_stage_start("Initial Context Search", 1, 5)
-            task_1 = formatter.add_stage_task("🔍 Initial Context Search", 1)
             
             try:
-                initial_query = await query_generator.generate_initial_search_query(topic)
-                formatter.print_info(f"Generated initial search query: {initial_query}")
-                
-                # Execute initial search
-                initial_results = await search_executor.execute_batch_searches(
-                    [initial_query]
-                )
-                
-                context = initial_results[0].content if initial_results else ""
-                formatter.complete_task("🔍 Initial Context Search")
-                formatter.print_stage_complete("Initial Context Search", f"Context gathered")
+                context = checkpoint.load_context()
+                if context is not None:
+                    formatter.print_stage_complete("Initial Context Search", "Context restored from checkpoint")
+                else:
+                    initial_query = await query_generator.generate_initial_search_query(topic)
+                    formatter.print_info(f"Generated initial search query: {initial_query}")
+                    
+                    # Execute initial search
+                    initial_results = await search_executor.execute_batch_searches(
+                        [initial_query]
+                    )
+                    
+                    context = initial_results[0].content if initial_results else ""
+                    if initial_results and initial_results[0].source != "Error":
+                        checkpoint.save_context(initial_query, context)
+                    formatter.print_stage_complete("Initial Context Search", f"Context gathered")
                 
             except Exception as e:
                 formatter.print_error(f"Initial search failed: {str(e)}")
                 context = ""
             
             # Stage 2: Query Generation
+            stages.start("Query Generation")
             formatter.print_stage_start("Query Generation", 2, 5)
-            task_2 = formatter.add_stage_task("🧠 Generating Queries", 1)
             
+            queries_merged = 0
             try:
-                queries = await query_generator.generate_diverse_queries(topic, context)
-                formatter.print_info(f"Generated {len(queries)} diverse search queries")
-                formatter.complete_task("🧠 Generating Queries")
-                formatter.print_stage_complete("Query Generation", f"{len(queries)} queries created")
+                queries = checkpoint.load_queries()
+                if queries is not None:
+                    formatter.print_stage_complete("Query Generation", f"{len(queries)} queries restored from checkpoint")
+                else:
+                    queries = await query_generator.generate_diverse_queries(topic, context)
+                    if config.query_dedup:
+                        # Paraphrased queries would each cost a full search call
+                        generated = len(queries)
+                        queries = deduplicate_queries(queries, config.query_dedup_threshold)
+                        queries_merged = generated - len(queries)
+                        if queries_merged:
+                            formatter.print_info(f"Merged {queries_merged} near-duplicate queries "
+                                                 f"({queries_merged} search calls saved)")
+                    checkpoint.save_queries(queries)
+                    formatter.print_info(f"Generated {len(queries)} diverse search queries")
+                    formatter.print_stage_complete("Query Generation", f"{len(queries)} queries created")
                 
                 if save_steps:
                     await save_queries_to_file(queries, topic)
                 
             except Exception as e:
                 formatter.print_error(f"Query generation failed: {str(e)}")
-                return
+                return summary
             
             # Stage 3: Search Execution
+            stages.start("Search Execution")
             formatter.print_stage_start("Search Execution", 3, 5)
-            task_3 = formatter.add_stage_task("⚡ Executing Searches", len(queries))
             
             try:
-                search_results = await search_executor.execute_batch_searches(
-                    queries
-                )
+                # Searches that already succeeded in an earlier attempt are not repeated
+                previous_results = checkpoint.load_results()
+                done_queries = {result.query for result in previous_results}
+                pending_queries = [query for query in queries if query not in done_queries]
+                if previous_results:
+                    formatter.print_info(f"Restored {len(previous_results)} search results from checkpoint, "
+                                         f"{len(pending_queries)} searches remaining")
+                
+                search_results = list(previous_results)
+                if config.stream_results:
+                    # Deduplicate, filter and score each result as soon as it lands
+                    result_aggregator.reset()
+                    for result in previous_results:
+                        result_aggregator.add_result(result)
+                
+                # Only this stage's searches are shown, counted apart from other pipelines'
+                search_progress = formatter.begin_searches()
+                try:
+                    async for result in search_executor.stream_searches(pending_queries, search_progress):
+                        checkpoint.append_result(result)
+                        if checkpoint.flush_due():
+                            await checkpoint.flush_results()
+                        if config.stream_results:
+                            result_aggregator.add_result(result)
+                        else:
+                            search_results.append(result)
+                finally:
+                    formatter.end_searches(search_progress)
+                    await checkpoint.flush_results()
+                
+                if config.stream_results:
+                    search_results = None
                 
                 search_stats = search_executor.get_stats()
-                formatter.complete_task("⚡ Executing Searches")
+                search_stats.queries_merged = queries_merged
+                search_stats.total_queries = len(queries)
+                search_stats.completed_searches += len(previous_results)
+                summary["completed_searches"] = search_stats.completed_searches
+                summary["queries_merged"] = queries_merged
+                summary["total_queries"] = search_stats.total_queries
                 formatter.print_stage_complete("Search Execution", 
                     f"{search_stats.completed_searches}/{search_stats.total_queries} completed")
                 
             except Exception as e:
                 formatter.print_error(f"Search execution failed: {str(e)}")
-                return
+                return summary
             
             # Stage 4: Result Aggregation
+            stages.start("Result Aggregation")
             formatter.print_stage_start("Result Aggregation", 4, 5)
-            task_4 = formatter.add_stage_task("📊 Aggregating Results", 1)
             
             try:
-                aggregated_results, statistics = result_aggregator.aggregate_results(search_results)
-                formatter.complete_task("📊 Aggregating Results")
+                if search_results is None:
+                    aggregated_results, statistics = result_aggregator.finalize()
+                else:
+                    aggregated_results, statistics = result_aggregator.aggregate_results(search_results)
+                summary["results"] = len(aggregated_results)
                 formatter.print_stage_complete("Result Aggregation", 
                     f"{len(aggregated_results)} high-quality results")
                 
             except Exception as e:
                 formatter.print_error(f"Result aggregation failed: {str(e)}")
-                return
+                return summary
+            
+            # A resumed run whose report was already written is finished
+            report_file = checkpoint.load_report_file()
+            if report_file:
+                formatter.print_success(f"Report already generated: {report_file}")
+                summary["report_file"] = report_file
+                summary["status"] = "completed"
+                return summary
             
             # Stage 5: Report Generation
+            stages.start("Report Generation")
             formatter.print_stage_start("Report Generation", 5, 5)
-            task_5 = formatter.add_stage_task("🎯 Generating Report", 1)
             
             try:
                 final_report = await report_generator.generate_final_report(
                     topic, aggregated_results, statistics
                 )
-                formatter.complete_task("🎯 Generating Report")
                 formatter.print_stage_complete("Report Generation", "Comprehensive report created")
                 
             except Exception as e:
                 formatter.print_error(f"Report generation failed: {str(e)}")
-                return
+                return summary
             
             # Save report
             report_file = await report_generator.save_report(final_report, topic, output)
+            if report_file:
+                checkpoint.save_report_file(report_file)
             
             # Print final statistics
+            search_stats.cache_hits = cache_usage.hits
+            search_stats.cache_misses = cache_usage.misses
             formatter.print_statistics(search_stats.__dict__, statistics)
             
             # Print final summary
-            total_time = time.time() - (formatter.start_time or time.time())
+            total_time = time.time() - pipeline_start
             formatter.print_final_summary(topic, report_file, total_time)
             
+            summary["report_file"] = report_file
+            summary["status"] = "completed" if report_file else "failed"
+            
     except KeyboardInterrupt:
         formatter.print_warning("Research interrupted by user")
+        summary["status"] = "interrupted"
     except Exception as e:
         formatter.print_error(f"Unexpected error: {str(e)}")
     finally:
+        stages.finish()
+        summary["time"] = time.time() - pipeline_start
         # Cleanup
         await search_executor.close()
-        query_generator.close()
-        report_generator.close()
+        await query_generator.close()
+        await report_generator.close()
+        if result_store is not None:
+            result_store.close()
+        checkpoint.close()
+        if owns_client:
+            await client.aclose()
         formatter.cleanup()
+    
+    return summary
+
+@cli.command('research-batch')
+@click.argument('topics_file', type=click.File('r', encoding='utf-8'), default='-')
+@click.option('--queries', '-q', type=int, help='Number of queries to generate per topic (default: from config)')
+@click.option('--concurrency', '-c', type=int, help='Concurrent searches shared by all topics (default: MAX_CONCURRENT_SEARCHES)')
+@click.option('--parallel-topics', '-p', type=int, default=4, show_default=True, help='Topics researched at the same time')
+@click.option('--verbose', '-v', is_flag=True, help='Enable verbose output')
+@click.option('--save-steps', is_flag=True, help='Save intermediate steps')
+@click.option('--cache/--no-cache', default=None, help='Reuse cached API responses (default: from config)')
+@click.option('--cache-ttl', type=int, help='Maximum age of cached responses in seconds (default: from config)')
+@click.option('--pdf', type=click.Choice(['sync', 'async', 'off']), help='PDF rendering: wait for it, render in the background, or skip (default: from config)')
+@click.option('--trace', 'trace_file', type=click.Path(dir_okay=False), help='Write stage and API call timings to FILE (.json: Chrome trace, otherwise JSON lines)')
+@click.option('--quiet', is_flag=True, help='Only print errors and the final summary')
+@click.option('--json-progress', is_flag=True, help='Print search progress as JSON lines instead of the live view (implies --quiet)')
+def research_batch(topics_file, queries: int, concurrency: int, parallel_topics: int, verbose: bool,
+                   save_steps: bool, cache: bool, cache_ttl: int, pdf: str, trace_file: str, quiet: bool,
+                   json_progress: bool):
+    """
+    📚 Research many topics in one process
+    
+    TOPICS_FILE: File with one topic per line (default: stdin). Blank lines
+    and lines starting with # are ignored.
+    """
+    from config import config
+    from src.cli_formatter import CLIFormatter
+    from src.output import configure_output
+    
+    topics = [clean_topic(line) for line in topics_file if line.strip() and not line.lstrip().startswith('#')]
+    topics = [topic for topic in topics if topic]
+    
+    configure_output(quiet, json_progress)
+    formatter = CLIFormatter(quiet=quiet, json_progress=json_progress)
+    formatter.print_welcome()
+    
+    if not topics:
+        formatter.print_error("No topics to research.")
+        return
+    
+    if not config.validate():
+        formatter.print_error("Configuration validation failed. Please check your .env file.")
+        return
+    
+    apply_config_overrides(queries, cache, cache_ttl, pdf)
+    
+    if verbose:
+        formatter.print_config(config)
+    
+    run_with_tracing(run_batch_pipeline(
+        topics, formatter, verbose, save_steps,
+        concurrency or config.max_concurrent_searches, parallel_topics
+    ), trace_file, formatter)
+
+async def run_batch_pipeline(topics: List[str], formatter: CLIFormatter, verbose: bool, save_steps: bool,
+                             concurrency: int, parallel_topics: int) -> List[Dict[str, Any]]:
+    """Run one research pipeline per topic inside a single event loop.
+    
+    All pipelines share the HTTP client, rate limiter and response cache, and
+    one search concurrency budget that is split fairly between topics.
+    """
+    import asyncio
+    from src.api_client import create_http_client
+    from src.concurrency import ConcurrencyBudget
+    
+    budget = ConcurrencyBudget(concurrency)
+    topic_slots = asyncio.Semaphore(max(1, parallel_topics))
+    batch_start = time.time()
+    formatter.print_info(f"Researching {len(topics)} topics ({parallel_topics} at a time, {concurrency} concurrent searches)")
+    
+    async def run_topic(client: httpx.AsyncClient, topic: str) -> Dict[str, Any]:
+        async with topic_slots:
+            return await run_research_pipeline(
+                topic, None, formatter, verbose, save_steps, client=client, search_budget=budget
+            )
+    
+    async with create_http_client(concurrency=concurrency) as client:
+        summaries = await asyncio.gather(
+            *(run_topic(client, topic) for topic in topics), return_exceptions=True
+        )
+    
+    results = []
+    for topic, summary in zip(topics, summaries):
+        if isinstance(summary, BaseException):
+            formatter.print_error(f"{topic}: {str(summary)}")
+            summary = {"topic": topic, "status": "failed", "completed_searches": 0,
+                       "total_queries": 0, "results": 0, "report_file": "", "pdf_file": "", "time": 0.0}
+        results.append(summary)
+    
+    formatter.print_batch_summary(results, time.time() - batch_start)
+    return results
+
+@cli.command()
+@click.option('--host', type=str, help='Address to listen on (default: SERVICE_HOST)')
+@click.option('--port', type=int, help='Port to listen on (default: SERVICE_PORT)')
+@click.option('--socket', 'socket_path', type=click.Path(dir_okay=False), help='Listen on this Unix socket instead of TCP')
+@click.option('--workers', '-w', type=int, help='Research jobs run at the same time (default: SERVICE_WORKERS)')
+@click.option('--concurrency', '-c', type=int, help='Concurrent searches shared by all jobs (default: MAX_CONCURRENT_SEARCHES)')
+@click.option('--queries', '-q', type=int, help='Number of queries to generate per job (default: from config)')
+@click.option('--verbose', '-v', is_flag=True, help='Enable verbose output')
+@click.option('--cache/--no-cache', default=None, help='Reuse cached API responses (default: from config)')
+@click.option('--cache-ttl', type=int, help='Maximum age of cached responses in seconds (default: from config)')
+@click.option('--pdf', type=click.Choice(['sync', 'async', 'off']), help='PDF rendering: wait for it, render in the background, or skip (default: from config)')
+def serve(host: str, port: int, socket_path: str, workers: int, concurrency: int, queries: int, verbose: bool,
+          cache: bool, cache_ttl: int, pdf: str):
+    """
+    📡 Run a long-lived research service with a job queue
+    
+    Jobs are submitted over a small JSON API (POST /jobs, GET /jobs/ID,
+    GET /jobs/ID/report) and share one HTTP client, rate limiter and cache.
+    """
+    import asyncio
+    from config import config
+    from src.cli_formatter import CLIFormatter
+    from src.service import ResearchService
+    
+    formatter = CLIFormatter()
+    formatter.print_welcome()
+    
+    if not config.validate():
+        formatter.print_error("Configuration validation failed. Please check your .env file.")
+        return
+    
+    apply_config_overrides(queries, cache, cache_ttl, pdf)
+    
+    if verbose:
+        formatter.print_config(config)
+    
+    async def pipeline(topic: str, client: httpx.AsyncClient, search_budget: ConcurrencyBudget) -> Dict[str, Any]:
+        return await run_research_pipeline(
+            clean_topic(topic), None, formatter, verbose, False, client=client, search_budget=search_budget
+        )
+    
+    service = ResearchService(
+        pipeline,
+        workers=workers or config.service_workers,
+        concurrency=concurrency or config.max_concurrent_searches
+    )
+    try:
+        asyncio.run(run_service(service, formatter, host or config.service_host, port or config.service_port,
+                                socket_path))
+    except KeyboardInterrupt:
+        formatter.print_warning("Service stopped")
+
+@cli.command('prune-runs')
+@click.option('--older-than', 'older_than', type=float, required=True, help='Delete runs not written to for this many days')
+def prune_runs(older_than: float):
+    """
+    🗑️ Delete old run checkpoints
+    
+    Runs that are deleted can no longer be continued with --resume.
+    """
+    from src.checkpoint import RunCheckpoint
+    from src.cli_formatter import CLIFormatter
+    
+    formatter = CLIFormatter()
+    if older_than <= 0:
+        formatter.print_error("--older-than must be more than 0 days")
+        return
+    pruned = RunCheckpoint.prune(max_age_days=older_than)
+    formatter.print_success(f"Deleted {len(pruned)} run(s)")
+
+async def run_service(service: ResearchService, formatter: CLIFormatter, host: str, port: int,
+                      socket_path: Optional[str] = None):
+    """Serve research jobs until cancelled."""
+    import asyncio
+    from src.pdf_renderer import shutdown_render_pool
+    
+    await service.start()
+    try:
+        await service.serve(host, port, socket_path)
+        address = socket_path or f"http://{host}:{port}"
+        formatter.print_info(f"Research service listening on {address} with {service.workers} workers")
+        await asyncio.Event().wait()
+    finally:
+        await service.close()
+        # Let queued PDFs finish without blocking the loop, then stop the workers
+        await asyncio.to_thread(shutdown_render_pool)
 
 async def save_queries_to_file(queries: list, topic: str):
     """Save generated queries to a file for debugging."""
+    import asyncio
     import os
+    from config import config
+    from src.output import console, notice_console
+    
     timestamp = time.strftime("%Y%m%d_%H%M%S")
     filename = f"queries_{topic.replace(' ', '_')}_{timestamp}.txt"
     
     # Ensure reports directory exists
-    reports_dir = "reports"
+    reports_dir = config.reports_dir
     os.makedirs(reports_dir, exist_ok=True)
     
     # Create full path
     filepath = os.path.join(reports_dir, filename)
     
-    try:
+    lines = [
+        f"Generated Queries for: {topic}\n",
+        f"Timestamp: {time.strftime('%Y-%m-%d %H:%M:%S')}\n",
+        f"Total Queries: {len(queries)}\n",
+        "=" * 50 + "\n\n",
+    ]
+    lines.extend(f"{i}. {query}\n" for i, query in enumerate(queries, 1))
+    
+    def write():
         with open(filepath, 'w', encoding='utf-8') as f:
-            f.write(f"Generated Queries for: {topic}\n")
-            f.write(f"Timestamp: {time.strftime('%Y-%m-%d %H:%M:%S')}\n")
-            f.write(f"Total Queries: {len(queries)}\n")
-            f.write("=" * 50 + "\n\n")
-            
-            for i, query in enumerate(queries, 1):
-                f.write(f"{i}. {query}\n")
-        
+            f.writelines(lines)
+    
+    try:
+        # Keep disk I/O off the event loop so concurrent pipelines keep running
+        await asyncio.to_thread(write)
         console.print(f"📄 Queries saved to: {filepath}")
     except Exception as e:
-        console.print(f"⚠️  Failed to save queries: {str(e)}")
+        notice_console.print(f"⚠️  Failed to save queries: {str(e)}")
 
 if __name__ == "__main__":
-    research()
+    cli()
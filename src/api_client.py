@@ -0,0 +1,281 @@
+"""
+Shared OpenRouter HTTP client and request helper.
+"""
+
+import asyncio
+import json
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional
+
+import httpx
+
+from .output import console
+from .rate_limiter import RateLimiter, estimate_request_tokens, get_rate_limiter
+from .response_cache import get_response_cache
+from .retry import get_circuit_breaker, get_retry_policy
+from .tracing import RequestTiming, Span, Tracer, get_tracer
+from .utils import StreamMetrics
+from config import config
+
+OPENROUTER_URL = "https://openrouter.ai/api/v1/chat/completions"
+
+def create_http_client(transport: Optional[httpx.AsyncBaseTransport] = None,
+                       concurrency: Optional[int] = None) -> httpx.AsyncClient:
+    """Create the async client shared by every pipeline component.
+
+    The caller owns the client and must close it with ``aclose()`` (or use it
+    as an async context manager). Pass a custom transport to route requests
+    somewhere other than the real API, e.g. in tests.
+
+    The connection pool holds `concurrency` searches (default:
+    MAX_CONCURRENT_SEARCHES), or as many as adaptive concurrency may allow,
+    so searches never queue for a connection inside httpx.
+    """
+    return httpx.AsyncClient(
+        timeout=httpx.Timeout(600.0, connect=15.0),  # 10 minutes total, 15s connect
+        headers={
+            "Authorization": f"Bearer {config.openrouter_api_key}",
+            "Content-Type": "application/json",
+            "HTTP-Referer": "https://utra-deep-research.com",
+            "X-Title": "ULTRA DEEP RESEARCH"
+        },
+        limits=connection_limits(concurrency),
+        transport=transport
+    )
+
+def connection_limits(concurrency: Optional[int] = None) -> httpx.Limits:
+    """Return pool limits sized for the most searches that can run at once."""
+    searches = concurrency or config.max_concurrent_searches
+    if config.adaptive_concurrency:
+        searches = max(searches, config.max_adaptive_concurrency)
+    return httpx.Limits(
+        max_keepalive_connections=searches,
+        max_connections=searches + 5  # Headroom for non-search calls
+    )
+
+async def send_chat_request(client: httpx.AsyncClient, request_data: Dict[str, Any],
+                            timeout: Optional[float] = None,
+                            rate_limiter: Optional[RateLimiter] = None,
+                            on_send: Optional[Callable[[], None]] = None) -> httpx.Response:
+    """POST a chat completion request through the response cache, rate limiter and retry policy.
+
+    `on_send` is called each time an attempt leaves the rate limiter and is
+    actually sent, so callers can time the request without the queueing.
+    """
+    cache = get_response_cache()
+    if cache is not None:
+        cached = await cache.aget(request_data)
+        if cached is not None:
+            return httpx.Response(
+                200,
+                json=cached,
+                request=httpx.Request("POST", OPENROUTER_URL),
+                extensions={"from_cache": True}
+            )
+
+    limiter = rate_limiter or get_rate_limiter()
+    request_timeout = httpx.Timeout(timeout, connect=15.0) if timeout else httpx.USE_CLIENT_DEFAULT
+
+    async def send(extensions: Optional[Dict[str, Any]]) -> httpx.Response:
+        if on_send is not None:
+            on_send()
+        return await client.post(OPENROUTER_URL, json=request_data, timeout=request_timeout,
+                                 extensions=extensions)
+
+    response = await _execute_with_retries(send, request_data, limiter)
+
+    if cache is not None and response.status_code == 200:
+        try:
+            await cache.aset(request_data, response.json())
+        except (TypeError, ValueError):
+            pass  # Not a JSON body; nothing worth caching
+
+    return response
+
+async def _execute_with_retries(send: Callable[[Optional[Dict[str, Any]]], Awaitable[httpx.Response]],
+                                request_data: Dict[str, Any],
+                                limiter: RateLimiter) -> httpx.Response:
+    """Run `send` under the rate limiter, retrying transient failures with jittered backoff.
+
+    `send` receives the request extensions to use (None unless tracing).
+    Every attempt first checks the model's circuit breaker, which raises
+    CircuitOpenError while the model is failing. Server errors, transport
+    failures and a 429 that outlasted the limiter's retries count against
+    the breaker; any other response closes it again. While tracing, each
+    attempt is recorded as an "api" span.
+
+    The limiter's 429 retries are shared by all attempts of one call, so a
+    call is sent at most RETRY_MAX_ATTEMPTS + MAX_RATE_LIMIT_RETRIES times.
+    """
+    model = request_data.get("model", "")
+    policy = get_retry_policy()
+    breaker = get_circuit_breaker(model)
+    tracer = get_tracer()
+    policy.record_request()
+
+    attempt = 0
+    rate_limit_retries = limiter.max_retries
+    while True:
+        breaker.before_call()
+        if tracer is None:
+            call = lambda: send(None)
+        else:
+            timing = RequestTiming()
+            call = timing.wrap(send)
+            attempt_start = time.monotonic()
+        sends = 0
+
+        async def counted_call(call=call):
+            nonlocal sends
+            sends += 1
+            return await call()
+
+        try:
+            response = await limiter.execute(counted_call, request_data, max_retries=rate_limit_retries)
+        except httpx.TransportError as e:
+            breaker.record_failure()
+            if tracer is not None:
+                _record_api_span(tracer, model, attempt, attempt_start, timing, status=type(e).__name__)
+            if not (policy.is_retryable_exception(e) and policy.should_retry(attempt)):
+                raise
+            reason = type(e).__name__
+        except asyncio.CancelledError:
+            breaker.abandon_call()
+            if tracer is not None:
+                _record_api_span(tracer, model, attempt, attempt_start, timing, status="cancelled")
+            raise
+        else:
+            if response.status_code >= 500 or response.status_code == 429:
+                breaker.record_failure()
+            else:
+                breaker.record_success()
+            if tracer is not None:
+                # Streamed responses extend their span until the stream is finished
+                response.extensions["trace_span"] = _record_api_span(
+                    tracer, model, attempt, attempt_start, timing, response=response
+                )
+            if not (policy.is_retryable_status(response.status_code) and policy.should_retry(attempt)):
+                return response
+            await response.aclose()
+            reason = f"HTTP {response.status_code}"
+        finally:
+            rate_limit_retries = max(0, rate_limit_retries - max(0, sends - 1))
+
+        delay = policy.delay(attempt)
+        attempt += 1
+        console.print(f"↻ Retrying {model} after {reason} "
+                      f"(attempt {attempt + 1}/{policy.max_attempts}) in {delay:.1f}s")
+        await asyncio.sleep(delay)
+
+def _record_api_span(tracer: Tracer, model: str, attempt: int, started_at: float, timing: RequestTiming,
+                     response: Optional[httpx.Response] = None, status: Any = None) -> Span:
+    """Record one API call attempt, from joining the rate limiter queue to its outcome."""
+    now = time.monotonic()
+    return tracer.record(
+        "chat completion", "api", started_at, now,
+        model=model,
+        attempt=attempt + 1,
+        status=response.status_code if response is not None else status,
+        queue_wait=(timing.sent_at or now) - started_at,
+        connect_time=timing.connect_time,
+        server_time=timing.server_time,
+        rate_limited=max(0, timing.sends - 1),
+        bytes_sent=len(response.request.content) if response is not None else None,
+        bytes_received=_bytes_received(response) if response is not None else 0,
+    )
+
+def _bytes_received(response: httpx.Response) -> int:
+    """Return the body bytes read so far (the body size for responses built in memory)."""
+    if response.num_bytes_downloaded:
+        return response.num_bytes_downloaded
+    try:
+        return len(response.content)
+    except httpx.ResponseNotRead:
+        return 0
+
+async def stream_chat_request(client: httpx.AsyncClient, request_data: Dict[str, Any],
+                              timeout: Optional[float] = None,
+                              rate_limiter: Optional[RateLimiter] = None,
+                              metrics: Optional[StreamMetrics] = None,
+                              on_send: Optional[Callable[[], None]] = None) -> AsyncIterator[str]:
+    """Stream a chat completion over server-sent events, yielding content as it arrives.
+
+    Timings are recorded on `metrics`; `on_send` works as in send_chat_request. Closing the generator early (``aclose()``)
+    closes the HTTP stream. Only streams the server finished are cached; a
+    cached response is yielded as a single chunk. Non-200 responses raise
+    ``httpx.HTTPStatusError``.
+    """
+    metrics = metrics if metrics is not None else StreamMetrics()
+    cache = get_response_cache()
+    if cache is not None:
+        cached = await cache.aget(request_data)
+        if cached is not None:
+            content = cached["choices"][0]["message"]["content"]
+            metrics.started_at = metrics.first_token_at = metrics.finished_at = time.monotonic()
+            metrics.characters = len(content)
+            metrics.complete = metrics.from_cache = True
+            yield content
+            return
+
+    limiter = rate_limiter or get_rate_limiter()
+    request_timeout = httpx.Timeout(timeout, connect=15.0) if timeout else httpx.USE_CLIENT_DEFAULT
+    stream_data = dict(request_data, stream=True, stream_options={"include_usage": True})
+
+    async def send(extensions: Optional[Dict[str, Any]]) -> httpx.Response:
+        metrics.started_at = time.monotonic()
+        if on_send is not None:
+            on_send()
+        request = client.build_request("POST", OPENROUTER_URL, json=stream_data, timeout=request_timeout,
+                                       extensions=extensions)
+        response = await client.send(request, stream=True)
+        if response.status_code != 200:
+            await response.aread()  # Error bodies are small; read them so the connection is released
+        return response
+
+    # Only the connection and status are retried; a stream that fails midway is not
+    response = await _execute_with_retries(send, request_data, limiter)
+    parts = []
+    usage = None
+    try:
+        response.raise_for_status()
+        async for line in response.aiter_lines():
+            # Skip blank separators and keep-alive comments such as ": OPENROUTER PROCESSING"
+            if not line.startswith("data:"):
+                continue
+            payload = line[5:].strip()
+            if payload == "[DONE]":
+                metrics.complete = True
+                break
+            try:
+                chunk = json.loads(payload)
+            except ValueError:
+                continue
+
+            if "error" in chunk:
+                raise RuntimeError(f"Stream error: {chunk['error'].get('message', chunk['error'])}")
+            usage = chunk.get("usage") or usage
+            choices = chunk.get("choices") or []
+            delta = (choices[0].get("delta") or {}).get("content") if choices else None
+            if delta:
+                if metrics.first_token_at is None:
+                    metrics.first_token_at = time.monotonic()
+                metrics.characters += len(delta)
+                parts.append(delta)
+                yield delta
+    finally:
+        metrics.finished_at = time.monotonic()
+        await response.aclose()
+        span = response.extensions.get("trace_span")
+        if span is not None:
+            span.end = metrics.finished_at
+            span.attributes.update(stream=True, complete=metrics.complete,
+                                   bytes_received=_bytes_received(response))
+
+    if usage:
+        metrics.completion_tokens = usage.get("completion_tokens")
+        limiter.record_usage(estimate_request_tokens(request_data), usage.get("total_tokens"))
+    if cache is not None and metrics.complete:
+        body = {"choices": [{"message": {"role": "assistant", "content": "".join(parts)}}]}
+        if usage:
+            body["usage"] = usage
+        await cache.aset(request_data, body)
@@ -0,0 +1,208 @@
+"""
+Run checkpoints so interrupted research can resume without repeating API calls.
+"""
+
+import asyncio
+import json
+import os
+import re
+import shutil
+import threading
+import time
+from dataclasses import asdict
+from typing import Any, Dict, List, Optional
+
+from .output import notice_console
+from .utils import SearchResult
+from config import config
+
+class RunCheckpoint:
+    """Persists each pipeline stage's output to a run directory as it is produced.
+
+    Layout of ``<runs_dir>/<run_id>/``:
+
+    - ``meta.json``: topic, creation time and the final report path
+    - ``context.json``: initial search query and the context it returned
+    - ``queries.json``: generated search queries
+    - ``results.jsonl``: one search result per line, appended in small batches as searches complete
+
+    If RUNS_RETENTION_DAYS is set, starting a run deletes runs untouched for
+    longer than that; by default every run is kept.
+    """
+
+    RESULTS_FLUSH_INTERVAL = 0.5  # Seconds between writes of queued results
+    RESULTS_FLUSH_LINES = 200     # Queued results that force a write sooner
+
+    def __init__(self, run_id: str, runs_dir: Optional[str] = None):
+        self.run_id = run_id
+        self.run_dir = os.path.join(runs_dir or config.runs_dir, run_id)
+        self.meta: Dict[str, Any] = self._read_json("meta.json") or {}
+        self._pending_results: List[str] = []
+        self._last_flush = time.monotonic()
+        self._results_file = None
+        self._results_lock = threading.Lock()  # Writes run in worker threads
+
+    @classmethod
+    def create(cls, topic: str, runs_dir: Optional[str] = None) -> "RunCheckpoint":
+        """Start a new run directory for `topic`."""
+        cls.prune(runs_dir)
+        slug = re.sub(r'[^a-z0-9]+', '_', topic.lower()).strip('_')[:40] or "run"
+        run_id = f"{time.strftime('%Y%m%d_%H%M%S')}_{slug}"
+        checkpoint = cls(run_id, runs_dir)
+
+        # Two runs of the same topic within a second get distinct directories
+        suffix = 1
+        while os.path.exists(checkpoint.run_dir):
+            suffix += 1
+            checkpoint = cls(f"{run_id}_{suffix}", runs_dir)
+
+        os.makedirs(checkpoint.run_dir)
+        checkpoint.meta = {"run_id": checkpoint.run_id, "topic": topic, "created": time.time()}
+        checkpoint._write_json("meta.json", checkpoint.meta)
+        return checkpoint
+
+    @classmethod
+    def load(cls, run_id: str, runs_dir: Optional[str] = None) -> "RunCheckpoint":
+        """Open an existing run, raising FileNotFoundError if it does not exist."""
+        checkpoint = cls(run_id, runs_dir)
+        if not checkpoint.meta:
+            raise FileNotFoundError(f"No checkpoint found for run '{run_id}' in {checkpoint.run_dir}")
+        return checkpoint
+
+    @staticmethod
+    def prune(runs_dir: Optional[str] = None, max_age_days: Optional[float] = None) -> List[str]:
+        """Delete run directories not written to for `max_age_days` and return their run IDs.
+
+        Only directories holding a ``meta.json`` are treated as runs. A
+        retention of 0 keeps every run. Each deleted run is reported.
+        """
+        runs_dir = runs_dir or config.runs_dir
+        max_age_days = config.runs_retention_days if max_age_days is None else max_age_days
+        if max_age_days <= 0 or not os.path.isdir(runs_dir):
+            return []
+
+        cutoff = time.time() - max_age_days * 86400
+        pruned = []
+        for run_id in os.listdir(runs_dir):
+            run_dir = os.path.join(runs_dir, run_id)
+            if not os.path.isfile(os.path.join(run_dir, "meta.json")):
+                continue
+            try:
+                last_write = max(entry.stat().st_mtime for entry in os.scandir(run_dir))
+            except (OSError, ValueError):
+                continue
+            if last_write < cutoff:
+                shutil.rmtree(run_dir, ignore_errors=True)
+                pruned.append(run_id)
+                notice_console.print(f"🗑️  Deleted run {run_id} (unused for more than {max_age_days:g} days)")
+        return pruned
+
+    @property
+    def topic(self) -> str:
+        return self.meta.get("topic", "")
+
+    def save_context(self, query: str, context: str):
+        """Record the initial search query and the context it gathered."""
+        self._write_json("context.json", {"query": query, "context": context})
+
+    def load_context(self) -> Optional[str]:
+        """Return the saved initial context, or None if stage 1 has not completed."""
+        data = self._read_json("context.json")
+        return data["context"] if data else None
+
+    def save_queries(self, queries: List[str]):
+        """Record the generated search queries."""
+        self._write_json("queries.json", queries)
+
+    def load_queries(self) -> Optional[List[str]]:
+        """Return the saved queries, or None if stage 2 has not completed."""
+        return self._read_json("queries.json")
+
+    def append_result(self, result: SearchResult):
+        """Queue one search result for the results log; `flush_results` writes it."""
+        self._pending_results.append(json.dumps(asdict(result), ensure_ascii=False) + "\n")
+
+    def flush_due(self) -> bool:
+        """Return True once enough results are queued, or queued long enough, to write them."""
+        if not self._pending_results:
+            return False
+        return (len(self._pending_results) >= self.RESULTS_FLUSH_LINES
+                or time.monotonic() - self._last_flush >= self.RESULTS_FLUSH_INTERVAL)
+
+    async def flush_results(self):
+        """Write the queued results to the results log off the event loop."""
+        lines = self._take_pending_results()
+        if lines:
+            await asyncio.to_thread(self._write_results, lines)
+
+    def close(self):
+        """Write any queued results and close the results log."""
+        lines = self._take_pending_results()
+        if lines:
+            self._write_results(lines)
+        with self._results_lock:
+            if self._results_file is not None:
+                self._results_file.close()
+                self._results_file = None
+
+    def _take_pending_results(self) -> List[str]:
+        lines, self._pending_results = self._pending_results, []
+        self._last_flush = time.monotonic()
+        return lines
+
+    def _write_results(self, lines: List[str]):
+        # One handle per run; a flush that outlives a cancelled await still finishes before close()
+        with self._results_lock:
+            if self._results_file is None:
+                self._results_file = open(self._path("results.jsonl"), 'a', encoding='utf-8')
+            self._results_file.write("".join(lines))
+            self._results_file.flush()
+
+    def load_results(self) -> List[SearchResult]:
+        """Return the successful search results recorded so far, one per query."""
+        lines = self._take_pending_results()
+        if lines:
+            self._write_results(lines)
+        path = self._path("results.jsonl")
+        if not os.path.exists(path):
+            return []
+
+        results: Dict[str, SearchResult] = {}
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    result = SearchResult(**json.loads(line))
+                except (ValueError, TypeError):
+                    continue  # A line cut short by a crash
+                # Failed searches are retried on resume
+                if result.source != "Error":
+                    results[result.query] = result
+        return list(results.values())
+
+    def save_report_file(self, report_file: str):
+        """Record where the final report was written."""
+        self.meta["report_file"] = report_file
+        self._write_json("meta.json", self.meta)
+
+    def load_report_file(self) -> Optional[str]:
+        """Return the saved report path if the report still exists."""
+        report_file = self.meta.get("report_file")
+        return report_file if report_file and os.path.exists(report_file) else None
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.run_dir, name)
+
+    def _read_json(self, name: str) -> Any:
+        try:
+            with open(self._path(name), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_json(self, name: str, data: Any):
+        """Write JSON atomically so a crash never leaves a half-written file."""
+        path = self._path(name)
+        temp_path = path + ".tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        os.replace(temp_path, path)
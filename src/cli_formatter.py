@@ -2,56 +2,131 @@
 Rich CLI formatter for beautiful output with emojis and progress bars.
 """
 
-import time
-from typing import Dict, Any
-from rich.console import Console
-from rich.progress import Progress, TaskID, BarColumn, TextColumn, TimeRemainingColumn, TimeElapsedColumn
-from rich.table import Table
-from rich.panel import Panel
-from rich.text import Text
-from rich import box
+import json
+import sys
+import threading
+from typing import TYPE_CHECKING, Dict, Any, List, Optional
 
-console = Console()
+from .output import console, notice_console
+from .utils import SearchProgress, percentile
+
+# Tables and the live view are imported where they are drawn, keeping them
+# off the startup path of commands that exit early
+if TYPE_CHECKING:
+    from rich.live import Live
+    from .tracing import Tracer
+
+# The live view is redrawn from a background thread at most this often
+LIVE_REFRESH_PER_SECOND = 4
+JSON_PROGRESS_INTERVAL = 1.0  # Seconds between --json-progress lines
 
 class CLIFormatter:
-    """Handles rich CLI formatting with emojis and progress tracking."""
+    """Handles rich CLI formatting with emojis and progress tracking.
     
-    def __init__(self):
-        self.progress = None
-        self.tasks = {}
-        self.start_time = None
+    `quiet` drops the stage messages and the live search view, keeping
+    errors and the final summary. `json_progress` is quiet too, but writes
+    the search counters to stdout as a JSON line every second, for CI logs.
+    The CLI applies the same mode to the other modules' output with
+    `output.configure_output()`, which also moves it to stderr in JSON mode.
+    """
+    
+    def __init__(self, quiet: bool = False, json_progress: bool = False):
+        self.quiet = quiet or json_progress
+        self.json_progress = json_progress
+        # One set of counters per pipeline that is searching; see begin_searches()
+        self._pipeline_progress: List[SearchProgress] = []
+        self._live: Optional["Live"] = None
+        self._json_thread: Optional[threading.Thread] = None
+        self._stop_json = threading.Event()
     
     def print_welcome(self):
         """Print minimal welcome message."""
-        console.print("🔍 ULTRA DEEP RESEARCH", style="bold blue")
+        if not self.quiet:
+            console.print("🔍 ULTRA DEEP RESEARCH", style="bold blue")
     
     def print_config(self, config):
         """Print current configuration."""
         console.print(f"Models: {config.init_search_model} → {config.query_model} → {config.search_model} → {config.summarizer_model}")
         console.print(f"Queries: {config.num_queries} | Concurrency: {config.max_concurrent_searches}")
     
-    def create_progress(self):
-        """Create a minimal progress tracker."""
-        self.progress = None
-        self.start_time = time.time()
-        return None
+    @property
+    def search_progress(self) -> SearchProgress:
+        """Counters of every pipeline currently searching, summed."""
+        return SearchProgress.combine(self._pipeline_progress)
     
-    def add_stage_task(self, description: str, total: int = 100):
-        """Add a new stage task to progress tracking."""
-        self.current_total = total
-        self.current_completed = 0
-        return total
+    def begin_searches(self) -> SearchProgress:
+        """Start showing search progress and return this pipeline's counters.
+        
+        Pipelines running at the same time each get their own counters and
+        share one view of their sum: it starts with the first caller and
+        stops when the last one calls end_searches(), so finished pipelines
+        do not linger in the totals. Rendering happens off the event loop,
+        so searches only pay for incrementing counters.
+        """
+        progress = SearchProgress()
+        self._pipeline_progress.append(progress)
+        if len(self._pipeline_progress) > 1:
+            return progress
+        
+        if self.json_progress:
+            self._stop_json.clear()
+            self._json_thread = threading.Thread(target=self._emit_json_progress, daemon=True)
+            self._json_thread.start()
+        elif not self.quiet:
+            from rich.live import Live
+            self._live = Live(get_renderable=self._render_search_progress, console=console,
+                              refresh_per_second=LIVE_REFRESH_PER_SECOND)
+            self._live.start()
+        return progress
+    
+    def end_searches(self, progress: SearchProgress):
+        """Drop a pipeline's counters, stopping the view once no pipeline is searching."""
+        if progress not in self._pipeline_progress:
+            return
+        if len(self._pipeline_progress) == 1:
+            self._stop_search_view()  # Before removing, so the last JSON line has the final counts
+        self._pipeline_progress.remove(progress)
     
-    def update_task(self, description: str, advance: int = 1, **kwargs):
-        """Update a specific task progress."""
-        self.current_completed += advance
+    def _stop_search_view(self):
+        if self._live is not None:
+            self._live.stop()
+            self._live = None
+        if self._json_thread is not None:
+            self._stop_json.set()
+            self._json_thread.join()
+            self._json_thread = None
+            self._write_json_progress()
     
-    def complete_task(self, description: str):
-        """Mark a task as complete."""
-        self.current_completed = self.current_total
+    def _render_search_progress(self):
+        """Render the counters as a bar and one status line."""
+        from rich.progress_bar import ProgressBar
+        from rich.table import Table
+        from rich.text import Text
+        
+        progress = self.search_progress
+        grid = Table.grid(padding=(0, 1))
+        grid.add_row(
+            "⚡",
+            ProgressBar(total=max(progress.total, 1), completed=progress.finished, width=30),
+            f"{progress.finished}/{progress.total} | {progress.in_flight} in flight | "
+            f"{progress.failed} failed | {progress.throughput:.1f}/s | {self._format_duration(progress.elapsed)}"
+        )
+        if progress.last_error:
+            grid.add_row("", Text(f"Last error: {progress.last_error[:80]}", style="dim red"), "")
+        return grid
+    
+    def _emit_json_progress(self):
+        while not self._stop_json.wait(JSON_PROGRESS_INTERVAL):
+            self._write_json_progress()
+    
+    def _write_json_progress(self):
+        sys.stdout.write(json.dumps({"event": "search_progress", **self.search_progress.snapshot()}) + "\n")
+        sys.stdout.flush()
     
     def print_stage_start(self, stage_name: str, stage_num: int, total_stages: int):
         """Print the start of a new stage."""
+        if self.quiet:
+            return
         stage_details = {
             "🔍 Initial Context Search": "🔍 Initial context search",
             "🧠 Query Generation": "🧠 Generating diverse queries",
@@ -65,24 +140,62 @@ class CLIFormatter:
     
     def print_stage_complete(self, stage_name: str, details: str = ""):
         """Print the completion of a stage."""
+        if self.quiet:
+            return
         if details:
             console.print(f"✅ {details}")
         else:
             console.print("✅ Done")
     
     def print_statistics(self, stats: Dict[str, Any], execution_stats: Dict[str, Any] = None):
-        """Print clean statistics."""
+        """Print clean statistics.
+        
+        Answers reused from the response cache are reported even in quiet mode.
+        """
+        cache_hits = stats.get('cache_hits', 0)
+        if cache_hits:
+            notice_console.print(f"[yellow]⚠️ {cache_hits} answers were reused from the response cache of "
+                                 f"earlier runs; use --no-cache for fresh results[/yellow]")
+        if self.quiet:
+            return
         completed = stats.get('completed_searches', 0)
         total = stats.get('total_queries', 0)
         failed = stats.get('failed_searches', 0)
         
         console.print(f"Searches: {completed}/{total} completed")
         
+        queries_merged = stats.get('queries_merged', 0)
+        if queries_merged:
+            console.print(f"Near-duplicate queries merged: {queries_merged} (search calls saved)")
+        
         if execution_stats:
             results = execution_stats.get('total_results', 0)
             avg_score = execution_stats.get('average_relevance_score', 0)
             console.print(f"Results: {results} | Quality: {avg_score:.2f}")
         
+        cache_misses = stats.get('cache_misses', 0)
+        if cache_hits or cache_misses:
+            console.print(f"Cache: {cache_hits} hits | {cache_misses} misses")
+        
+        concurrency_limits = stats.get('concurrency_limits') or []
+        if len(concurrency_limits) > 1:
+            console.print(f"Concurrency: {concurrency_limits[0]} → {concurrency_limits[-1]} "
+                          f"(range {min(concurrency_limits)}-{max(concurrency_limits)}, "
+                          f"{len(concurrency_limits) - 1} adjustments)")
+        
+        hedged = stats.get('hedged_requests', 0)
+        if hedged:
+            console.print(f"Hedging: {hedged} hedged | {stats.get('hedge_wins', 0)} won | "
+                          f"{stats.get('hedge_losses', 0)} lost")
+        
+        first_token_times = stats.get('first_token_times') or []
+        if first_token_times:
+            token_rates = stats.get('token_rates') or []
+            rate = f" | {sum(token_rates) / len(token_rates):.0f} tok/s" if token_rates else ""
+            console.print(f"First token: p50 {percentile(first_token_times, 50):.1f}s | "
+                          f"p95 {percentile(first_token_times, 95):.1f}s{rate} | "
+                          f"{stats.get('truncated_streams', 0)} cut off")
+        
         # Processing time
         if stats.get('processing_time', 0) > 0:
             processing_time = stats['processing_time']
@@ -96,19 +209,20 @@ class CLIFormatter:
     
     def print_error(self, message: str):
         """Print an error message."""
-        console.print(f"❌ {message}")
+        notice_console.print(f"❌ {message}")
     
     def print_warning(self, message: str):
         """Print a warning message."""
-        console.print(f"⚠️  {message}")
+        notice_console.print(f"⚠️  {message}")
     
     def print_success(self, message: str):
         """Print a success message."""
-        console.print(f"✅ {message}")
+        notice_console.print(f"✅ {message}")
     
     def print_info(self, message: str):
         """Print an info message."""
-        console.print(f"ℹ️  {message}")
+        if not self.quiet:
+            console.print(f"ℹ️  {message}")
     
     def print_final_summary(self, topic: str, report_file: str, total_time: float):
         """Print final summary with report location."""
@@ -119,8 +233,91 @@ class CLIFormatter:
             seconds = int(total_time % 60)
             time_str = f"{minutes}m {seconds}s"
         
-        console.print(f"✅ Research complete: {report_file} ({time_str})")
+        notice_console.print(f"✅ Research complete: {report_file} ({time_str})")
+    
+    def print_batch_summary(self, summaries: List[Dict[str, Any]], total_time: float):
+        """Print a table summarizing every topic in a batch run."""
+        from rich import box
+        from rich.table import Table
+        
+        table = Table(title="Batch Summary", box=box.SIMPLE)
+        table.add_column("Topic", overflow="fold")
+        table.add_column("Status")
+        table.add_column("Searches", justify="right")
+        table.add_column("Results", justify="right")
+        table.add_column("Time", justify="right")
+        table.add_column("Report", overflow="fold")
+        
+        for summary in summaries:
+            status = "✅" if summary["status"] == "completed" else f"❌ {summary['status']}"
+            table.add_row(
+                summary["topic"],
+                status,
+                f"{summary['completed_searches']}/{summary['total_queries']}",
+                str(summary["results"]),
+                self._format_duration(summary["time"]),
+                summary["report_file"] or "-"
+            )
+        
+        notice_console.print(table)
+        completed = sum(1 for summary in summaries if summary["status"] == "completed")
+        notice_console.print(f"✅ Batch complete: {completed}/{len(summaries)} topics ({self._format_duration(total_time)})")
+    
+    def print_trace_summary(self, tracer: "Tracer"):
+        """Print time per stage and the API latency distribution per model.
+        
+        Queue and Server are medians: time waiting for the rate limiter, and
+        time from sending the request to the first response byte.
+        """
+        from rich import box
+        from rich.table import Table
+        
+        stage_times: Dict[str, float] = {}
+        for span in tracer.spans_by("stage"):
+            stage_times[span.name] = stage_times.get(span.name, 0.0) + span.duration
+        if stage_times:
+            table = Table(title="Stage Timings", box=box.SIMPLE)
+            table.add_column("Stage")
+            table.add_column("Time", justify="right")
+            for name, duration in stage_times.items():
+                table.add_row(name, f"{duration:.2f}s")
+            notice_console.print(table)
+        
+        api_spans: Dict[str, List] = {}
+        for span in tracer.spans_by("api"):
+            api_spans.setdefault(span.attributes.get("model", ""), []).append(span)
+        if not api_spans:
+            return
+        
+        table = Table(title="API Latency by Model", box=box.SIMPLE, pad_edge=False)
+        table.add_column("Model", no_wrap=True)
+        table.add_column("Calls", justify="right")
+        for column in ("Failed", "p50", "p90", "p99", "Queue", "Server"):
+            table.add_column(column, justify="right")
+        
+        latencies = tracer.latencies_by_model()
+        for model, spans in sorted(api_spans.items()):
+            durations = latencies.get(model, [])
+            queue_waits = [span.attributes["queue_wait"] for span in spans]
+            server_times = [span.attributes["server_time"] for span in spans
+                            if span.attributes.get("server_time") is not None]
+            table.add_row(
+                model,
+                str(len(spans)),
+                str(sum(1 for span in spans if span.attributes.get("status") != 200)),
+                *(f"{percentile(durations, pct):.2f}s" for pct in (50, 90, 99)),
+                f"{percentile(queue_waits, 50):.2f}s",
+                f"{percentile(server_times, 50):.2f}s" if server_times else "-"
+            )
+        notice_console.print(table)
+    
+    def _format_duration(self, seconds: float) -> str:
+        """Format a duration as seconds or minutes and seconds."""
+        if seconds < 60:
+            return f"{seconds:.0f}s"
+        return f"{int(seconds // 60)}m {int(seconds % 60)}s"
     
     def cleanup(self):
         """Clean up progress tracking."""
-        self.progress = None
+        if not self._pipeline_progress:
+            self._stop_search_view()
@@ -0,0 +1,168 @@
+"""
+Concurrency budgets shared between research pipelines.
+"""
+
+import asyncio
+import time
+from collections import Counter, OrderedDict, deque
+from contextlib import asynccontextmanager
+from typing import Any, Deque, Dict, Hashable, List, Optional, Tuple
+
+class ConcurrencyBudget:
+    """Caps in-flight work across several consumers and shares free slots fairly.
+
+    Works like a semaphore whose waiters are queued per key (one key per
+    research topic). When a slot frees up it goes to the waiting key with
+    the fewest slots in use, so a topic with 500 queued searches cannot
+    starve a topic with 20. The limit can be changed while work is running.
+    """
+
+    def __init__(self, limit: int):
+        self._limit = max(1, limit)
+        self.in_flight = 0
+        self.active: Counter = Counter()
+        self._waiters: "OrderedDict[Hashable, Deque[asyncio.Future]]" = OrderedDict()
+        self.controller: Optional["AIMDController"] = None  # Set when the limit is adaptive
+
+    @property
+    def limit(self) -> int:
+        """Maximum number of slots that may be held at once."""
+        return self._limit
+
+    @limit.setter
+    def limit(self, value: int):
+        self._limit = max(1, int(value))
+        self._wake()
+
+    @property
+    def waiting(self) -> int:
+        """Number of callers queued for a slot."""
+        return sum(len(queue) for queue in self._waiters.values())
+
+    async def acquire(self, key: Hashable = None):
+        """Wait for a slot on behalf of `key`."""
+        if self.in_flight < self._limit and not self._waiters:
+            self._grant(key)
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.setdefault(key, deque()).append(future)
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # The slot was granted just before we were cancelled
+                self.release(key)
+            else:
+                queue = self._waiters.get(key)
+                if queue is not None and future in queue:
+                    queue.remove(future)
+                    if not queue:
+                        del self._waiters[key]
+            raise
+
+    def release(self, key: Hashable = None):
+        """Return a slot held by `key`."""
+        self.in_flight -= 1
+        self.active[key] -= 1
+        if self.active[key] <= 0:
+            del self.active[key]
+        self._wake()
+
+    @asynccontextmanager
+    async def slot(self, key: Hashable = None):
+        """Hold a slot for the duration of the `async with` block."""
+        await self.acquire(key)
+        try:
+            yield
+        finally:
+            self.release(key)
+
+    def _grant(self, key: Hashable):
+        self.in_flight += 1
+        self.active[key] += 1
+
+    def _wake(self):
+        """Hand free slots to waiting keys, least-served key first."""
+        while self.in_flight < self._limit and self._waiters:
+            # Ties go to the key that has waited longest (front of the ordered dict)
+            key = min(self._waiters, key=lambda k: self.active[k])
+            queue = self._waiters.pop(key)
+            future = queue.popleft()
+            if queue:
+                self._waiters[key] = queue  # Re-queue the key at the back for round-robin
+            if future.done():
+                continue
+            self._grant(key)
+            future.set_result(None)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return the current usage for reporting."""
+        return {"limit": self._limit, "in_flight": self.in_flight, "waiting": self.waiting}
+
+class AIMDController:
+    """Adjusts a budget's limit with additive increase, multiplicative decrease.
+
+    After a full window of healthy searches (as many as the current limit)
+    the limit grows by one. A congestion failure (HTTP 429, 5xx or a
+    timeout), a new HTTP 429 seen by the rate limiter, or a latency spike (`spike_factor` times the moving average)
+    cuts it by `decrease_factor`. Only searches started after the last cut
+    can trigger another one, so a burst of failures from one window counts
+    once. The limit always stays within [min_limit, max_limit].
+    """
+
+    def __init__(self, budget: ConcurrencyBudget, min_limit: int = 2, max_limit: int = 50,
+                 decrease_factor: float = 0.5, spike_factor: float = 3.0,
+                 rate_limiter: Any = None, warmup: int = 5):
+        self.budget = budget
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.decrease_factor = decrease_factor
+        self.spike_factor = spike_factor
+        self.rate_limiter = rate_limiter
+        self.warmup = warmup
+        self.average_latency: Optional[float] = None
+        self.samples = 0
+        self.successes_in_window = 0
+        self.last_decrease_at = 0.0
+        self.seen_429s = rate_limiter.retried_429s if rate_limiter is not None else 0
+        self.history: List[Tuple[float, int]] = []
+        budget.controller = self
+        self._set_limit(min(max(budget.limit, self.min_limit), self.max_limit))
+
+    def record(self, latency: float, success: bool, started_at: float):
+        """Feed the outcome of one search (timestamps from ``time.monotonic()``).
+        
+        `success` is False only for congestion failures; other errors should not be recorded.
+        """
+        throttled = False
+        if self.rate_limiter is not None and self.rate_limiter.retried_429s > self.seen_429s:
+            self.seen_429s = self.rate_limiter.retried_429s
+            throttled = True
+
+        spike = (success and self.samples >= self.warmup
+                 and latency > self.spike_factor * self.average_latency)
+        if success:
+            self.samples += 1
+            if self.average_latency is None:
+                self.average_latency = latency
+            else:
+                self.average_latency += 0.2 * (latency - self.average_latency)
+
+        if not success or throttled or spike:
+            if started_at >= self.last_decrease_at:
+                self._set_limit(max(self.min_limit, int(self.budget.limit * self.decrease_factor)))
+                self.last_decrease_at = time.monotonic()
+                self.successes_in_window = 0
+            return
+
+        self.successes_in_window += 1
+        if self.successes_in_window >= self.budget.limit:
+            self.successes_in_window = 0
+            self._set_limit(min(self.max_limit, self.budget.limit + 1))
+
+    def _set_limit(self, limit: int):
+        if self.history and limit == self.budget.limit:
+            return
+        self.budget.limit = limit
+        self.history.append((time.monotonic(), limit))
@@ -0,0 +1,126 @@
+"""
+Token-budget-aware packing of search results into the summarizer prompt.
+"""
+
+import re
+from typing import List, Optional, Tuple
+
+from .utils import SearchResult
+
+# Short words are usually one token and long words split into several, so
+# counting 6-character word pieces and punctuation marks tracks BPE
+# tokenizers closely enough for budgeting, at a fraction of their cost.
+_TOKEN_RE = re.compile(r"\w{1,6}|[^\w\s]")
+_SENTENCE_END_RE = re.compile(r"(?<=[.!?])\s+|\n+")
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the number of tokens in `text`."""
+    return len(_TOKEN_RE.findall(text))
+
+def trim_to_tokens(text: str, max_tokens: int) -> Tuple[str, int]:
+    """Cut `text` to at most `max_tokens`, ending on a sentence boundary where possible.
+
+    Returns the trimmed text and its estimated token count. If not even the
+    first sentence fits, the text is cut at the last whole word that fits.
+    """
+    tokens = estimate_tokens(text)
+    if tokens <= max_tokens:
+        return text, tokens
+    if max_tokens <= 0:
+        return "", 0
+
+    kept_end = 0
+    used = 0
+    start = 0
+    for boundary in _SENTENCE_END_RE.finditer(text):
+        sentence_tokens = estimate_tokens(text[start:boundary.start()])
+        if used + sentence_tokens > max_tokens:
+            break
+        used += sentence_tokens
+        kept_end = boundary.start()
+        start = boundary.end()
+    if kept_end:
+        return text[:kept_end], used
+
+    # No whole sentence fits: keep whole words up to the budget
+    words = []
+    used = 0
+    for word in text.split():
+        word_tokens = estimate_tokens(word)
+        if used + word_tokens > max_tokens:
+            break
+        words.append(word)
+        used += word_tokens
+    return " ".join(words), used
+
+class ContextPacker:
+    """Chooses which results, and how much of each, fit a prompt's token budget.
+
+    Each result is first capped at `max_item_tokens`. Results are then taken
+    greedily by relevance score per token until the budget is spent; the
+    first result that no longer fits whole is trimmed to the remaining space
+    (if at least `min_item_tokens` is left), and smaller results are still
+    tried after it.
+    """
+
+    def __init__(self, token_budget: int, max_item_tokens: int = 1500, min_item_tokens: int = 50):
+        self.token_budget = token_budget
+        self.max_item_tokens = max_item_tokens
+        self.min_item_tokens = min_item_tokens
+
+    def measure(self, results: List[SearchResult]) -> List[Tuple[int, int]]:
+        """Return (content tokens, header tokens) for each result, by index.
+
+        Pass the table to `fits` and `pack` so each result is tokenized once.
+        """
+        return [(estimate_tokens(result.content), self._overhead(result)) for result in results]
+
+    def fits(self, results: List[SearchResult], costs: Optional[List[Tuple[int, int]]] = None) -> bool:
+        """Return True if every result fits the budget without trimming."""
+        total = 0
+        for tokens, overhead in costs if costs is not None else self.measure(results):
+            total += overhead + tokens
+            if total > self.token_budget:
+                return False
+        return True
+
+    def pack(self, results: List[SearchResult],
+             costs: Optional[List[Tuple[int, int]]] = None) -> List[Tuple[SearchResult, str]]:
+        """Return (result, packed content) pairs ordered by relevance score."""
+        if costs is None:
+            costs = self.measure(results)
+        # Only costs are kept while ranking; content is read again for the results
+        # that are picked, so large result sets are never all held in memory at once
+        candidates = []
+        for index, (tokens, overhead) in enumerate(costs):
+            if not tokens:
+                continue
+            cost = min(tokens, self.max_item_tokens) + overhead
+            candidates.append((results[index].relevance_score / cost, index, cost))
+        candidates.sort(key=lambda item: (-item[0], item[1]))
+
+        remaining = self.token_budget
+        packed = []
+        for _, index, cost in candidates:
+            result = results[index]
+            tokens, overhead = costs[index]
+            limit = self.max_item_tokens
+            if cost > remaining:
+                limit = remaining - overhead
+                if limit < self.min_item_tokens:
+                    continue
+            if tokens <= limit:
+                content = result.content  # Fits whole; no need to count it again
+            else:
+                content, tokens = trim_to_tokens(result.content, limit)
+            if not content:
+                continue
+            packed.append((index, content))
+            remaining -= tokens + overhead
+
+        packed.sort(key=lambda item: (-results[item[0]].relevance_score, item[0]))
+        return [(results[index], content) for index, content in packed]
+
+    def _overhead(self, result: SearchResult) -> int:
+        """Tokens for the per-source header and separators around the content."""
+        return estimate_tokens(result.query) + 12
@@ -0,0 +1,230 @@
+"""
+Near-duplicate detection for search results (MinHash signatures and LSH banding)
+and for generated queries (weighted term-set similarity).
+"""
+
+import math
+import re
+import zlib
+from array import array
+from collections import defaultdict
+from typing import Dict, List, Set, Tuple, Union
+
+from .utils import SearchResult
+
+_MAX_HASH = (1 << 32) - 1
+_WORD_RE = re.compile(r"\w+")
+
+def shingle(text: str, size: int = 3) -> Set[str]:
+    """Split text into the set of overlapping word n-grams of the given size."""
+    tokens = _WORD_RE.findall(text.lower())
+    if len(tokens) <= size:
+        return {" ".join(tokens)} if tokens else set()
+    return {" ".join(tokens[i:i + size]) for i in range(len(tokens) - size + 1)}
+
+def optimal_bands(threshold: float, num_perm: int) -> Tuple[int, int]:
+    """Pick (bands, rows) so the LSH collision threshold (1/b)^(1/r) is closest to `threshold`."""
+    best = (1, num_perm)
+    best_error = float("inf")
+    for bands in range(1, num_perm + 1):
+        rows = num_perm // bands
+        error = abs((1 / bands) ** (1 / rows) - threshold)
+        if error < best_error:
+            best, best_error = (bands, rows), error
+    return best
+
+class MinHashDeduplicator:
+    """Incremental near-duplicate detector with sub-quadratic candidate lookup.
+
+    Each document is reduced to a MinHash signature using one-permutation
+    hashing: every shingle is hashed once and lands in one of `num_perm`
+    bins, keeping the minimum per bin (empty bins are filled from their
+    neighbours). Signatures are split into bands and indexed by band, so a new
+    document is only compared against documents that share at least one band.
+    A document is a duplicate if the estimated Jaccard similarity with any
+    candidate reaches `threshold`.
+
+    Indexed signatures are packed into one array of 32-bit values and band
+    keys are their raw bytes, so each document costs about `num_perm` * 4
+    bytes plus its bucket entries.
+    """
+
+    def __init__(self, threshold: float = 0.5, num_perm: int = 128, shingle_size: int = 3):
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self.bands, self.rows = optimal_bands(threshold, num_perm)
+        self.signatures = array('I')  # num_perm values per indexed document
+        self.documents = 0
+        # Most band keys belong to a single document, stored as a bare ID until a second one arrives
+        self.buckets: List[Dict[bytes, Union[int, List[int]]]] = [{} for _ in range(self.bands)]
+        self.exact: Set[str] = set()
+
+    def signature(self, text: str) -> Tuple[int, ...]:
+        """Compute the MinHash signature of a text, or an empty tuple if it has no words."""
+        shingles = shingle(text, self.shingle_size)
+        if not shingles:
+            return ()
+
+        bins = [_MAX_HASH] * self.num_perm
+        for item in shingles:
+            value = zlib.crc32(item.encode("utf-8"))
+            index = value % self.num_perm
+            value //= self.num_perm
+            if value < bins[index]:
+                bins[index] = value
+
+        # Densify: fill each empty bin from the nearest non-empty bin to its
+        # right, offset by the distance so borrowed values only collide when
+        # the source bins collide
+        if _MAX_HASH in bins:
+            original = bins[:]
+            offset = _MAX_HASH // self.num_perm
+            nearest = None
+            for step in range(2 * self.num_perm - 1, -1, -1):
+                i = step % self.num_perm
+                if original[i] != _MAX_HASH:
+                    nearest = i
+                elif step < self.num_perm:
+                    distance = (nearest - i) % self.num_perm
+                    bins[i] = original[nearest] + distance * offset
+
+        return tuple(bins)
+
+    def similarity(self, first: Tuple[int, ...], second: Tuple[int, ...]) -> float:
+        """Estimate the Jaccard similarity of two signatures."""
+        matches = sum(1 for a, b in zip(first, second) if a == b)
+        return matches / self.num_perm
+
+    def is_duplicate_text(self, text: str) -> bool:
+        """Return True if `text` nearly duplicates an earlier text, otherwise index it."""
+        signature = self.signature(text)
+        if not signature:
+            key = text.strip()
+            if key in self.exact:
+                return True
+            self.exact.add(key)
+            return False
+
+        packed = array('I', signature)
+        raw = packed.tobytes()
+        band_size = self.rows * packed.itemsize
+        band_keys = [raw[band * band_size:(band + 1) * band_size] for band in range(self.bands)]
+
+        checked: Set[int] = set()
+        for band, key in enumerate(band_keys):
+            candidates = self.buckets[band].get(key, ())
+            if isinstance(candidates, int):
+                candidates = (candidates,)
+            for candidate in candidates:
+                if candidate in checked:
+                    continue
+                checked.add(candidate)
+                start = candidate * self.num_perm
+                if self.similarity(signature, self.signatures[start:start + self.num_perm]) >= self.threshold:
+                    return True
+
+        document_id = self.documents
+        self.documents += 1
+        self.signatures.extend(packed)
+        for band, key in enumerate(band_keys):
+            bucket = self.buckets[band]
+            existing = bucket.get(key)
+            if existing is None:
+                bucket[key] = document_id
+            elif isinstance(existing, int):
+                bucket[key] = [existing, document_id]
+            else:
+                existing.append(document_id)
+        return False
+
+    def is_duplicate(self, result: SearchResult) -> bool:
+        """Return True if the result nearly duplicates an earlier result, otherwise remember it."""
+        return self.is_duplicate_text(result.content)
+
+def deduplicate_near_duplicates(results: List[SearchResult], threshold: float = 0.5,
+                                num_perm: int = 128, shingle_size: int = 3) -> List[SearchResult]:
+    """Remove results whose content is a near-duplicate of an earlier result."""
+    deduplicator = MinHashDeduplicator(threshold, num_perm, shingle_size)
+    return [result for result in results if not deduplicator.is_duplicate(result)]
+
+_STOPWORDS = frozenset("""
+a about all an and are as at be between by can do does for from has have how in into is it its of on or
+over that the their there these this those to vs versus was what when where which who why will with within
+""".split())
+
+# Words that are interchangeable in search queries, mapped to one canonical form
+_QUERY_SYNONYMS = {
+    "affect": "impact", "affects": "impact", "effect": "impact", "effects": "impact",
+    "influence": "impact", "influences": "impact", "impacts": "impact",
+    "latest": "recent", "new": "recent", "newest": "recent", "current": "recent",
+    "advantages": "benefit", "advantage": "benefit", "benefits": "benefit", "pros": "benefit",
+    "problems": "challenge", "issues": "challenge", "challenges": "challenge", "obstacles": "challenge",
+    "disadvantages": "limitation", "drawbacks": "limitation", "cons": "limitation", "limitations": "limitation",
+    "outlook": "future", "prospects": "future", "forecast": "future", "predictions": "future",
+    "uses": "application", "applications": "application", "use": "application",
+    "examples": "example", "case": "example",
+    "compare": "comparison", "compared": "comparison", "comparing": "comparison",
+}
+
+def _stem(word: str) -> str:
+    """Strip common English suffixes so inflections of a word compare equal."""
+    for suffix in ("ing", "ies", "es", "ed", "s"):
+        if len(word) > len(suffix) + 3 and word.endswith(suffix):
+            return word[:-len(suffix)] + ("y" if suffix == "ies" else "")
+    return word
+
+def query_terms(query: str) -> Set[str]:
+    """Reduce a query to its set of normalized content words."""
+    terms = set()
+    for word in _WORD_RE.findall(query.lower()):
+        if word in _STOPWORDS:
+            continue
+        terms.add(_QUERY_SYNONYMS.get(word) or _stem(word))
+    return terms
+
+def cluster_queries(queries: List[str], threshold: float = 0.7) -> List[List[str]]:
+    """Group near-duplicate queries; the first query of each cluster is its representative.
+
+    Queries are compared by IDF-weighted Jaccard similarity of their
+    normalized term sets, so words shared by most queries (usually the topic
+    itself) count for little and the words that set a query apart decide.
+    Each query joins the first earlier representative it matches at
+    `threshold` or above; candidates are found through an inverted index.
+    """
+    term_sets = [query_terms(query) for query in queries]
+    document_frequency: Dict[str, int] = defaultdict(int)
+    for terms in term_sets:
+        for term in terms:
+            document_frequency[term] += 1
+    total = len(queries)
+    weights = {term: math.log((1 + total) / (1 + count)) + 1 for term, count in document_frequency.items()}
+
+    clusters: List[List[str]] = []
+    representatives: List[Set[str]] = []
+    index: Dict[str, List[int]] = defaultdict(list)
+    for query, terms in zip(queries, term_sets):
+        match = None
+        if not terms:
+            # Queries without content words only match each other
+            match = next((i for i, other in enumerate(representatives) if not other), None)
+        for candidate in sorted({cluster for term in terms for cluster in index[term]}):
+            other = representatives[candidate]
+            shared = sum(weights[term] for term in terms & other)
+            union = sum(weights[term] for term in terms | other)
+            if shared / union >= threshold:
+                match = candidate
+                break
+
+        if match is not None:
+            clusters[match].append(query)
+            continue
+        for term in terms:
+            index[term].append(len(clusters))
+        clusters.append([query])
+        representatives.append(terms)
+    return clusters
+
+def deduplicate_queries(queries: List[str], threshold: float = 0.7) -> List[str]:
+    """Keep one representative query per near-duplicate cluster, in original order."""
+    return [cluster[0] for cluster in cluster_queries(queries, threshold)]
@@ -4,26 +4,22 @@ Fast AI operations for quick tasks like naming, summarization, and analysis.
 
 import httpx
 import re
-from typing import List, Dict, Any
-from rich.console import Console
+from typing import List, Dict, Any, Optional
 
+from .output import notice_console
+from .api_client import create_http_client, send_chat_request
+from .rate_limiter import get_rate_limiter
 from config import config
 
-console = Console()
-
 class FastAI:
     """Handles fast AI operations using the configured fast model."""
     
-    def __init__(self):
-        self.client = httpx.Client(
-            timeout=httpx.Timeout(120.0, connect=15.0),  # 2 minutes total, 15s connect
-            headers={
-                "Authorization": f"Bearer {config.openrouter_api_key}",
-                "Content-Type": "application/json",
-                "HTTP-Referer": "https://utra-deep-research.com",
-                "X-Title": "ULTRA DEEP RESEARCH"
-            }
-        )
+    REQUEST_TIMEOUT = 120.0  # 2 minutes total per request
+    
+    def __init__(self, client: Optional[httpx.AsyncClient] = None):
+        self._owns_client = client is None
+        self.client = client or create_http_client()
+        self.rate_limiter = get_rate_limiter()
     
     async def generate_report_name(self, topic: str, report_content: str) -> str:
         """Generate an intelligent filename for the report based on its content."""
@@ -62,9 +58,8 @@ Examples:
                 "temperature": 0.3
             }
             
-            response = self.client.post(
-                "https://openrouter.ai/api/v1/chat/completions",
-                json=request_data
+            response = await send_chat_request(
+                self.client, request_data, timeout=self.REQUEST_TIMEOUT, rate_limiter=self.rate_limiter
             )
             
             if response.status_code == 200:
@@ -81,11 +76,11 @@ Examples:
                 
                 return filename
             else:
-                console.print(f"⚠️  Failed to generate intelligent filename (Status: {response.status_code})")
+                notice_console.print(f"⚠️  Failed to generate intelligent filename (Status: {response.status_code})")
                 return self._generate_fallback_filename(topic)
                 
         except Exception as e:
-            console.print(f"⚠️  Exception generating filename: {str(e)}")
+            notice_console.print(f"⚠️  Exception generating filename: {str(e)}")
             return self._generate_fallback_filename(topic)
     
     def _generate_fallback_filename(self, topic: str) -> str:
@@ -118,9 +113,8 @@ Examples:
                 "temperature": 0.2
             }
             
-            response = self.client.post(
-                "https://openrouter.ai/api/v1/chat/completions",
-                json=request_data
+            response = await send_chat_request(
+                self.client, request_data, timeout=self.REQUEST_TIMEOUT, rate_limiter=self.rate_limiter
             )
             
             if response.status_code == 200:
@@ -142,7 +136,7 @@ Examples:
                 return []
                 
         except Exception as e:
-            console.print(f"⚠️  Exception extracting insights: {str(e)}")
+            notice_console.print(f"⚠️  Exception extracting insights: {str(e)}")
             return []
     
     async def generate_summary(self, content: str, max_length: int = 200) -> str:
@@ -168,9 +162,8 @@ Examples:
                 "temperature": 0.3
             }
             
-            response = self.client.post(
-                "https://openrouter.ai/api/v1/chat/completions",
-                json=request_data
+            response = await send_chat_request(
+                self.client, request_data, timeout=self.REQUEST_TIMEOUT, rate_limiter=self.rate_limiter
             )
             
             if response.status_code == 200:
@@ -181,9 +174,45 @@ Examples:
                 return "Summary generation failed."
                 
         except Exception as e:
-            console.print(f"⚠️  Exception generating summary: {str(e)}")
+            notice_console.print(f"⚠️  Exception generating summary: {str(e)}")
             return "Summary generation failed."
     
-    def close(self):
-        """Close the HTTP client."""
-        self.client.close()
+    async def summarize_research_chunk(self, topic: str, content: str, max_words: int = 400) -> Optional[str]:
+        """Condense search results or partial syntheses into dense findings; None on failure."""
+        try:
+            system_prompt = f"""You are condensing research material on "{topic}" for a later synthesis step. Extract the key findings, facts, figures, named entities, trends and any disagreements between sources. Keep specific numbers and dates. Drop filler and repetition. Answer in markdown bullet points, at most {max_words} words."""
+
+            request_data = {
+                "model": config.fast_model,
+                "messages": [
+                    {
+                        "role": "system",
+                        "content": system_prompt
+                    },
+                    {
+                        "role": "user",
+                        "content": content
+                    }
+                ],
+                
+                "temperature": 0.2
+            }
+            
+            response = await send_chat_request(
+                self.client, request_data, timeout=self.REQUEST_TIMEOUT, rate_limiter=self.rate_limiter
+            )
+            
+            if response.status_code == 200:
+                data = response.json()
+                return data["choices"][0]["message"]["content"].strip() or None
+            else:
+                return None
+                
+        except Exception as e:
+            notice_console.print(f"⚠️  Exception condensing research: {str(e)}")
+            return None
+    
+    async def close(self):
+        """Close the HTTP client if this instance owns it."""
+        if self._owns_client:
+            await self.client.aclose()
@@ -0,0 +1,20 @@
+"""
+Terminal output shared by every module, so --quiet and --json-progress apply to the whole run.
+"""
+
+from rich.console import Console
+
+# Status and progress messages; silenced in quiet mode
+console = Console()
+# Errors, warnings and summaries; shown even in quiet mode
+notice_console = Console()
+
+def configure_output(quiet: bool = False, json_progress: bool = False):
+    """Apply the CLI's output mode to every module.
+    
+    With `json_progress` stdout carries only the JSON progress lines, so
+    all other output moves to stderr.
+    """
+    console.quiet = quiet or json_progress
+    for output in (console, notice_console):
+        output.stderr = json_progress
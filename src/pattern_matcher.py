@@ -0,0 +1,89 @@
+"""
+Single-pass multi-pattern matching for classifying result content.
+"""
+
+import re
+from collections import Counter
+from typing import Dict, Iterable, List, Optional
+
+def _trie_regex(patterns: Iterable[str]) -> str:
+    """Build a regex whose alternation is shaped like a trie of the patterns.
+
+    Alternatives at each node start with distinct characters, so the regex
+    engine never retries a shared prefix, and optional tails are greedy, so
+    the longest pattern starting at a position wins.
+    """
+    trie: Dict[str, dict] = {}
+    for pattern in patterns:
+        node = trie
+        for char in pattern:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node: Dict[str, dict]) -> str:
+        terminal = "" in node
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        if len(branches) == 1 and not terminal:
+            return branches[0]
+        group = "(?:" + "|".join(branches) + ")"
+        return group + "?" if terminal else group
+
+    return build(trie)
+
+class PatternMatcher:
+    """Counts case-insensitive substring hits for several labelled pattern sets in one scan.
+
+    All patterns are compiled into a single trie-shaped regex that walks the
+    lowercased text once, taking the longest pattern at each position. After
+    a match the scan resumes one character later, so overlapping occurrences
+    are found, and the shorter patterns that are prefixes of a match (e.g.
+    "research" in "research shows") are credited with it. The counts are the
+    overlapping occurrence counts an Aho-Corasick automaton would report.
+    """
+
+    def __init__(self, pattern_sets: Dict[str, Iterable[str]]):
+        self.pattern_sets: Dict[str, List[str]] = {}
+        self.labels: Dict[str, List[str]] = {}
+        for label, patterns in pattern_sets.items():
+            self.pattern_sets[label] = []
+            for pattern in patterns:
+                pattern = pattern.lower()
+                if pattern and pattern not in self.pattern_sets[label]:
+                    self.pattern_sets[label].append(pattern)
+                    self.labels.setdefault(pattern, []).append(label)
+
+        self._prefixes: Dict[str, List[str]] = {
+            pattern: [other for other in self.labels if other != pattern and pattern.startswith(other)]
+            for pattern in self.labels
+        }
+        self._regex: Optional[re.Pattern] = re.compile(_trie_regex(self.labels)) if self.labels else None
+
+    def count(self, text: str, lowered: bool = False) -> Counter:
+        """Return the number of occurrences of each pattern in `text`.
+
+        Pass `lowered=True` if the text is already lowercase to skip the copy.
+        """
+        hits: Counter = Counter()
+        if self._regex is None:
+            return hits
+
+        text = text if lowered else text.lower()
+        search = self._regex.search
+        match = search(text)
+        while match is not None:
+            pattern = match.group()
+            hits[pattern] += 1
+            for prefix in self._prefixes[pattern]:
+                hits[prefix] += 1
+            match = search(text, match.start() + 1)
+        return hits
+
+    def classify(self, text: str, lowered: bool = False) -> Dict[str, Dict[str, int]]:
+        """Return per-label, per-pattern hit counts for `text` from a single scan."""
+        result: Dict[str, Dict[str, int]] = {label: {} for label in self.pattern_sets}
+        for pattern, hits in self.count(text, lowered).items():
+            for label in self.labels[pattern]:
+                result[label][pattern] = hits
+        return result
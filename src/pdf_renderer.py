@@ -0,0 +1,106 @@
+"""
+Markdown to HTML/PDF rendering shared by the report generator and convert_reports.py.
+"""
+
+import hashlib
+import html
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+from config import config
+
+REPORT_CSS = """
+body {
+    font-family: Arial, sans-serif;
+    line-height: 1.6;
+    margin: 40px;
+    max-width: 800px;
+}
+h1, h2, h3, h4, h5, h6 {
+    color: #333;
+    margin-top: 30px;
+}
+code {
+    background-color: #f4f4f4;
+    padding: 2px 4px;
+    border-radius: 3px;
+    font-family: monospace;
+}
+pre {
+    background-color: #f4f4f4;
+    padding: 10px;
+    border-radius: 5px;
+    overflow-x: auto;
+}
+table {
+    border-collapse: collapse;
+    width: 100%;
+    margin: 20px 0;
+}
+th, td {
+    border: 1px solid #ddd;
+    padding: 8px;
+    text-align: left;
+}
+th {
+    background-color: #f2f2f2;
+}
+blockquote {
+    border-left: 4px solid #ccc;
+    margin: 0;
+    padding-left: 20px;
+    color: #666;
+}
+"""
+
+MARKDOWN_EXTENSIONS = ['tables', 'fenced_code']
+
+# Changes whenever the styling changes, so previously converted PDFs are re-rendered
+RENDER_VERSION = hashlib.sha256((REPORT_CSS + ",".join(MARKDOWN_EXTENSIONS)).encode("utf-8")).hexdigest()[:12]
+
+def render_html(markdown_text: str, title: str = "Research Report") -> str:
+    """Render a markdown report as a standalone, styled HTML document."""
+    import markdown
+
+    body = markdown.markdown(markdown_text, extensions=MARKDOWN_EXTENSIONS)
+    return f"""<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="utf-8">
+    <title>{html.escape(title)}</title>
+    <style>{REPORT_CSS}</style>
+</head>
+<body>
+{body}
+</body>
+</html>
+"""
+
+def write_pdf(markdown_text: str, pdf_path: str, title: str = "Research Report"):
+    """Render a markdown report to a PDF file. Blocking and CPU-bound."""
+    from weasyprint import HTML
+
+    HTML(string=render_html(markdown_text, title)).write_pdf(pdf_path)
+
+_render_pool: Optional[ProcessPoolExecutor] = None
+
+def get_render_pool() -> ProcessPoolExecutor:
+    """Return the worker process pool used for background PDF rendering.
+
+    Workers are spawned rather than forked: the pool is created from inside
+    a running pipeline, and a forked child would inherit its event loop,
+    threads and open connections.
+    """
+    global _render_pool
+    if _render_pool is None:
+        _render_pool = ProcessPoolExecutor(max_workers=config.pdf_workers,
+                                           mp_context=multiprocessing.get_context("spawn"))
+    return _render_pool
+
+def shutdown_render_pool():
+    """Wait for queued renders and stop the worker processes."""
+    global _render_pool
+    if _render_pool is not None:
+        _render_pool.shutdown(wait=True)
+        _render_pool = None
@@ -2,28 +2,43 @@
 Query generator for creating diverse search queries using AI models.
 """
 
+import asyncio
 import httpx
-import json
-from typing import List, Dict, Any
-from rich.console import Console
+import math
+import re
+from typing import List, Dict, Any, Optional
 
+from .output import console, notice_console
+from .api_client import create_http_client, send_chat_request
+from .rate_limiter import get_rate_limiter
 from config import config
 
-console = Console()
+# Research facets for sharded generation, each covered by its own request
+QUERY_FACETS = [
+    ("fundamentals", "definitions, how it works and technical details"),
+    ("current state", "recent developments, news and the state of the art"),
+    ("history", "historical context and how it evolved"),
+    ("challenges", "problems, risks, limitations and criticism"),
+    ("opportunities", "solutions, benefits, use cases and applications"),
+    ("future", "future trends, forecasts and open research questions"),
+    ("stakeholders", "industries, businesses, economics and the people affected"),
+    ("comparisons", "alternatives, comparisons and analytical perspectives"),
+    ("regional", "geographical, cultural and regulatory variations"),
+]
+
+def _normalize_query(query: str) -> str:
+    """Reduce a query to lowercase words so trivial variants compare equal."""
+    return " ".join(re.findall(r"\w+", query.lower()))
 
 class QueryGenerator:
     """Generates diverse search queries using AI models via OpenRouter."""
     
-    def __init__(self):
-        self.client = httpx.Client(
-            timeout=httpx.Timeout(300.0, connect=15.0),  # 5 minutes total, 15s connect
-            headers={
-                "Authorization": f"Bearer {config.openrouter_api_key}",
-                "Content-Type": "application/json",
-                "HTTP-Referer": "https://utra-deep-research.com",
-                "X-Title": "ULTRA DEEP RESEARCH"
-            }
-        )
+    REQUEST_TIMEOUT = 300.0  # 5 minutes total per request
+    
+    def __init__(self, client: Optional[httpx.AsyncClient] = None):
+        self._owns_client = client is None
+        self.client = client or create_http_client()
+        self.rate_limiter = get_rate_limiter()
     
     async def generate_initial_search_query(self, topic: str) -> str:
         """Generate an initial search query for context gathering."""
@@ -44,24 +59,26 @@ class QueryGenerator:
                 "temperature": 0.3
             }
             
-            response = self.client.post(
-                "https://openrouter.ai/api/v1/chat/completions",
-                json=request_data
+            response = await send_chat_request(
+                self.client, request_data, timeout=self.REQUEST_TIMEOUT, rate_limiter=self.rate_limiter
             )
             
             if response.status_code == 200:
                 data = response.json()
                 return data["choices"][0]["message"]["content"].strip()
             else:
-                console.print(f"❌ Failed to generate initial search query (Status: {response.status_code})")
+                notice_console.print(f"❌ Failed to generate initial search query (Status: {response.status_code})")
                 return f"Comprehensive overview of {topic}"
                 
         except Exception as e:
-            console.print(f"❌ Exception generating initial search query: {str(e)}")
+            notice_console.print(f"❌ Exception generating initial search query: {str(e)}")
             return f"Comprehensive overview of {topic}"
     
     async def generate_diverse_queries(self, topic: str, context: str = "") -> List[str]:
         """Generate diverse search queries based on topic and context."""
+        if config.query_shards > 1:
+            return await self.generate_sharded_queries(topic, context, config.query_shards)
+        
         try:
             console.print(f"Generating {config.num_queries} queries for topic: {topic[:50]}...")
             
@@ -109,9 +126,8 @@ Keep each query under 100 characters.
             }
             
             console.print("Calling query generation API...")
-            response = self.client.post(
-                "https://openrouter.ai/api/v1/chat/completions",
-                json=request_data
+            response = await send_chat_request(
+                self.client, request_data, timeout=self.REQUEST_TIMEOUT, rate_limiter=self.rate_limiter
             )
             
             if response.status_code == 200:
@@ -119,25 +135,11 @@ Keep each query under 100 characters.
                 content = data["choices"][0]["message"]["content"]
                 
                 # Parse the response into individual queries
-                queries = []
-                for line in content.strip().split('\n'):
-                    line = line.strip()
-                    # Remove numbering if present
-                    if line and not line.startswith('#'):
-                        # Remove common numbering patterns
-                        cleaned_line = line
-                        for prefix in ['1.', '2.', '3.', '4.', '5.', '6.', '7.', '8.', '9.', '10.',
-                                      '•', '-', '*', 'Query:', 'Search:']:
-                            if cleaned_line.startswith(prefix):
-                                cleaned_line = cleaned_line[len(prefix):].strip()
-                                break
-                        
-                        if cleaned_line and len(cleaned_line) > 10:  # Filter out very short queries
-                            queries.append(cleaned_line)
+                queries = self._parse_queries(content)
                 
                 # Ensure we have the right number of queries
                 if len(queries) < config.num_queries:
-                    console.print(f"⚠️  Generated {len(queries)} queries, expected {config.num_queries}")
+                    notice_console.print(f"⚠️  Generated {len(queries)} queries, expected {config.num_queries}")
                 elif len(queries) > config.num_queries:
                     queries = queries[:config.num_queries]
                 
@@ -145,14 +147,151 @@ Keep each query under 100 characters.
                 return queries
                 
             else:
-                console.print(f"❌ Failed to generate queries (Status: {response.status_code})")
+                notice_console.print(f"❌ Failed to generate queries (Status: {response.status_code})")
                 return self._generate_fallback_queries(topic)
                 
         except Exception as e:
-            console.print(f"❌ Exception generating queries: {str(e)}")
+            notice_console.print(f"❌ Exception generating queries: {str(e)}")
             console.print("🔄 Using fallback query generation...")
             return self._generate_fallback_queries(topic)
     
+    async def generate_sharded_queries(self, topic: str, context: str, shards: int) -> List[str]:
+        """Generate queries with one concurrent request per research facet.
+        
+        Each facet asks for its share of `NUM_QUERIES`. The shards are
+        interleaved so every facet stays represented, duplicates across
+        shards are dropped, and any shortfall is topped up with extra
+        requests (then fallback queries) until the target is met.
+        """
+        target = config.num_queries
+        facets = QUERY_FACETS[:max(1, min(shards, len(QUERY_FACETS)))]
+        per_shard = math.ceil(target / len(facets))
+        console.print(f"Generating {target} queries in {len(facets)} parallel shards for topic: {topic[:50]}...")
+        
+        safe_topic = topic[:200] + "..." if len(topic) > 200 else topic
+        safe_context = context[:500] + "..." if len(context) > 500 else context
+        
+        shard_results = await asyncio.gather(*(
+            self._request_queries(
+                self._facet_prompt(safe_topic, safe_context, facet, description, per_shard),
+                f"Generate {per_shard} search queries about the {facet} of: {safe_topic}"
+            )
+            for facet, description in facets
+        ))
+        
+        queries: List[str] = []
+        seen = set()
+        
+        def add(candidates: List[str]):
+            for query in candidates:
+                key = _normalize_query(query)
+                if key not in seen and len(queries) < target:
+                    seen.add(key)
+                    queries.append(query)
+        
+        # Interleave shards so a cut at the target keeps every facet
+        for rank in range(max((len(result) for result in shard_results), default=0)):
+            add([result[rank] for result in shard_results if rank < len(result)])
+        
+        for _ in range(config.query_top_up_rounds):
+            shortfall = target - len(queries)
+            if shortfall <= 0:
+                break
+            console.print(f"🔄 Topping up {shortfall} queries...")
+            add(await self._request_queries(
+                self._top_up_prompt(safe_topic, queries, shortfall),
+                f"Generate {shortfall} new search queries about: {safe_topic}"
+            ))
+        
+        if len(queries) < target:
+            add(self._generate_fallback_queries(topic))
+        
+        console.print(f"✅ Generated {len(queries)} diverse search queries")
+        return queries
+    
+    async def _request_queries(self, system_prompt: str, user_prompt: str) -> List[str]:
+        """Ask the query model for a list of queries; an empty list on failure."""
+        request_data = {
+            "model": config.query_model,
+            "messages": [
+                {
+                    "role": "system",
+                    "content": system_prompt
+                },
+                {
+                    "role": "user",
+                    "content": user_prompt
+                }
+            ],
+            
+            "temperature": 0.7
+        }
+        
+        try:
+            response = await send_chat_request(
+                self.client, request_data, timeout=self.REQUEST_TIMEOUT, rate_limiter=self.rate_limiter
+            )
+            if response.status_code == 200:
+                return self._parse_queries(response.json()["choices"][0]["message"]["content"])
+            notice_console.print(f"⚠️  Query shard failed (Status: {response.status_code})")
+        except Exception as e:
+            notice_console.print(f"⚠️  Exception in query shard: {str(e)}")
+        return []
+    
+    def _facet_prompt(self, topic: str, context: str, facet: str, description: str, count: int) -> str:
+        """Build the system prompt for one facet's shard."""
+        return f"""
+You are an expert research query generator. Your task is to generate {count} diverse search queries about one facet of the given topic.
+
+Facet: {facet} ({description})
+
+Guidelines:
+1. Every query must be about this facet of the topic
+2. Vary query complexity from basic to advanced
+3. Mix broad overview queries with specific niche queries
+4. Include technical, business, academic, and practical viewpoints where they fit
+
+Context from initial research: {context if context else "No context available"}
+
+Topic: {topic}
+
+Generate exactly {count} search queries, one per line. Each query should be unique and valuable for comprehensive research.
+Keep each query under 100 characters.
+"""
+    
+    def _top_up_prompt(self, topic: str, existing: List[str], count: int) -> str:
+        """Build the system prompt asking for queries that differ from the ones we have."""
+        existing_list = "\n".join(existing)
+        return f"""
+You are an expert research query generator. Generate {count} new search queries about the given topic that cover angles the existing queries miss.
+
+Topic: {topic}
+
+Existing queries (do not repeat or rephrase these):
+{existing_list}
+
+Generate exactly {count} search queries, one per line. Keep each query under 100 characters.
+"""
+    
+    def _parse_queries(self, content: str) -> List[str]:
+        """Parse a model response into individual queries, one per line."""
+        queries = []
+        for line in content.strip().split('\n'):
+            line = line.strip()
+            # Remove numbering if present
+            if line and not line.startswith('#'):
+                # Remove common numbering patterns
+                cleaned_line = line
+                for prefix in ['1.', '2.', '3.', '4.', '5.', '6.', '7.', '8.', '9.', '10.',
+                              '•', '-', '*', 'Query:', 'Search:']:
+                    if cleaned_line.startswith(prefix):
+                        cleaned_line = cleaned_line[len(prefix):].strip()
+                        break
+                
+                if cleaned_line and len(cleaned_line) > 10:  # Filter out very short queries
+                    queries.append(cleaned_line)
+        return queries
+    
     def _generate_fallback_queries(self, topic: str) -> List[str]:
         """Generate fallback queries when AI generation fails."""
         # Truncate topic for fallback queries to prevent issues
@@ -193,6 +332,7 @@ Keep each query under 100 characters.
         
         return queries[:config.num_queries]
     
-    def close(self):
-        """Close the HTTP client."""
-        self.client.close()
+    async def close(self):
+        """Close the HTTP client if this instance owns it."""
+        if self._owns_client:
+            await self.client.aclose()
@@ -0,0 +1,175 @@
+"""
+Process-wide async token-bucket rate limiting for OpenRouter API calls.
+"""
+
+import asyncio
+import json
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from .output import console
+from config import config
+
+class TokenBucket:
+    """Continuously refilling token bucket that lets callers reserve capacity ahead of time."""
+
+    def __init__(self, rate_per_minute: float, capacity: float):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = max(capacity, 1.0)
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+
+    def _refill(self, now: float):
+        """Add the tokens accrued since the last update."""
+        elapsed = now - self.updated_at
+        self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+        self.updated_at = now
+
+    def reserve(self, amount: float, now: float) -> float:
+        """Take `amount` tokens, going into debt if needed, and return the seconds to wait."""
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        self.tokens -= amount
+        if self.tokens >= 0:
+            return 0.0
+        return -self.tokens / self.rate
+
+    def refund(self, amount: float):
+        """Give back tokens that were reserved but not used."""
+        self.tokens = min(self.capacity, self.tokens + amount)
+
+class RateLimiter:
+    """Shared limiter with separate request-per-minute and token-per-minute buckets.
+
+    Callers reserve capacity before each request. Reservations are granted in
+    arrival order, so concurrent workers are spaced out evenly instead of
+    bursting and then idling. A 429 response pauses every caller until the
+    provider's ``Retry-After`` has elapsed.
+    """
+
+    def __init__(self, requests_per_minute: int, tokens_per_minute: int = 0,
+                 burst: int = 10, max_retries: int = 5, default_backoff: float = 5.0):
+        self.requests = TokenBucket(requests_per_minute, burst) if requests_per_minute > 0 else None
+        self.tokens = TokenBucket(tokens_per_minute, tokens_per_minute) if tokens_per_minute > 0 else None
+        self.max_retries = max_retries
+        self.default_backoff = default_backoff
+        self.paused_until = 0.0
+        self.throttled_calls = 0
+        self.retried_429s = 0
+
+    async def acquire(self, tokens: int = 0):
+        """Wait until a request (and its estimated token cost) fits within the limits."""
+        now = time.monotonic()
+        wait = 0.0
+        if self.requests is not None:
+            wait = max(wait, self.requests.reserve(1, now))
+        if self.tokens is not None and tokens > 0:
+            wait = max(wait, self.tokens.reserve(tokens, now))
+        wait = max(wait, self.paused_until - now)
+
+        if wait > 0:
+            self.throttled_calls += 1
+            await asyncio.sleep(wait)
+
+        # A 429 may have arrived while we were sleeping
+        while self.paused_until > time.monotonic():
+            await asyncio.sleep(self.paused_until - time.monotonic())
+
+    def record_usage(self, estimated_tokens: int, actual_tokens: Optional[int]):
+        """Correct the token bucket once the real usage of a call is known."""
+        if self.tokens is None or actual_tokens is None:
+            return
+        difference = actual_tokens - estimated_tokens
+        if difference > 0:
+            self.tokens.reserve(difference, time.monotonic())
+        elif difference < 0:
+            self.tokens.refund(-difference)
+
+    def backoff(self, retry_after: Optional[float] = None, attempt: int = 0) -> float:
+        """Pause all callers after a 429 and return the pause length in seconds."""
+        delay = retry_after if retry_after is not None else self.default_backoff * (2 ** attempt)
+        self.paused_until = max(self.paused_until, time.monotonic() + delay)
+        return delay
+
+    async def execute(self, send: Callable[[], Awaitable[Any]],
+                      request_data: Optional[Dict[str, Any]] = None,
+                      max_retries: Optional[int] = None):
+        """Run `send` under the limiter, retrying on HTTP 429 until the retry limit is hit.
+
+        `max_retries` overrides the limiter's own limit for this call.
+        """
+        estimated_tokens = estimate_request_tokens(request_data) if request_data else 0
+        max_retries = self.max_retries if max_retries is None else max_retries
+
+        for attempt in range(max_retries + 1):
+            await self.acquire(estimated_tokens)
+
+            response = await send()
+
+            if response.status_code != 429:
+                if response.status_code == 200:
+                    self.record_usage(estimated_tokens, _response_token_usage(response))
+                return response
+
+            if attempt == max_retries:
+                break
+
+            self.retried_429s += 1
+            delay = self.backoff(parse_retry_after(response), attempt)
+            console.print(f"⏳ Rate limited (HTTP 429), backing off {delay:.1f}s")
+
+        return response
+
+def parse_retry_after(response) -> Optional[float]:
+    """Read the Retry-After header as seconds, accepting both delta-seconds and HTTP dates."""
+    try:
+        value = response.headers.get("retry-after")
+    except Exception:
+        return None
+    if not value:
+        return None
+
+    try:
+        return max(float(value), 0.0)
+    except (TypeError, ValueError):
+        pass
+
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+def estimate_request_tokens(request_data: Dict[str, Any]) -> int:
+    """Roughly estimate the prompt plus completion tokens a request will consume."""
+    prompt_chars = len(json.dumps(request_data.get("messages", []), ensure_ascii=False))
+    completion_tokens = request_data.get("max_tokens") or config.estimated_completion_tokens
+    return prompt_chars // 4 + completion_tokens
+
+def _response_token_usage(response) -> Optional[int]:
+    """Return the total token usage reported by the API, if any."""
+    try:
+        usage = response.json().get("usage") or {}
+        total = usage.get("total_tokens")
+        return int(total) if total is not None else None
+    except Exception:
+        return None
+
+_rate_limiter: Optional[RateLimiter] = None
+
+def get_rate_limiter() -> RateLimiter:
+    """Return the process-wide rate limiter, creating it from config on first use."""
+    global _rate_limiter
+    if _rate_limiter is None:
+        _rate_limiter = RateLimiter(
+            requests_per_minute=config.api_rate_limit,
+            tokens_per_minute=config.api_token_limit,
+            burst=config.api_burst,
+            max_retries=config.max_rate_limit_retries,
+        )
+    return _rate_limiter
+
+def reset_rate_limiter():
+    """Drop the shared limiter so the next call rebuilds it from the current config."""
+    global _rate_limiter
+    _rate_limiter = None
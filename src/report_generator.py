@@ -2,42 +2,100 @@
 Report generator for creating final synthesized reports using AI models.
 """
 
+import asyncio
 import httpx
-import json
-from typing import List, Dict, Any
+import os
+import re
+import time
+from typing import Callable, List, Dict, Any, Optional, Tuple
 from datetime import datetime
-from rich.console import Console
 
-from .utils import SearchResult
+from .output import console, notice_console
+from .utils import SearchResult, StreamMetrics
 from .fast_ai import FastAI
+from .api_client import create_http_client, send_chat_request, stream_chat_request
+from .pdf_renderer import get_render_pool, write_pdf
+from .context_packer import ContextPacker
+from .rate_limiter import get_rate_limiter
 from config import config
 
-console = Console()
+REPORT_FOOTER = """
+
+---
+
+*Report generated by ULTRA DEEP RESEARCH - An army of AI agents for comprehensive research*
+"""
 
 class ReportGenerator:
     """Generates comprehensive final reports using AI models via OpenRouter."""
     
-    def __init__(self):
-        self.client = httpx.Client(
-            timeout=httpx.Timeout(600.0, connect=15.0),  # 10 minutes total, 15s connect
-            headers={
-                "Authorization": f"Bearer {config.openrouter_api_key}",
-                "Content-Type": "application/json",
-                "HTTP-Referer": "https://utra-deep-research.com",
-                "X-Title": "ULTRA DEEP RESEARCH"
-            }
-        )
-        self.fast_ai = FastAI()
+    REQUEST_TIMEOUT = 600.0  # 10 minutes total per request
+    PARTIAL_WRITE_INTERVAL = 0.5  # Seconds between appends to a streaming report's partial file
+    
+    def __init__(self, client: Optional[httpx.AsyncClient] = None, pdf_mode: Optional[str] = None,
+                 on_pdf_complete: Optional[Callable[[str, Optional[Exception]], None]] = None):
+        self._owns_client = client is None
+        self.client = client or create_http_client()
+        self.rate_limiter = get_rate_limiter()
+        self.fast_ai = FastAI(self.client)
+        # "sync" waits for the PDF, "async" renders it in the background, "off" skips it
+        self.pdf_mode = pdf_mode or config.pdf_mode
+        self.on_pdf_complete = on_pdf_complete  # Called with (pdf path, error or None)
+        self.pending_pdfs: List[asyncio.Task] = []
+        self.context_packer = ContextPacker(config.context_token_budget, config.context_max_tokens_per_result)
+        self.partial_report_path: Optional[str] = None  # Written while a report streams in
     
-    async def generate_final_report(self, topic: str, results: List[SearchResult], statistics: Dict[str, Any]) -> str:
-        """Generate a comprehensive final report synthesizing all research results."""
+    async def generate_final_report(self, topic: str, results: List[SearchResult], statistics: Dict[str, Any],
+                                    stream: Optional[bool] = None) -> str:
+        """Generate a comprehensive final report synthesizing all research results.
+        
+        With `stream` (default: STREAM_REPORT) the report is written to a
+        ``.partial.md`` file and shown in the terminal as it is generated.
+        """
         console.print("🎯 Generating final comprehensive report...")
+        stream = config.stream_report if stream is None else stream
         
         try:
-            # Prepare the content for synthesis
-            research_summary = self._prepare_research_summary(results, statistics)
+            request_data = await self._build_report_request(topic, results, statistics)
+            
+            if stream:
+                final_report = await self._stream_report(topic, request_data, statistics)
+                if final_report is not None:
+                    return final_report
+                return self._generate_fallback_report(topic, results, statistics)
+            
+            response = await send_chat_request(
+                self.client, request_data, timeout=self.REQUEST_TIMEOUT, rate_limiter=self.rate_limiter
+            )
             
-            system_prompt = f"""
+            if response.status_code == 200:
+                data = response.json()
+                report = data["choices"][0]["message"]["content"]
+                
+                # Add metadata header
+                final_report = self._add_report_metadata(topic, report, statistics)
+                
+                console.print("✅ Final report generated successfully")
+                return final_report
+            else:
+                notice_console.print(f"❌ Failed to generate report (Status: {response.status_code})")
+                return self._generate_fallback_report(topic, results, statistics)
+                
+        except Exception as e:
+            notice_console.print(f"❌ Exception generating report: {str(e)}")
+            return self._generate_fallback_report(topic, results, statistics)
+    
+    async def _build_report_request(self, topic: str, results: List[SearchResult],
+                                    statistics: Dict[str, Any]) -> Dict[str, Any]:
+        """Condense the results and build the summarizer request."""
+        # Prepare the content for synthesis; token counts are shared by the budget check and the packer
+        costs = None if config.synthesis_mode == "mapreduce" else self.context_packer.measure(results)
+        if self._use_map_reduce(results, costs):
+            research_summary = await self._map_reduce_summary(topic, results)
+        else:
+            research_summary = self._prepare_research_summary(results, statistics, costs)
+        
+        system_prompt = f"""
 You are an expert research analyst and synthesizer. Your task is to create a comprehensive, high-signal research report based on the aggregated search results provided.
 
 REQUIREMENTS:
@@ -73,65 +131,158 @@ AGGREGATED RESEARCH DATA:
 
 Generate a comprehensive, insightful report that synthesizes all this information into valuable, actionable insights.
 """
+        
+        request_data = {
+            "model": config.summarizer_model,
+            "messages": [
+                {
+                    "role": "system",
+                    "content": system_prompt
+                },
+                {
+                    "role": "user",
+                    "content": f"Generate a comprehensive research report on: {topic}"
+                }
+            ],
             
-            request_data = {
-                "model": config.summarizer_model,
-                "messages": [
-                    {
-                        "role": "system",
-                        "content": system_prompt
-                    },
-                    {
-                        "role": "user",
-                        "content": f"Generate a comprehensive research report on: {topic}"
-                    }
-                ],
-                
-                "temperature": 0.3
-            }
-            
-            response = self.client.post(
-                "https://openrouter.ai/api/v1/chat/completions",
-                json=request_data
-            )
-            
-            if response.status_code == 200:
-                data = response.json()
-                report = data["choices"][0]["message"]["content"]
-                
-                # Add metadata header
-                final_report = self._add_report_metadata(topic, report, statistics)
-                
-                console.print("✅ Final report generated successfully")
-                return final_report
-            else:
-                console.print(f"❌ Failed to generate report (Status: {response.status_code})")
-                return self._generate_fallback_report(topic, results, statistics)
-                
-        except Exception as e:
-            console.print(f"❌ Exception generating report: {str(e)}")
-            return self._generate_fallback_report(topic, results, statistics)
+            "temperature": 0.3
+        }
+        return request_data
     
-    def _prepare_research_summary(self, results: List[SearchResult], statistics: Dict[str, Any]) -> str:
-        """Prepare a condensed summary of research results for AI synthesis."""
-        # Take top results by relevance score
-        top_results = sorted(results, key=lambda x: x.relevance_score, reverse=True)[:20]
+    async def _stream_report(self, topic: str, request_data: Dict[str, Any],
+                             statistics: Dict[str, Any]) -> Optional[str]:
+        """Stream the report into a partial Markdown file and the terminal.
         
+        The metadata header is written first and the footer once the stream
+        ends. If the stream breaks off, whatever arrived is kept, both in the
+        partial file and in the returned report, marked as incomplete.
+        Returns None if nothing was generated.
+        """
+        header = self._report_header(topic, statistics)
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        path = os.path.join(config.reports_dir, f"{_slugify(topic)}_{timestamp}.partial.md")
+        self.partial_report_path = path
+        await asyncio.to_thread(_write_text_file, path, header)
+        console.print(f"📝 Streaming report to: {path}")
+        
+        metrics = StreamMetrics()
+        parts: List[str] = []
+        pending: List[str] = []  # Received but not yet written to the partial file
+        printer = _LinePrinter()
+        error = None
+        last_write = time.monotonic()
+        try:
+            async for delta in stream_chat_request(self.client, request_data, timeout=self.REQUEST_TIMEOUT,
+                                                   rate_limiter=self.rate_limiter, metrics=metrics):
+                parts.append(delta)
+                pending.append(delta)
+                printer.feed(delta)
+                # Write whole lines, at most every PARTIAL_WRITE_INTERVAL, off the event loop
+                if "\n" in delta and time.monotonic() - last_write >= self.PARTIAL_WRITE_INTERVAL:
+                    text, pending = "".join(pending), []
+                    await asyncio.to_thread(_append_text_file, path, text)
+                    last_write = time.monotonic()
+        except Exception as e:
+            error = e
+        printer.flush()
+        
+        report = "".join(parts)
+        if report.strip():
+            if error is not None or not metrics.complete:
+                reason = str(error) if error else "stream ended early"
+                notice_console.print(f"⚠️  Report generation stopped early ({reason}); keeping the partial report")
+                note = f"\n\n*Report incomplete: generation stopped early ({reason}).*"
+                report += note
+                pending.append(note)
+            else:
+                console.print("✅ Final report generated successfully")
+            pending.append(REPORT_FOOTER)
+            await asyncio.to_thread(_append_text_file, path, "".join(pending))
+            return header + report + REPORT_FOOTER
+        
+        notice_console.print(f"❌ Failed to stream report: {str(error) if error else 'empty response'}")
+        self._discard_partial_report()
+        return None
+    
+    def _prepare_research_summary(self, results: List[SearchResult], statistics: Dict[str, Any],
+                                  costs: Optional[List[Tuple[int, int]]] = None) -> str:
+        """Pack the most valuable results into the summarizer's token budget."""
         summary_parts = []
-        for i, result in enumerate(top_results, 1):
+        for i, (result, content) in enumerate(self.context_packer.pack(results, costs), 1):
+            trimmed = "..." if len(content) < len(result.content) else ""
             summary_parts.append(f"Source {i}:")
             summary_parts.append(f"Query: {result.query}")
-            summary_parts.append(f"Content: {result.content[:800]}...")  # Truncate for context
+            summary_parts.append(f"Content: {content}{trimmed}")
             summary_parts.append(f"Relevance: {result.relevance_score:.2f}")
             summary_parts.append("---")
         
         return "\n".join(summary_parts)
     
+    def _use_map_reduce(self, results: List[SearchResult],
+                        costs: Optional[List[Tuple[int, int]]] = None) -> bool:
+        """Decide whether the results are condensed by map-reduce before the final pass."""
+        if config.synthesis_mode == "mapreduce":
+            return True
+        if config.synthesis_mode == "single":
+            return False
+        return not self.context_packer.fits(results, costs)
+    
+    async def _map_reduce_summary(self, topic: str, results: List[SearchResult]) -> str:
+        """Condense every result into a few partial syntheses for the final report pass.
+        
+        Results are split into chunks that the fast model summarizes
+        concurrently (map). The summaries are then merged in groups of
+        `REDUCE_FAN_IN` until at most that many remain (reduce), so the number
+        of sequential rounds grows with the log of the result count.
+        """
+        ranked = sorted(results, key=lambda x: x.relevance_score, reverse=True)
+        chunk_size = max(1, config.map_chunk_size)
+        fan_in = max(2, config.reduce_fan_in)
+        semaphore = asyncio.Semaphore(max(1, config.synthesis_concurrency))
+        
+        async def condense(content: str) -> str:
+            async with semaphore:
+                summary = await self.fast_ai.summarize_research_chunk(topic, content)
+            # Keep the material itself if the fast model fails, so nothing is lost
+            return summary if summary else content
+        
+        chunks = [
+            self._format_sources(ranked[start:start + chunk_size], start + 1, config.map_result_chars)
+            for start in range(0, len(ranked), chunk_size)
+        ]
+        console.print(f"🧩 Condensing {len(ranked)} results in {len(chunks)} chunks...")
+        summaries = list(await asyncio.gather(*(condense(chunk) for chunk in chunks)))
+        
+        rounds = 0
+        while len(summaries) > fan_in:
+            rounds += 1
+            groups = [summaries[start:start + fan_in] for start in range(0, len(summaries), fan_in)]
+            summaries = list(await asyncio.gather(*(condense("\n\n---\n\n".join(group)) for group in groups)))
+        
+        console.print(f"🧩 Reduced to {len(summaries)} partial syntheses in {rounds} merge rounds")
+        return "\n\n".join(
+            f"Partial Synthesis {i}:\n{summary}\n---" for i, summary in enumerate(summaries, 1)
+        )
+    
+    def _format_sources(self, results: List[SearchResult], first_index: int, max_chars: int) -> str:
+        """Format results as numbered sources, truncating each to `max_chars`."""
+        parts = []
+        for i, result in enumerate(results, first_index):
+            content = result.content
+            if len(content) > max_chars:
+                content = content[:max_chars] + "..."
+            parts.append(f"Source {i}:\nQuery: {result.query}\nContent: {content}\n---")
+        return "\n".join(parts)
+    
     def _add_report_metadata(self, topic: str, report: str, statistics: Dict[str, Any]) -> str:
         """Add metadata header to the report."""
+        return self._report_header(topic, statistics) + report + REPORT_FOOTER
+    
+    def _report_header(self, topic: str, statistics: Dict[str, Any]) -> str:
+        """Return the metadata header that precedes the report body."""
         timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         
-        metadata = f"""
+        return f"""
 # ULTRA DEEP RESEARCH REPORT
 
 **Topic:** {topic}
@@ -143,14 +294,7 @@ Generate a comprehensive, insightful report that synthesizes all this informatio
 
 ---
 
-{report}
-
----
-
-*Report generated by ULTRA DEEP RESEARCH - An army of AI agents for comprehensive research*
 """
-        
-        return metadata
     
     def _generate_fallback_report(self, topic: str, results: List[SearchResult], statistics: Dict[str, Any]) -> str:
         """Generate a fallback report when AI synthesis fails."""
@@ -196,116 +340,111 @@ Generate a comprehensive, insightful report that synthesizes all this informatio
         return fallback_content
     
     async def save_report(self, report: str, topic: str = "", filename: str = None) -> str:
-        """Save the report to both MD and PDF files with intelligent naming."""
+        """Save the report as Markdown and render the PDF according to `pdf_mode`.
+        
+        Returns the Markdown path once it is written. In "async" mode the PDF
+        is still rendering; await `wait_for_pdfs()` (or `close()`) to finish it.
+        """
         if filename is None:
             # Generate intelligent filename using FastAI
             intelligent_name = await self.fast_ai.generate_report_name(topic, report)
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             filename = f"{intelligent_name}_{timestamp}.md"
         
-        # Ensure both directories exist
-        import os
-        reports_dir = "reports"
-        reports_pdf_dir = "reports-pdf"
-        os.makedirs(reports_dir, exist_ok=True)
-        os.makedirs(reports_pdf_dir, exist_ok=True)
-        
         # Create full paths
-        md_filepath = os.path.join(reports_dir, filename)
+        md_filepath = os.path.join(config.reports_dir, filename)
         pdf_filename = filename.replace('.md', '.pdf')
-        pdf_filepath = os.path.join(reports_pdf_dir, pdf_filename)
+        pdf_filepath = os.path.join(config.reports_pdf_dir, pdf_filename)
         
         try:
-            # Save MD file
-            with open(md_filepath, 'w', encoding='utf-8') as f:
-                f.write(report)
-            
+            # Save MD file without blocking the event loop on disk I/O
+            await asyncio.to_thread(_write_text_file, md_filepath, report)
             console.print(f"📄 MD report saved to: {md_filepath}")
-            
-            # Save PDF file
-            await self._save_pdf_report(report, pdf_filepath)
-            
-            return md_filepath
+            self._discard_partial_report()
             
         except Exception as e:
-            console.print(f"❌ Failed to save report: {str(e)}")
+            notice_console.print(f"❌ Failed to save report: {str(e)}")
             return ""
+        
+        # Save PDF file
+        if self.pdf_mode == "sync":
+            await self._save_pdf_report(report, pdf_filepath)
+        elif self.pdf_mode == "async":
+            self.pending_pdfs.append(asyncio.ensure_future(self._save_pdf_report(report, pdf_filepath)))
+            console.print(f"📄 PDF report rendering in background: {pdf_filepath}")
+        
+        return md_filepath
+    
+    def _discard_partial_report(self):
+        """Delete the streamed partial report once it is no longer needed."""
+        if self.partial_report_path:
+            try:
+                os.remove(self.partial_report_path)
+            except OSError:
+                pass
+            self.partial_report_path = None
     
     async def _save_pdf_report(self, report: str, pdf_filepath: str):
-        """Convert and save report as PDF."""
+        """Render the report as PDF in a worker process."""
+        error = None
         try:
-            import markdown
-            from weasyprint import HTML, CSS
-            
-            # Convert markdown to HTML
-            html_content = markdown.markdown(report, extensions=['tables', 'fenced_code'])
-            
-            # Add basic HTML structure and styling
-            full_html = f"""
-            <!DOCTYPE html>
-            <html>
-            <head>
-                <meta charset="utf-8">
-                <title>Research Report</title>
-                <style>
-                    body {{ 
-                        font-family: Arial, sans-serif; 
-                        line-height: 1.6; 
-                        margin: 40px;
-                        max-width: 800px;
-                    }}
-                    h1, h2, h3, h4, h5, h6 {{ 
-                        color: #333; 
-                        margin-top: 30px;
-                    }}
-                    code {{ 
-                        background-color: #f4f4f4; 
-                        padding: 2px 4px; 
-                        border-radius: 3px;
-                        font-family: monospace;
-                    }}
-                    pre {{ 
-                        background-color: #f4f4f4; 
-                        padding: 10px; 
-                        border-radius: 5px;
-                        overflow-x: auto;
-                    }}
-                    table {{ 
-                        border-collapse: collapse; 
-                        width: 100%;
-                        margin: 20px 0;
-                    }}
-                    th, td {{ 
-                        border: 1px solid #ddd; 
-                        padding: 8px; 
-                        text-align: left;
-                    }}
-                    th {{ 
-                        background-color: #f2f2f2;
-                    }}
-                    blockquote {{
-                        border-left: 4px solid #ccc;
-                        margin: 0;
-                        padding-left: 20px;
-                        color: #666;
-                    }}
-                </style>
-            </head>
-            <body>
-                {html_content}
-            </body>
-            </html>
-            """
-            
-            # Convert to PDF
-            HTML(string=full_html).write_pdf(pdf_filepath)
+            os.makedirs(os.path.dirname(pdf_filepath) or ".", exist_ok=True)
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(get_render_pool(), write_pdf, report, pdf_filepath)
             console.print(f"📄 PDF report saved to: {pdf_filepath}")
             
         except Exception as e:
-            console.print(f"❌ Failed to save PDF report: {str(e)}")
+            error = e
+            notice_console.print(f"❌ Failed to save PDF report: {str(e)}")
             # Don't raise exception - MD file should still be saved even if PDF fails
+        
+        if self.on_pdf_complete is not None:
+            self.on_pdf_complete(pdf_filepath, error)
+    
+    async def wait_for_pdfs(self):
+        """Wait for PDFs still rendering in the background."""
+        pending, self.pending_pdfs = self.pending_pdfs, []
+        if pending:
+            await asyncio.gather(*pending)
+    
+    async def close(self):
+        """Finish background PDFs and close the HTTP client if this generator owns it."""
+        await self.wait_for_pdfs()
+        await self.fast_ai.close()
+        if self._owns_client:
+            await self.client.aclose()
+
+class _LinePrinter:
+    """Echoes streamed Markdown to the terminal one complete line at a time."""
+    
+    def __init__(self):
+        self.buffer = ""
+    
+    def feed(self, text: str):
+        self.buffer += text
+        if "\n" in text:
+            *lines, self.buffer = self.buffer.split("\n")
+            for line in lines:
+                self._print(line)
+    
+    def flush(self):
+        if self.buffer:
+            self._print(self.buffer)
+            self.buffer = ""
     
-    def close(self):
-        """Close the HTTP clients."""
-        self.client.close()
-        self.fast_ai.close()
+    def _print(self, line: str):
+        style = "bold cyan" if line.lstrip().startswith("#") else None
+        console.print(line, style=style, markup=False, highlight=False, soft_wrap=True)
+
+def _slugify(text: str) -> str:
+    return re.sub(r'[^a-z0-9]+', '_', text.lower()).strip('_')[:40] or "report"
+
+def _write_text_file(path: str, content: str):
+    """Write a text file, creating its directory if needed."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(content)
+
+def _append_text_file(path: str, content: str):
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(content)
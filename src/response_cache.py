@@ -0,0 +1,199 @@
+"""
+Persistent, content-addressed cache for OpenRouter chat completion responses.
+"""
+
+import asyncio
+import contextvars
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional
+
+from config import config
+
+# Request fields that change how a completion is delivered, not what it says
+VOLATILE_FIELDS = frozenset({"stream", "stream_options"})
+
+class CacheUsage:
+    """Hits and misses counted for one pipeline."""
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+
+_usage: contextvars.ContextVar = contextvars.ContextVar("cache_usage", default=None)
+
+def track_cache_usage() -> CacheUsage:
+    """Start counting cache lookups made from the current task and the tasks it starts."""
+    usage = CacheUsage()
+    _usage.set(usage)
+    return usage
+
+class ResponseCache:
+    """SQLite-backed response cache with a TTL, a size cap and LRU eviction.
+
+    Entries are keyed by a hash of the whole request body except the
+    fields in VOLATILE_FIELDS, so only a request that would produce the
+    same completion is served from disk. `hits` and `misses` count every
+    lookup in the process; see track_cache_usage for per-pipeline counts.
+    Async code should use `aget`/`aset`, which run the SQLite work on a
+    single worker thread.
+    """
+
+    def __init__(self, path: str, ttl: float, max_bytes: int):
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        # The async methods use the connection from one worker thread, so lookups
+        # and writes (including eviction) never block the event loop
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="response-cache")
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                model TEXT NOT NULL,
+                body TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+            """
+        )
+        self.connection.execute("CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses (accessed_at)")
+        self.connection.commit()
+        self.total_bytes = self.connection.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    @staticmethod
+    def make_key(request_data: Dict[str, Any]) -> str:
+        """Hash the parts of a request that determine its completion."""
+        material = json.dumps(
+            {name: value for name, value in request_data.items() if name not in VOLATILE_FIELDS},
+            sort_keys=True,
+            ensure_ascii=False
+        )
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    async def aget(self, request_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """`get` on the cache's worker thread."""
+        return await self._run(self.get, request_data)
+
+    async def aset(self, request_data: Dict[str, Any], data: Dict[str, Any]):
+        """`set` on the cache's worker thread."""
+        await self._run(self.set, request_data, data)
+
+    def _run(self, func, *args) -> "asyncio.Future":
+        # Carry the caller's context so per-pipeline usage is still counted
+        context = contextvars.copy_context()
+        return asyncio.get_running_loop().run_in_executor(self._executor, context.run, func, *args)
+
+    def get(self, request_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Return the cached response body for a request, or None on a miss."""
+        key = self.make_key(request_data)
+        now = time.time()
+        row = self.connection.execute(
+            "SELECT body, created_at, size FROM responses WHERE key = ?", (key,)
+        ).fetchone()
+
+        if row is None:
+            self._count(hit=False)
+            return None
+
+        body, created_at, size = row
+        if self.ttl > 0 and now - created_at > self.ttl:
+            self.connection.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self.connection.commit()
+            self.total_bytes -= size
+            self._count(hit=False)
+            return None
+
+        self.connection.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+        self.connection.commit()
+        self._count(hit=True)
+        return json.loads(body)
+
+    def _count(self, hit: bool):
+        usage = _usage.get()
+        if hit:
+            self.hits += 1
+            if usage is not None:
+                usage.hits += 1
+        else:
+            self.misses += 1
+            if usage is not None:
+                usage.misses += 1
+
+    def set(self, request_data: Dict[str, Any], data: Dict[str, Any]):
+        """Store a response body and evict least recently used entries over the size cap."""
+        key = self.make_key(request_data)
+        body = json.dumps(data, ensure_ascii=False)
+        size = len(body.encode("utf-8"))
+        now = time.time()
+
+        previous = self.connection.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+        if previous is not None:
+            self.total_bytes -= previous[0]
+
+        self.connection.execute(
+            "INSERT OR REPLACE INTO responses (key, model, body, size, created_at, accessed_at) VALUES (?, ?, ?, ?, ?, ?)",
+            (key, request_data.get("model", ""), body, size, now, now)
+        )
+        self.total_bytes += size
+        self._evict()
+        self.connection.commit()
+
+    def _evict(self):
+        """Drop the least recently used entries until the cache fits in max_bytes."""
+        while self.max_bytes > 0 and self.total_bytes > self.max_bytes:
+            row = self.connection.execute(
+                "SELECT key, size FROM responses ORDER BY accessed_at ASC LIMIT 1"
+            ).fetchone()
+            if row is None:
+                self.total_bytes = 0
+                break
+            self.connection.execute("DELETE FROM responses WHERE key = ?", (row[0],))
+            self.total_bytes -= row[1]
+
+    def clear(self):
+        """Remove every cached response."""
+        self.connection.execute("DELETE FROM responses")
+        self.connection.commit()
+        self.total_bytes = 0
+
+    def close(self):
+        """Wait for pending cache work, then close the database connection."""
+        self._executor.shutdown(wait=True)
+        self.connection.close()
+
+_response_cache: Optional[ResponseCache] = None
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """Return the process-wide response cache, or None when caching is disabled."""
+    global _response_cache
+    if not config.cache_enabled:
+        return None
+    if _response_cache is None:
+        _response_cache = ResponseCache(
+            path=config.cache_path,
+            ttl=config.cache_ttl,
+            max_bytes=config.cache_max_mb * 1024 * 1024
+        )
+    return _response_cache
+
+def reset_response_cache():
+    """Close the shared cache so the next call reopens it from the current config."""
+    global _response_cache
+    if _response_cache is not None:
+        _response_cache.close()
+    _response_cache = None
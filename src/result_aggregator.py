@@ -3,48 +3,114 @@ Result aggregator for processing and ranking search results.
 """
 
 import re
-from typing import List, Dict, Any, Tuple
+from typing import List, Dict, Any, Optional, Tuple
 from collections import Counter
-from rich.console import Console
 
-from .utils import SearchResult, ResearchStats, deduplicate_results, rank_results
+from .output import console
+from .utils import SearchResult, ResearchStats, ContentDeduplicator, score_result
+from .dedup import MinHashDeduplicator
+from .pattern_matcher import PatternMatcher
+from .result_store import ResultStore
+from config import config
 
-console = Console()
+DEFAULT_ERROR_INDICATORS = [
+    "search failed", "error", "not found", "unable to", 
+    "cannot", "failed", "timeout", "exception"
+]
+
+DEFAULT_SUBSTANTIVE_INDICATORS = [
+    "research", "study", "analysis", "data", "evidence",
+    "according to", "research shows", "study found",
+    "experts believe", "results indicate", "conclusion",
+    "methodology", "findings", "investigation"
+]
 
 class ResultAggregator:
     """Aggregates and processes search results to extract high-signal information."""
     
-    def __init__(self):
+    def __init__(self, dedup_method: Optional[str] = None, dedup_threshold: Optional[float] = None,
+                 error_indicators: Optional[List[str]] = None,
+                 substantive_indicators: Optional[List[str]] = None,
+                 store: Optional[ResultStore] = None):
+        # Both indicator lists are matched in a single pass over each result
+        self.matcher = PatternMatcher({
+            "error": error_indicators if error_indicators is not None else DEFAULT_ERROR_INDICATORS,
+            "substantive": substantive_indicators if substantive_indicators is not None else DEFAULT_SUBSTANTIVE_INDICATORS
+        })
+        self.dedup_method = dedup_method or config.dedup_method
+        self.dedup_threshold = dedup_threshold if dedup_threshold is not None else config.dedup_threshold
+        # Accepted results are moved here, so their content is not kept in memory
+        self.store = store
+        self.stats = ResearchStats()
+        self.reset()
+    
+    def reset(self, dedup_method: Optional[str] = None):
+        """Start a fresh incremental aggregation."""
         self.stats = ResearchStats()
+        self._deduplicator = self._create_deduplicator(dedup_method or self.dedup_method)
+        self._accepted: List[SearchResult] = []
+        self._duplicates = 0
+        self._error_pattern_hits: Counter = Counter()
     
-    def aggregate_results(self, results: List[SearchResult]) -> Tuple[List[SearchResult], Dict[str, Any]]:
-        """Aggregate and process search results."""
+    def aggregate_results(self, results: List[SearchResult],
+                          dedup_method: Optional[str] = None) -> Tuple[List[SearchResult], Dict[str, Any]]:
+        """Aggregate and process search results.
+        
+        `dedup_method` is "exact" (hash of the content prefix) or "minhash"
+        (near-duplicate detection); it defaults to the configured method.
+        """
         console.print("📊 Aggregating and processing search results...")
+        console.print("   • Removing duplicates, filtering and scoring...")
+        
+        self.reset(dedup_method)
+        for result in results:
+            self.add_result(result)
         
+        return self.finalize()
+    
+    def add_result(self, result: SearchResult) -> bool:
+        """Deduplicate, filter and score a single result as it arrives.
+        
+        Returns True if the result was kept for the final ranking.
+        """
         # Update stats
-        self.stats.total_queries = len(results)
-        self.stats.completed_searches = len([r for r in results if r.source != "Error"])
-        self.stats.failed_searches = len([r for r in results if r.source == "Error"])
+        self.stats.total_queries += 1
+        if result.source == "Error":
+            self.stats.failed_searches += 1
+        else:
+            self.stats.completed_searches += 1
         
         # Step 1: Remove duplicates
-        console.print("   • Removing duplicates...")
-        unique_results = deduplicate_results(results)
+        if self._deduplicator.is_duplicate(result):
+            self._duplicates += 1
+            return False
         
         # Step 2: Filter out low-quality results
-        console.print("   • Filtering low-quality content...")
-        filtered_results = self._filter_quality(unique_results)
+        if not self._passes_quality(result):
+            return False
         
-        # Step 3: Rank results by relevance
+        # Step 3: Score for ranking
+        score_result(result)
+        if self.store is not None:
+            result = self.store.append(result)
+        self._accepted.append(result)
+        return True
+    
+    def finalize(self) -> Tuple[List[SearchResult], Dict[str, Any]]:
+        """Rank the accepted results and compute themes and statistics."""
+        # Rank results by relevance
         console.print("   • Ranking by relevance...")
-        ranked_results = rank_results(filtered_results)
+        ranked_results = sorted(self._accepted, key=lambda x: x.relevance_score, reverse=True)
         
-        # Step 4: Extract key insights and themes
+        # Extract key insights and themes
         console.print("   • Extracting key themes...")
         themes = self._extract_themes(ranked_results)
         
-        # Step 5: Generate statistics
+        # Generate statistics
         console.print("   • Generating statistics...")
         statistics = self._generate_statistics(ranked_results, themes)
+        statistics["duplicates_removed"] = self._duplicates
+        statistics["error_pattern_hits"] = dict(self._error_pattern_hits)
         
         # Update high-quality results count
         self.stats.high_quality_results = len(ranked_results)
@@ -52,41 +118,46 @@ class ResultAggregator:
         console.print(f"✅ Aggregation complete: {len(ranked_results)} high-quality results")
         return ranked_results, statistics
     
+    def _create_deduplicator(self, method: str):
+        """Build the duplicate detector for the given method."""
+        if method == "minhash":
+            return MinHashDeduplicator(threshold=self.dedup_threshold)
+        if method == "exact":
+            return ContentDeduplicator()
+        raise ValueError(f"Unknown dedup method: {method}")
+    
     def _filter_quality(self, results: List[SearchResult]) -> List[SearchResult]:
         """Filter out low-quality results based on content analysis."""
-        filtered = []
+        return [result for result in results if self._passes_quality(result)]
+    
+    def _passes_quality(self, result: SearchResult) -> bool:
+        """Check a single result for quality, boosting the score of substantive content."""
+        # Skip error results
+        if result.source == "Error":
+            return False
         
-        for result in results:
-            content = result.content.lower()
-            
-            # Skip error results
-            if result.source == "Error":
-                continue
-            
-            # Skip very short content
-            if len(content) < 100:
-                continue
-            
-            # Skip content that seems to be error messages
-            error_indicators = [
-                "search failed", "error", "not found", "unable to", 
-                "cannot", "failed", "timeout", "exception"
-            ]
-            
-            if any(indicator in content for indicator in error_indicators):
-                continue
-            
-            # Skip repetitive content
-            if self._is_repetitive(content):
-                continue
-            
-            # Boost score for substantive content
-            if self._is_substantive(content):
-                result.relevance_score += 0.3
-            
-            filtered.append(result)
-        
-        return filtered
+        # Skip very short content
+        content = result.content
+        if len(content) < 100:
+            return False
+        
+        content = content.lower()
+        hits = self.matcher.classify(content, lowered=True)
+        
+        # Skip content that seems to be error messages
+        if hits["error"]:
+            self._error_pattern_hits.update(hits["error"])
+            return False
+        
+        # Skip repetitive content
+        if self._is_repetitive(content):
+            return False
+        
+        # Boost score for substantive content
+        if self._is_substantive(content, hits["substantive"]):
+            result.relevance_score += 0.3
+        
+        return True
     
     def _is_repetitive(self, content: str) -> bool:
         """Check if content is overly repetitive."""
@@ -104,17 +175,13 @@ class ResultAggregator:
         
         return False
     
-    def _is_substantive(self, content: str) -> bool:
+    def _is_substantive(self, content: str, substantive_hits: Optional[Dict[str, int]] = None) -> bool:
         """Check if content appears substantive and valuable."""
-        substantive_indicators = [
-            "research", "study", "analysis", "data", "evidence",
-            "according to", "research shows", "study found",
-            "experts believe", "results indicate", "conclusion",
-            "methodology", "findings", "investigation"
-        ]
-        
-        # Check for substantive keywords
-        substantive_count = sum(1 for indicator in substantive_indicators if indicator in content.lower())
+        if substantive_hits is None:
+            substantive_hits = self.matcher.classify(content)["substantive"]
+        
+        # Count distinct substantive keywords
+        substantive_count = len(substantive_hits)
         
         # Check for length (longer content tends to be more substantive)
         length_score = min(len(content) / 1000, 1.0)
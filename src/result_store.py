@@ -0,0 +1,178 @@
+"""
+Compact storage for search results: metadata in arrays, content spooled to a memory-mapped file.
+"""
+
+import math
+import mmap
+import tempfile
+from array import array
+from typing import Dict, Iterator, List, Optional
+
+from .utils import SearchResult
+
+# Content is written to the spool in chunks of this size rather than once per result
+SPOOL_BUFFER_BYTES = 1024 * 1024
+
+class StoredResult:
+    """A view of one result in a ResultStore, usable wherever a SearchResult is read.
+
+    Only the store and an index are kept per view; the content is read
+    from the spool file each time it is accessed, so code that uses it
+    more than once should read it into a local first.
+    """
+
+    __slots__ = ("_store", "_index")
+
+    def __init__(self, store: "ResultStore", index: int):
+        self._store = store
+        self._index = index
+
+    @property
+    def query(self) -> str:
+        return self._store._queries[self._index]
+
+    @property
+    def content(self) -> str:
+        return self._store.read_content(self._index)
+
+    @property
+    def source(self) -> str:
+        return self._store._source_names[self._store._sources[self._index]]
+
+    @property
+    def timestamp(self) -> float:
+        return self._store._timestamps[self._index]
+
+    @property
+    def relevance_score(self) -> float:
+        return self._store._scores[self._index]
+
+    @relevance_score.setter
+    def relevance_score(self, value: float):
+        self._store._scores[self._index] = value
+
+    @property
+    def time_to_first_token(self) -> Optional[float]:
+        return _optional(self._store._first_token_times[self._index])
+
+    @property
+    def tokens_per_second(self) -> Optional[float]:
+        return _optional(self._store._token_rates[self._index])
+
+    def to_search_result(self) -> SearchResult:
+        """Return a standalone SearchResult with the content loaded."""
+        return SearchResult(
+            query=self.query,
+            content=self.content,
+            source=self.source,
+            timestamp=self.timestamp,
+            relevance_score=self.relevance_score,
+            time_to_first_token=self.time_to_first_token,
+            tokens_per_second=self.tokens_per_second,
+        )
+
+    def __repr__(self) -> str:
+        return f"StoredResult(index={self._index}, query={self.query!r}, source={self.source!r})"
+
+class ResultStore:
+    """Append-only store that keeps memory use flat as results pile up.
+
+    Numeric fields live in typed arrays (a few dozen bytes per result) and
+    source names are interned. Content is UTF-8 encoded and appended to an
+    anonymous temporary file in `spool_dir` through a SPOOL_BUFFER_BYTES
+    buffer, so appends touch the disk about once per megabyte, then read
+    back lazily by offset through a memory map, so resident memory holds
+    only the pages that are being read. The spool file is deleted by
+    `close()`.
+    """
+
+    def __init__(self, spool_dir: Optional[str] = None):
+        self._file = tempfile.TemporaryFile(prefix="results-", suffix=".spool", dir=spool_dir or None,
+                                            buffering=SPOOL_BUFFER_BYTES)
+        self._map: Optional[mmap.mmap] = None
+        self._mapped_size = 0
+        self._spool_size = 0
+
+        self._queries: List[str] = []
+        self._source_names: List[str] = []
+        self._source_ids: Dict[str, int] = {}
+        self._sources = array('H')
+        self._timestamps = array('d')
+        self._scores = array('d')
+        self._first_token_times = array('d')
+        self._token_rates = array('d')
+        self._offsets = array('q')
+        self._lengths = array('q')
+
+    def append(self, result: SearchResult) -> StoredResult:
+        """Store a result and return a view of it. The result object can then be dropped."""
+        data = result.content.encode("utf-8")
+        self._file.write(data)
+        self._offsets.append(self._spool_size)
+        self._lengths.append(len(data))
+        self._spool_size += len(data)
+
+        source_id = self._source_ids.get(result.source)
+        if source_id is None:
+            source_id = self._source_ids[result.source] = len(self._source_names)
+            self._source_names.append(result.source)
+
+        self._queries.append(result.query)
+        self._sources.append(source_id)
+        self._timestamps.append(result.timestamp)
+        self._scores.append(result.relevance_score)
+        self._first_token_times.append(_nan_if_none(result.time_to_first_token))
+        self._token_rates.append(_nan_if_none(result.tokens_per_second))
+        return StoredResult(self, len(self._queries) - 1)
+
+    def read_content(self, index: int) -> str:
+        """Read one result's content from the spool file."""
+        offset, length = self._offsets[index], self._lengths[index]
+        if not length:
+            return ""
+        if offset + length > self._mapped_size:
+            self._remap()
+        return self._map[offset:offset + length].decode("utf-8")
+
+    @property
+    def spool_size(self) -> int:
+        """Bytes of content written to the spool file."""
+        return self._spool_size
+
+    def close(self):
+        """Release the memory map and delete the spool file."""
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
+
+    def _remap(self):
+        # Results are usually read after the last append, so this runs about once
+        self._file.flush()
+        if self._map is not None:
+            self._map.close()
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._mapped_size = self._spool_size
+
+    def __len__(self) -> int:
+        return len(self._queries)
+
+    def __getitem__(self, index: int) -> StoredResult:
+        if not -len(self) <= index < len(self):
+            raise IndexError("result index out of range")
+        return StoredResult(self, index % len(self))
+
+    def __iter__(self) -> Iterator[StoredResult]:
+        return (StoredResult(self, index) for index in range(len(self)))
+
+    def __enter__(self) -> "ResultStore":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def _nan_if_none(value: Optional[float]) -> float:
+    return math.nan if value is None else value
+
+def _optional(value: float) -> Optional[float]:
+    return None if math.isnan(value) else value
@@ -0,0 +1,155 @@
+"""
+Retry policy with jittered backoff and per-model circuit breakers for API calls.
+"""
+
+import random
+import time
+from typing import Dict, Optional
+
+import httpx
+
+from .output import notice_console
+from config import config
+
+# Statuses worth another attempt: request timeouts, too-early and transient server errors
+RETRYABLE_STATUSES = {408, 425, 500, 502, 503, 504, 520, 522, 524, 529}
+
+# Failures that happen before or while a response is read. Read timeouts are
+# left out: the request already used its whole (long) timeout.
+RETRYABLE_EXCEPTIONS = (
+    httpx.ConnectError,
+    httpx.ConnectTimeout,
+    httpx.ReadError,
+    httpx.WriteError,
+    httpx.RemoteProtocolError,
+)
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a model whose circuit breaker is open."""
+
+class RetryPolicy:
+    """Decides whether and when a failed API call is retried.
+
+    Delays use exponential backoff with full jitter, so callers that failed
+    together do not retry together. A retry budget caps retries at
+    `budget_ratio` of all requests (plus `min_retries`), so a provider outage
+    cannot multiply our traffic. Chat completions have no side effects, so
+    every request is safe to repeat.
+    """
+
+    def __init__(self, max_attempts: int = 3, base_delay: float = 1.0, max_delay: float = 30.0,
+                 budget_ratio: float = 0.2, min_retries: int = 10):
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.budget_ratio = budget_ratio
+        self.min_retries = min_retries
+        self.requests = 0
+        self.retries = 0
+        self.retries_denied = 0
+
+    def is_retryable_status(self, status_code: int) -> bool:
+        return status_code in RETRYABLE_STATUSES
+
+    def is_retryable_exception(self, error: BaseException) -> bool:
+        return isinstance(error, RETRYABLE_EXCEPTIONS)
+
+    def record_request(self):
+        """Count a first attempt toward the retry budget."""
+        self.requests += 1
+
+    def should_retry(self, attempt: int) -> bool:
+        """Return True if attempt number `attempt` (0-based) may be followed by another."""
+        if attempt + 1 >= self.max_attempts:
+            return False
+        if self.retries >= self.min_retries + self.budget_ratio * self.requests:
+            self.retries_denied += 1
+            return False
+        self.retries += 1
+        return True
+
+    def delay(self, attempt: int) -> float:
+        """Return a jittered backoff delay in seconds before retry number `attempt + 1`."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+class CircuitBreaker:
+    """Fails fast while a model endpoint keeps failing.
+
+    After `failure_threshold` consecutive failures the circuit opens and
+    calls are rejected for `reset_timeout` seconds. Then a single trial call
+    is let through (half-open): success closes the circuit, failure opens it
+    again.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.trial_in_progress = False
+        self.rejected = 0
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def before_call(self):
+        """Raise CircuitOpenError unless a call may go through now."""
+        state = self.state
+        if state == "closed":
+            return
+        if state == "half-open" and not self.trial_in_progress:
+            self.trial_in_progress = True
+            return
+        self.rejected += 1
+        raise CircuitOpenError(f"Circuit open for {self.name} after {self.failures} consecutive failures")
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_progress = False
+
+    def abandon_call(self):
+        """Note that a call ended without an outcome (e.g. it was cancelled)."""
+        self.trial_in_progress = False
+
+    def record_failure(self):
+        self.failures += 1
+        if self.trial_in_progress or (self.opened_at is None and self.failures >= self.failure_threshold):
+            notice_console.print(f"⚡ Circuit opened for {self.name}, failing fast for {self.reset_timeout:.0f}s")
+            self.opened_at = time.monotonic()
+        self.trial_in_progress = False
+
+_retry_policy: Optional[RetryPolicy] = None
+_circuit_breakers: Dict[str, CircuitBreaker] = {}
+
+def get_retry_policy() -> RetryPolicy:
+    """Return the process-wide retry policy, creating it from config on first use."""
+    global _retry_policy
+    if _retry_policy is None:
+        _retry_policy = RetryPolicy(
+            max_attempts=config.retry_max_attempts,
+            base_delay=config.retry_base_delay,
+            max_delay=config.retry_max_delay,
+            budget_ratio=config.retry_budget_ratio,
+        )
+    return _retry_policy
+
+def get_circuit_breaker(model: str) -> CircuitBreaker:
+    """Return the circuit breaker for a model, creating it on first use."""
+    breaker = _circuit_breakers.get(model)
+    if breaker is None:
+        breaker = CircuitBreaker(model, config.breaker_failure_threshold, config.breaker_reset_seconds)
+        _circuit_breakers[model] = breaker
+    return breaker
+
+def reset_retry_state():
+    """Drop the shared policy and breakers so they are rebuilt from the current config."""
+    global _retry_policy
+    _retry_policy = None
+    _circuit_breakers.clear()
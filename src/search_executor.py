@@ -4,48 +4,103 @@ Search executor for handling async Perplexity API calls via OpenRouter.
 
 import asyncio
 import httpx
-import json
 import time
-from typing import List, Dict, Any
-from rich.progress import Progress, TaskID
-from rich.console import Console
+from collections import deque
+from contextvars import ContextVar
+from typing import Deque, List, Dict, Any, AsyncIterator, Awaitable, Callable, Hashable, Optional, Tuple
 
-from .utils import SearchResult, ResearchStats, rate_limit_delay
+from .output import console, notice_console
+from .utils import SearchResult, ResearchStats, SearchProgress, StreamMetrics, percentile
+from .api_client import create_http_client, send_chat_request, stream_chat_request
+from .concurrency import AIMDController, ConcurrencyBudget
+from .rate_limiter import get_rate_limiter
 from config import config
 
-console = Console()
+class _SearchOutcome:
+    """What one search tells the concurrency controller about the API."""
+    
+    def __init__(self):
+        self.sent_at: Optional[float] = None  # Last send of the search's own request
+        self.congested = False  # HTTP 429, a 5xx, a timeout or a transport failure
+
+# Set by the batch runner so execute_search can report congestion without changing its signature
+_search_outcome: ContextVar[Optional[_SearchOutcome]] = ContextVar("search_outcome", default=None)
+
+def _note_congestion():
+    outcome = _search_outcome.get()
+    if outcome is not None:
+        outcome.congested = True
+
+def _is_congestion(error: BaseException) -> bool:
+    """Return True for failures that mean the API is overloaded rather than the request is bad."""
+    if isinstance(error, httpx.HTTPStatusError):
+        return _is_congested_status(error.response.status_code)
+    return isinstance(error, (asyncio.TimeoutError, httpx.TransportError))
+
+def _is_congested_status(status_code: int) -> bool:
+    return status_code == 429 or status_code >= 500
+
+class _SendClock:
+    """Records when a request last left the rate limiter and was sent."""
+    
+    def __init__(self, outcome: Optional[_SearchOutcome] = None):
+        self.sent_at: Optional[float] = None
+        self.sent = asyncio.Event()
+        self.outcome = outcome
+    
+    def mark(self):
+        self.sent_at = time.monotonic()
+        self.sent.set()
+        if self.outcome is not None:
+            self.outcome.sent_at = self.sent_at
 
 class SearchExecutor:
     """Handles asynchronous search execution via OpenRouter API using AI models."""
     
-    def __init__(self):
-        self.client = httpx.AsyncClient(
-            timeout=httpx.Timeout(600.0, connect=15.0),  # 10 minutes total, 15s connect
-            headers={
-                "Authorization": f"Bearer {config.openrouter_api_key}",
-                "Content-Type": "application/json",
-                "HTTP-Referer": "https://utra-deep-research.com",
-                "X-Title": "ULTRA DEEP RESEARCH"
-            },
-            limits=httpx.Limits(max_keepalive_connections=5, max_connections=10)
-        )
-        self.calls_made = 0
+    REQUEST_TIMEOUT = 600.0  # 10 minutes total per search
+    
+    def __init__(self, client: Optional[httpx.AsyncClient] = None,
+                 budget: Optional[ConcurrencyBudget] = None, budget_key: Hashable = None,
+                 stream: Optional[bool] = None, max_chars: Optional[int] = None,
+                 max_seconds: Optional[float] = None,
+                 on_partial: Optional[Callable[[str, str], None]] = None,
+                 hedge: Optional[bool] = None, progress: Optional[SearchProgress] = None):
+        # Use the pipeline's shared client when given one; otherwise own a private client
+        self._owns_client = client is None
+        self.client = client or create_http_client()
+        # Searches from every executor sharing a budget count against one concurrency limit
+        self.budget = budget or ConcurrencyBudget(config.max_concurrent_searches)
+        self.budget_key = budget_key if budget_key is not None else id(self)
+        self.rate_limiter = get_rate_limiter()
+        # One controller per budget adapts the shared limit to how the API is coping
+        self.controller = self.budget.controller
+        if self.controller is None and config.adaptive_concurrency:
+            self.controller = AIMDController(
+                self.budget,
+                min_limit=config.min_concurrent_searches,
+                max_limit=config.max_adaptive_concurrency,
+                rate_limiter=self.rate_limiter
+            )
         self.stats = ResearchStats()
+        # Counters behind the live progress display; batch searches report here instead of printing
+        self.progress = progress or SearchProgress()
+        # Streaming mode reads the answer as SSE chunks and can cut it off early
+        self.stream = config.stream_searches if stream is None else stream
+        self.max_chars = config.stream_max_chars if max_chars is None else max_chars
+        self.max_seconds = config.stream_max_seconds if max_seconds is None else max_seconds
+        self.on_partial = on_partial  # Called with (query, new text) for each streamed chunk
+        # Hedging re-sends a request that outlives the rolling latency percentile
+        self.hedge = config.hedge_requests if hedge is None else hedge
+        self.latencies: Deque[float] = deque(maxlen=200)
+        self.requests_sent = 0
     
     async def execute_search(self, query: str, search_num: int = None, total_searches: int = None) -> SearchResult:
-        """Execute a single search query via Perplexity API."""
+        """Execute a single search query via Perplexity API.
+        
+        Searches numbered as part of a batch (`search_num`) print nothing;
+        their outcome is counted in `self.progress` by the batch runner.
+        """
         try:
-            # Show search start
-            if search_num is not None and total_searches is not None:
-                query_preview = query[:50] + "..." if len(query) > 50 else query
-                console.print(f"[{search_num:2d}/{total_searches}] {query_preview}")
-            
-            # Implement rate limiting
-            self.calls_made = await rate_limit_delay(
-                self.calls_made, 
-                config.api_rate_limit
-            )
-            
             # Prepare the request using the configured search model
             request_data = {
                 "model": config.search_model,
@@ -63,14 +118,16 @@ class SearchExecutor:
                 "temperature": 0.1
             }
             
-            # Make the API call
+            if self.stream:
+                return await self._execute_streaming_search(query, request_data, search_num)
+            
+            # Make the API call through the shared rate limiter
             try:
-                response = await self.client.post(
-                    "https://openrouter.ai/api/v1/chat/completions",
-                    json=request_data
-                )
+                response = await self._send_search_request(request_data)
             except asyncio.TimeoutError:
-                console.print(f"    ❌ Connection timeout")
+                _note_congestion()
+                if search_num is None:
+                    notice_console.print("❌ Search failed: Connection timeout")
                 self.stats.failed_searches += 1
                 return SearchResult(
                     query=query,
@@ -80,7 +137,10 @@ class SearchExecutor:
                     relevance_score=0.0
                 )
             except Exception as e:
-                console.print(f"    ❌ Error: {str(e)[:30]}...")
+                if _is_congestion(e):
+                    _note_congestion()
+                if search_num is None:
+                    notice_console.print(f"❌ Search failed: {str(e)}")
                 self.stats.failed_searches += 1
                 return SearchResult(
                     query=query,
@@ -94,10 +154,6 @@ class SearchExecutor:
                 data = response.json()
                 content = data["choices"][0]["message"]["content"]
                 
-                # Show result with character count
-                if search_num is not None:
-                    console.print(f"    ✅ {len(content)} characters")
-                
                 # Update stats
                 self.stats.completed_searches += 1
                 
@@ -109,10 +165,10 @@ class SearchExecutor:
                     relevance_score=0.5  # Default score, will be adjusted later
                 )
             else:
-                if search_num is not None:
-                    console.print(f"    ❌ Failed: HTTP {response.status_code}")
-                else:
-                    console.print(f"❌ Search failed: HTTP {response.status_code}")
+                if _is_congested_status(response.status_code):
+                    _note_congestion()
+                if search_num is None:
+                    notice_console.print(f"❌ Search failed: HTTP {response.status_code}")
                 
                 self.stats.failed_searches += 1
                 
@@ -125,10 +181,8 @@ class SearchExecutor:
                 )
                 
         except Exception as e:
-            if search_num is not None:
-                console.print(f"    ❌ Failed: {str(e)[:30]}...")
-            else:
-                console.print(f"❌ Search failed: {str(e)}")
+            if search_num is None:
+                notice_console.print(f"❌ Search failed: {str(e)}")
             
             self.stats.failed_searches += 1
             
@@ -140,41 +194,271 @@ class SearchExecutor:
                 relevance_score=0.0
             )
     
+    async def _send_search_request(self, request_data: Dict[str, Any]) -> httpx.Response:
+        """Send a search request, hedging it with a duplicate if it runs unusually long.
+        
+        Latency is measured from when a request leaves the rate limiter, so
+        time spent queued behind local pacing neither enters the latency
+        window nor starts the hedge timer.
+        """
+        async def send(clock: _SendClock) -> Tuple[httpx.Response, Optional[float]]:
+            response = await send_chat_request(
+                self.client, request_data, timeout=self.REQUEST_TIMEOUT, rate_limiter=self.rate_limiter,
+                on_send=clock.mark
+            )
+            return response, clock.sent_at
+        
+        self.requests_sent += 1
+        delay = self._hedge_delay()
+        if delay is None:
+            return self._record_latency(*await send(_SendClock(_search_outcome.get())))
+        
+        primary_clock = _SendClock(_search_outcome.get())
+        primary = asyncio.ensure_future(send(primary_clock))
+        hedge = None
+        try:
+            # Start the hedge timer once the primary has actually been sent
+            sent = asyncio.ensure_future(primary_clock.sent.wait())
+            try:
+                await asyncio.wait({primary, sent}, return_when=asyncio.FIRST_COMPLETED)
+            finally:
+                sent.cancel()
+            if not primary.done():
+                await asyncio.wait({primary}, timeout=delay)
+            if primary.done() or self.stats.hedged_requests + 1 > config.hedge_max_ratio * self.requests_sent:
+                return self._record_latency(*await primary)
+            
+            self.stats.hedged_requests += 1
+            hedge = asyncio.ensure_future(send(_SendClock()))
+            pending = {primary, hedge}
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None and task.result()[0].status_code == 200:
+                        if task is hedge:
+                            self.stats.hedge_wins += 1
+                        else:
+                            self.stats.hedge_losses += 1
+                        return self._record_latency(*task.result())
+            
+            # Both copies failed; report the original's outcome
+            return primary.result()[0]
+        finally:
+            for task in (primary, hedge):
+                if task is not None and not task.done():
+                    task.cancel()
+    
+    def _hedge_delay(self) -> Optional[float]:
+        """Return how long to wait before hedging, or None if hedging is off or still warming up."""
+        if not self.hedge or len(self.latencies) < config.hedge_min_samples:
+            return None
+        return percentile(list(self.latencies), config.hedge_percentile)
+    
+    def _record_latency(self, response: httpx.Response, sent_at: Optional[float]) -> httpx.Response:
+        """Add a successful live request's latency, from its last send, to the rolling window."""
+        if response.status_code == 200 and sent_at is not None and not response.extensions.get("from_cache"):
+            self.latencies.append(time.monotonic() - sent_at)
+        return response
+    
+    async def _execute_streaming_search(self, query: str, request_data: Dict[str, Any],
+                                        search_num: int = None) -> SearchResult:
+        """Stream a search answer, stopping early once the character or time cap is hit.
+        
+        The time cap counts from when the request is sent, not from when
+        it joined the rate limiter queue. Streamed searches are not hedged:
+        the caps already bound how long a slow answer can take, and a
+        duplicate stream would pay for every token twice.
+        """
+        metrics = StreamMetrics()
+        outcome = _search_outcome.get()
+        clock = _SendClock()
+        parts: List[str] = []
+        truncated = False
+        stream = stream_chat_request(
+            self.client, request_data, timeout=self.REQUEST_TIMEOUT,
+            rate_limiter=self.rate_limiter, metrics=metrics, on_send=clock.mark
+        )
+        
+        async def consume():
+            nonlocal truncated
+            characters = 0
+            async for delta in stream:
+                parts.append(delta)
+                characters += len(delta)
+                if self.on_partial is not None:
+                    self.on_partial(query, delta)
+                if self.max_chars and characters >= self.max_chars:
+                    truncated = True
+                    break
+        
+        try:
+            try:
+                if self.max_seconds:
+                    truncated = await self._run_with_cutoff(consume(), clock) or truncated
+                else:
+                    await consume()
+            finally:
+                await stream.aclose()
+                if outcome is not None and metrics.started_at is not None:
+                    outcome.sent_at = metrics.started_at
+        except Exception as e:
+            if _is_congestion(e):
+                _note_congestion()
+            if search_num is None:
+                notice_console.print(f"❌ Search failed: {str(e)}")
+            self.stats.failed_searches += 1
+            return SearchResult(
+                query=query,
+                content=f"Search failed: {str(e)}",
+                source="Error",
+                timestamp=time.time(),
+                relevance_score=0.0
+            )
+        
+        content = "".join(parts)
+        if self.max_chars:
+            content = content[:self.max_chars]
+        if not content:
+            self.stats.failed_searches += 1
+            return SearchResult(
+                query=query,
+                content="Search failed: Empty or timed out stream",
+                source="Error",
+                timestamp=time.time(),
+                relevance_score=0.0
+            )
+        
+        ttft = metrics.time_to_first_token
+        token_rate = metrics.tokens_per_second
+        if not metrics.from_cache:
+            if ttft is not None:
+                self.stats.first_token_times.append(ttft)
+            if token_rate is not None:
+                self.stats.token_rates.append(token_rate)
+        if truncated:
+            self.stats.truncated_streams += 1
+        
+        self.stats.completed_searches += 1
+        return SearchResult(
+            query=query,
+            content=content,
+            source=f"{config.search_model} via OpenRouter",
+            timestamp=time.time(),
+            relevance_score=0.5,
+            time_to_first_token=ttft,
+            tokens_per_second=token_rate
+        )
+    
+    async def _run_with_cutoff(self, consume: Awaitable[None], clock: _SendClock) -> bool:
+        """Run `consume` until it finishes or `max_seconds` pass after the last send.
+        
+        Returns True if the cap cut it off.
+        """
+        task = asyncio.ensure_future(consume)
+        try:
+            sent = asyncio.ensure_future(clock.sent.wait())
+            try:
+                await asyncio.wait({task, sent}, return_when=asyncio.FIRST_COMPLETED)
+            finally:
+                sent.cancel()
+            # A retry sends again and restarts the clock
+            while not task.done():
+                remaining = clock.sent_at + self.max_seconds - time.monotonic()
+                if remaining <= 0:
+                    task.cancel()
+                    await asyncio.wait({task})
+                    return True
+                await asyncio.wait({task}, timeout=remaining)
+            task.result()
+            return False
+        finally:
+            if not task.done():
+                task.cancel()
+    
     async def execute_batch_searches(self, queries: List[str]) -> List[SearchResult]:
-        """Execute multiple searches concurrently with rate limiting."""
-        console.print(f"Starting {len(queries)} searches with {config.max_concurrent_searches} concurrent workers...")
+        """Execute multiple searches concurrently; pacing is handled by the shared rate limiter."""
+        results: List[SearchResult] = [None] * len(queries)
+        async for index, result in self._iter_searches(queries):
+            results[index] = result
+        
+        console.print("All searches completed.")
+        return [result for result in results if result is not None]
+    
+    async def stream_searches(self, queries: List[str],
+                              progress: Optional[SearchProgress] = None) -> AsyncIterator[SearchResult]:
+        """Execute searches concurrently and yield each result as soon as it completes.
+        
+        Counters go to `progress` if given, otherwise to `self.progress`.
+        """
+        async for _, result in self._iter_searches(queries, progress):
+            yield result
+    
+    async def _iter_searches(self, queries: List[str],
+                             progress: Optional[SearchProgress] = None) -> AsyncIterator[Tuple[int, SearchResult]]:
+        """Run bounded searches and yield (query index, result) pairs in completion order."""
+        console.print(f"Starting {len(queries)} searches with {self.budget.limit} concurrent workers...")
         self.stats.total_queries = len(queries)
         self.stats.start_timing()
-        
-        # Create semaphore to limit concurrent searches
-        semaphore = asyncio.Semaphore(config.max_concurrent_searches)
+        self.stats.concurrency_limits = [self.budget.limit]
+        progress = progress or self.progress
+        progress.total += len(queries)
         
         async def bounded_search(query: str, index: int):
-            async with semaphore:
-                return await self.execute_search(query, index + 1, len(queries))
-        
-        # Execute all searches concurrently
-        console.print("Creating search tasks...")
-        tasks = [bounded_search(query, i) for i, query in enumerate(queries)]
-        console.print("Executing all searches...")
-        results = await asyncio.gather(*tasks, return_exceptions=True)
-        console.print("All searches completed.")
+            async with self.budget.slot(self.budget_key):
+                started_at = time.monotonic()
+                outcome = _SearchOutcome()
+                _search_outcome.set(outcome)
+                progress.in_flight += 1
+                try:
+                    result = await self.execute_search(query, index + 1, len(queries))
+                finally:
+                    progress.in_flight -= 1
+                if result.source == "Error":
+                    progress.failed += 1
+                    progress.last_error = result.content
+                else:
+                    progress.completed += 1
+                if self.controller is not None:
+                    self._record_outcome(result, outcome, started_at)
+                    if self.budget.limit != self.stats.concurrency_limits[-1]:
+                        self.stats.concurrency_limits.append(self.budget.limit)
+                return index, result
         
-        # Filter out exceptions and convert to proper results
-        valid_results = []
-        for result in results:
-            if isinstance(result, SearchResult):
-                valid_results.append(result)
-            elif isinstance(result, Exception):
-                console.print(f"❌ Search exception: {str(result)}")
-                self.stats.failed_searches += 1
+        tasks = [asyncio.ensure_future(bounded_search(query, i)) for i, query in enumerate(queries)]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                try:
+                    index, result = await next_done
+                except Exception as e:
+                    progress.failed += 1
+                    progress.last_error = f"Search exception: {str(e)}"
+                    self.stats.failed_searches += 1
+                    continue
+                yield index, result
+        finally:
+            # Don't leave searches running if the consumer stops early
+            for task in tasks:
+                task.cancel()
+            self.stats.end_timing()
+    
+    def _record_outcome(self, result: SearchResult, outcome: _SearchOutcome, started_at: float):
+        """Feed one search to the concurrency controller.
         
-        self.stats.end_timing()
-        return valid_results
+        Latency runs from the request's last send, so rate limiter pacing
+        does not look like a slow API. Failures only count when they signal
+        congestion; a 4xx, a malformed body or an empty stream says nothing
+        about load and is left out.
+        """
+        latency = time.monotonic() - (outcome.sent_at or started_at)
+        if result.source != "Error":
+            self.controller.record(latency, True, started_at)
+        elif outcome.congested:
+            self.controller.record(latency, False, started_at)
     
     async def close(self):
-        """Close the HTTP client."""
-        await self.client.aclose()
+        """Close the HTTP client if this executor owns it."""
+        if self._owns_client:
+            await self.client.aclose()
     
     def get_stats(self) -> ResearchStats:
         """Get current research statistics."""
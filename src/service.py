@@ -0,0 +1,271 @@
+"""
+Long-running research service: a small JSON API over HTTP (TCP or Unix socket) in front of a job queue.
+"""
+
+import asyncio
+import json
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+from .output import notice_console
+from .api_client import create_http_client
+from .concurrency import ConcurrencyBudget
+
+# Finished jobs kept for status and result lookups; the oldest are dropped first
+MAX_FINISHED_JOBS = 1000
+MAX_REQUEST_BYTES = 1 << 20
+
+@dataclass
+class ResearchJob:
+    """One research topic submitted to the service."""
+    id: str
+    topic: str
+    status: str = "queued"  # queued, running, completed, failed, cancelled
+    submitted_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    summary: Dict[str, Any] = field(default_factory=dict)
+    error: str = ""
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("completed", "failed", "cancelled")
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "topic": self.topic,
+            "status": self.status,
+            "submitted_at": self.submitted_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "summary": self.summary,
+            "error": self.error,
+        }
+
+class ResearchService:
+    """Runs submitted research jobs on a pool of pipeline workers.
+
+    Every worker shares one HTTP client (and so its warm connection pool)
+    and one search concurrency budget, which concurrent jobs split fairly.
+    The rate limiter, response cache, retry state and PDF render pool are
+    already shared by everything in the process.
+
+    `pipeline` is called as ``pipeline(topic, client=..., search_budget=...)``
+    and returns the run summary of ``run_research_pipeline``.
+    """
+
+    def __init__(self, pipeline: Callable[..., Awaitable[Dict[str, Any]]], workers: int = 4,
+                 concurrency: int = 10, transport: Optional[httpx.AsyncBaseTransport] = None):
+        self.pipeline = pipeline
+        self.workers = max(1, workers)
+        self.budget = ConcurrencyBudget(concurrency)
+        self.transport = transport
+        self.client: Optional[httpx.AsyncClient] = None
+        self.jobs: "OrderedDict[str, ResearchJob]" = OrderedDict()
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self._worker_tasks: List[asyncio.Task] = []
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self):
+        """Create the shared client and start the workers."""
+        self.client = create_http_client(self.transport, concurrency=self.budget.limit)
+        self._worker_tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def close(self):
+        """Stop serving, cancel the workers and close the shared client."""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        for task in self._worker_tasks:
+            task.cancel()
+        await asyncio.gather(*self._worker_tasks, return_exceptions=True)
+        self._worker_tasks = []
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
+
+    def submit(self, topic: str) -> ResearchJob:
+        """Queue a research job and return it."""
+        job = ResearchJob(id=uuid.uuid4().hex[:12], topic=topic)
+        self.jobs[job.id] = job
+        self.queue.put_nowait(job)
+        self._prune_finished()
+        return job
+
+    def cancel(self, job_id: str) -> bool:
+        """Cancel a job that has not started yet. Returns False if it already started."""
+        job = self.jobs[job_id]
+        if job.status != "queued":
+            return False
+        job.status = "cancelled"
+        job.finished_at = time.time()
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        counts: Dict[str, int] = {}
+        for job in self.jobs.values():
+            counts[job.status] = counts.get(job.status, 0) + 1
+        return {"status": "ok", "workers": self.workers, "jobs": counts}
+
+    async def _worker(self):
+        while True:
+            job = await self.queue.get()
+            try:
+                if job.status == "queued":
+                    await self._run_job(job)
+            finally:
+                self.queue.task_done()
+
+    async def _run_job(self, job: ResearchJob):
+        job.status = "running"
+        job.started_at = time.time()
+        try:
+            job.summary = await self.pipeline(job.topic, client=self.client, search_budget=self.budget)
+            job.status = "completed" if job.summary.get("status") == "completed" else "failed"
+        except Exception as e:
+            notice_console.print(f"❌ Job {job.id} ({job.topic}) failed: {str(e)}")
+            job.status = "failed"
+            job.error = str(e)
+        finally:
+            job.finished_at = time.time()
+
+    def _prune_finished(self):
+        finished = [job_id for job_id, job in self.jobs.items() if job.finished]
+        for job_id in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            del self.jobs[job_id]
+
+    # HTTP API
+
+    async def serve(self, host: str = "127.0.0.1", port: int = 8765, socket_path: Optional[str] = None):
+        """Start listening on a TCP port or, if `socket_path` is given, a Unix socket."""
+        if socket_path:
+            self._server = await asyncio.start_unix_server(self._handle_connection, path=socket_path)
+        else:
+            self._server = await asyncio.start_server(self._handle_connection, host, port)
+        return self._server
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            try:
+                method, path, body = await _read_request(reader)
+                status, payload = await self.handle_request(method, path, body)
+            except ValueError as e:
+                status, payload = 400, {"error": str(e)}
+            writer.write(_format_response(status, payload))
+            await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass  # Client went away
+        finally:
+            writer.close()
+
+    async def handle_request(self, method: str, path: str, body: bytes) -> Tuple[int, Any]:
+        """Route one API request and return (HTTP status, JSON payload or report text).
+
+        POST /jobs            {"topic": "..."} or {"topics": [...]}: queue jobs
+        GET  /jobs            list jobs
+        GET  /jobs/ID         job status and run summary
+        GET  /jobs/ID/report  markdown report of a completed job
+        DELETE /jobs/ID       cancel a queued job
+        GET  /health          worker count and jobs per status
+        """
+        parts = [part for part in path.split("?", 1)[0].split("/") if part]
+
+        if parts == ["health"] and method == "GET":
+            return 200, self.stats()
+
+        if parts == ["jobs"]:
+            if method == "GET":
+                return 200, {"jobs": [job.to_dict() for job in self.jobs.values()]}
+            if method == "POST":
+                topics = _parse_topics(body)
+                jobs = [self.submit(topic) for topic in topics]
+                return 202, {"jobs": [job.to_dict() for job in jobs]}
+            return 405, {"error": "Method not allowed"}
+
+        if len(parts) in (2, 3) and parts[0] == "jobs":
+            job = self.jobs.get(parts[1])
+            if job is None:
+                return 404, {"error": f"No job with ID {parts[1]}"}
+            if len(parts) == 3:
+                if parts[2] != "report" or method != "GET":
+                    return 404, {"error": "Not found"}
+                report_file = job.summary.get("report_file")
+                if job.status != "completed" or not report_file:
+                    return 409, {"error": f"Job is {job.status}; no report yet"}
+                try:
+                    return 200, await asyncio.to_thread(_read_text_file, report_file)
+                except OSError:
+                    return 404, {"error": f"Report file not found: {report_file}"}
+            if method == "GET":
+                return 200, job.to_dict()
+            if method == "DELETE":
+                if not self.cancel(job.id):
+                    return 409, {"error": f"Job is {job.status} and cannot be cancelled"}
+                return 200, job.to_dict()
+            return 405, {"error": "Method not allowed"}
+
+        return 404, {"error": "Not found"}
+
+def _read_text_file(path: str) -> str:
+    with open(path, 'r', encoding='utf-8') as f:
+        return f.read()
+
+def _parse_topics(body: bytes) -> List[str]:
+    try:
+        data = json.loads(body or b"{}")
+    except ValueError:
+        raise ValueError("Request body must be JSON")
+    if not isinstance(data, dict):
+        raise ValueError("Request body must be a JSON object")
+    topics = data.get("topics") or ([data["topic"]] if data.get("topic") else [])
+    if not isinstance(topics, list) or not all(isinstance(topic, str) for topic in topics):
+        raise ValueError("'topics' must be a list of strings")
+    topics = [" ".join(topic.split()) for topic in topics]
+    topics = [topic for topic in topics if topic]
+    if not topics:
+        raise ValueError("Give a 'topic' or a list of 'topics'")
+    return topics
+
+async def _read_request(reader: asyncio.StreamReader) -> Tuple[str, str, bytes]:
+    """Read one HTTP/1.1 request and return (method, path, body)."""
+    request_line = (await reader.readline()).decode("latin-1").strip()
+    try:
+        method, path, _ = request_line.split(" ", 2)
+    except ValueError:
+        raise ValueError("Malformed request line")
+
+    content_length = 0
+    while True:
+        line = (await reader.readline()).decode("latin-1").strip()
+        if not line:
+            break
+        name, _, value = line.partition(":")
+        if name.strip().lower() == "content-length":
+            content_length = int(value.strip())
+    if content_length > MAX_REQUEST_BYTES:
+        raise ValueError("Request body too large")
+    body = await reader.readexactly(content_length) if content_length else b""
+    return method.upper(), path, body
+
+_REASONS = {200: "OK", 202: "Accepted", 400: "Bad Request", 404: "Not Found",
+            405: "Method Not Allowed", 409: "Conflict"}
+
+def _format_response(status: int, payload: Any) -> bytes:
+    if isinstance(payload, str):
+        body, content_type = payload.encode("utf-8"), "text/markdown; charset=utf-8"
+    else:
+        body, content_type = json.dumps(payload).encode("utf-8"), "application/json"
+    head = (
+        f"HTTP/1.1 {status} {_REASONS.get(status, '')}\r\n"
+        f"Content-Type: {content_type}\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        "Connection: close\r\n\r\n"
+    )
+    return head.encode("latin-1") + body
@@ -0,0 +1,193 @@
+"""
+Lightweight tracing of pipeline stages and API calls, exportable as JSON lines or Chrome trace events.
+"""
+
+import contextvars
+import json
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+@dataclass
+class Span:
+    """One timed operation. Times are ``time.monotonic()`` seconds."""
+    name: str
+    category: str  # "stage" or "api"
+    start: float
+    end: float
+    attributes: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def duration(self) -> float:
+        return self.end - self.start
+
+class RequestTiming:
+    """Collects connection and server timings of one HTTP request.
+
+    Pass it as httpx's ``trace`` request extension; httpcore then reports
+    when the connection was opened and when the request was sent and the
+    response headers arrived. Transports that do not report these events
+    (e.g. ``httpx.MockTransport``) leave the timings unset.
+    """
+
+    def __init__(self):
+        self.events: Dict[str, float] = {}
+        self.sent_at: Optional[float] = None
+        self.sends = 0
+
+    def wrap(self, send: Callable[[Dict[str, Any]], Awaitable[Any]]) -> Callable[[], Awaitable[Any]]:
+        """Return a call of `send` that records when it ran and passes this object as the trace extension."""
+        async def traced_send():
+            self.reset()
+            self.sent_at = time.monotonic()
+            self.sends += 1
+            return await send({"trace": self})
+        return traced_send
+
+    async def __call__(self, event_name: str, info: Dict[str, Any]):
+        # Strip the protocol prefix: "http11.send_request_body.complete" -> "send_request_body.complete"
+        self.events[event_name.split(".", 1)[-1]] = time.monotonic()
+
+    def reset(self):
+        self.events.clear()
+
+    @property
+    def connect_time(self) -> Optional[float]:
+        """Seconds spent opening a new connection, or None if one was reused."""
+        started = self.events.get("connect_tcp.started")
+        finished = self.events.get("start_tls.complete") or self.events.get("connect_tcp.complete")
+        if started is None or finished is None:
+            return None
+        return finished - started
+
+    @property
+    def server_time(self) -> Optional[float]:
+        """Seconds between sending the request and receiving the response headers."""
+        sent = self.events.get("send_request_body.complete")
+        received = self.events.get("receive_response_headers.complete")
+        if sent is None or received is None:
+            return None
+        return received - sent
+
+class Tracer:
+    """Records spans for one or more pipeline runs."""
+
+    def __init__(self):
+        self.spans: List[Span] = []
+        self.origin = time.monotonic()
+        self.wall_origin = time.time()
+
+    def record(self, name: str, category: str, start: float, end: float, **attributes) -> Span:
+        span = Span(name, category, start, end, {**_context.get(), **attributes})
+        self.spans.append(span)
+        return span
+
+    def spans_by(self, category: str) -> List[Span]:
+        return [span for span in self.spans if span.category == category]
+
+    def latencies_by_model(self) -> Dict[str, List[float]]:
+        """Return the durations of successful API calls grouped by model."""
+        latencies: Dict[str, List[float]] = {}
+        for span in self.spans_by("api"):
+            if span.attributes.get("status") == 200:
+                latencies.setdefault(span.attributes.get("model", ""), []).append(span.duration)
+        return latencies
+
+    def export(self, path: str):
+        """Write the spans to `path`: a Chrome trace if it ends in .json, otherwise JSON lines."""
+        if path.endswith(".json"):
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump({"traceEvents": self._trace_events(), "displayTimeUnit": "ms"}, f, default=str)
+            return
+
+        with open(path, 'w', encoding='utf-8') as f:
+            for span in sorted(self.spans, key=lambda span: span.start):
+                record = {
+                    "name": span.name,
+                    "category": span.category,
+                    "start": round(span.start - self.origin, 6),
+                    "duration": round(span.duration, 6),
+                    "timestamp": round(self.wall_origin + span.start - self.origin, 6),
+                    **span.attributes,
+                }
+                f.write(json.dumps(record, default=str) + "\n")
+
+    def _trace_events(self) -> List[Dict[str, Any]]:
+        """Convert spans to Chrome trace-event "complete" events (chrome://tracing, Perfetto).
+
+        Overlapping spans are spread over separate rows ("threads"): stages
+        get one row per topic and API calls are packed into as few rows as
+        possible.
+        """
+        events = []
+        rows: Dict[str, int] = {}
+        api_row_ends: List[float] = []
+        for span in sorted(self.spans, key=lambda span: span.start):
+            if span.category == "api":
+                for row, row_end in enumerate(api_row_ends):
+                    if row_end <= span.start:
+                        break
+                else:
+                    row = len(api_row_ends)
+                    api_row_ends.append(0.0)
+                api_row_ends[row] = span.end
+                tid = 1000 + row
+            else:
+                tid = rows.setdefault(span.attributes.get("topic", ""), len(rows))
+            events.append({
+                "name": span.name,
+                "cat": span.category,
+                "ph": "X",
+                "ts": round((span.start - self.origin) * 1e6),
+                "dur": round(span.duration * 1e6),
+                "pid": 1,
+                "tid": tid,
+                "args": span.attributes,
+            })
+        return events
+
+class StageSpans:
+    """Times consecutive pipeline stages: starting a stage ends the previous one.
+
+    API calls made while a stage is running are tagged with the topic and
+    stage name. Call `finish()` (e.g. in a ``finally`` block) to end the
+    last stage. Does nothing while tracing is disabled.
+    """
+
+    def __init__(self, topic: str):
+        self.topic = topic
+        self.current: Optional[str] = None
+        self.started_at = 0.0
+
+    def start(self, stage: str):
+        self.finish()
+        if _tracer is None:
+            return
+        self.current = stage
+        self.started_at = time.monotonic()
+        _context.set({"topic": self.topic, "stage": stage})
+
+    def finish(self):
+        if self.current is not None and _tracer is not None:
+            _tracer.record(self.current, "stage", self.started_at, time.monotonic())
+        self.current = None
+
+# Topic and stage of the code running in the current task, copied into child tasks
+_context: contextvars.ContextVar = contextvars.ContextVar("trace_context", default={})
+_tracer: Optional[Tracer] = None
+
+def get_tracer() -> Optional[Tracer]:
+    """Return the active tracer, or None while tracing is disabled."""
+    return _tracer
+
+def start_tracing() -> Tracer:
+    """Start recording spans for every stage and API call in this process."""
+    global _tracer
+    _tracer = Tracer()
+    return _tracer
+
+def stop_tracing() -> Optional[Tracer]:
+    """Stop recording and return the tracer with the spans recorded so far."""
+    global _tracer
+    tracer, _tracer = _tracer, None
+    return tracer
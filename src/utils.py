@@ -2,12 +2,12 @@
 Utility functions for ULTRA DEEP RESEARCH.
 """
 
-import asyncio
+import math
 import time
-from typing import Dict, Any, List
-from dataclasses import dataclass
+from typing import Dict, Any, List, Optional
+from dataclasses import dataclass, field
 
-@dataclass
+@dataclass(slots=True)
 class SearchResult:
     """Data class for search results."""
     query: str
@@ -15,6 +15,8 @@ class SearchResult:
     source: str
     timestamp: float
     relevance_score: float = 0.0
+    time_to_first_token: Optional[float] = None  # Seconds, streamed searches only
+    tokens_per_second: Optional[float] = None  # Generation speed, streamed searches only
 
 @dataclass
 class ResearchStats:
@@ -25,6 +27,16 @@ class ResearchStats:
     high_quality_results: int = 0
     processing_time: float = 0.0
     start_time: float = 0.0
+    cache_hits: int = 0
+    cache_misses: int = 0
+    queries_merged: int = 0  # Near-duplicate queries dropped before dispatch
+    first_token_times: List[float] = field(default_factory=list)
+    token_rates: List[float] = field(default_factory=list)
+    truncated_streams: int = 0
+    hedged_requests: int = 0
+    hedge_wins: int = 0  # The duplicate answered first
+    hedge_losses: int = 0  # The original answered first anyway
+    concurrency_limits: List[int] = field(default_factory=list)  # Starting limit, then each adjustment
     
     def start_timing(self):
         """Start timing the research process."""
@@ -47,34 +59,131 @@ class ResearchStats:
             return 0.0
         return (self.completed_searches / total_attempts) * 100
 
-async def rate_limit_delay(calls_made: int, rate_limit: int, delay_window: float = 60.0):
-    """Implement rate limiting for API calls."""
-    if calls_made >= rate_limit:
-        sleep_time = delay_window - (time.time() % delay_window)
-        await asyncio.sleep(sleep_time)
-        return 0
-    return calls_made + 1
+@dataclass(slots=True)
+class SearchProgress:
+    """Live search counters, read by the progress display on its own schedule.
+    
+    Searches only increment these fields, so updating progress costs no
+    rendering on the event loop however many searches run.
+    """
+    total: int = 0
+    in_flight: int = 0
+    completed: int = 0
+    failed: int = 0
+    last_error: str = ""
+    started_at: float = field(default_factory=time.monotonic)
+    
+    @classmethod
+    def combine(cls, progresses: List["SearchProgress"]) -> "SearchProgress":
+        """Sum several pipelines' counters into one, timed from the earliest start."""
+        combined = cls()
+        for progress in progresses:
+            combined.total += progress.total
+            combined.in_flight += progress.in_flight
+            combined.completed += progress.completed
+            combined.failed += progress.failed
+            combined.last_error = progress.last_error or combined.last_error
+            combined.started_at = min(combined.started_at, progress.started_at)
+        return combined
+    
+    def reset(self):
+        """Zero the counters and restart the throughput clock."""
+        self.total = self.in_flight = self.completed = self.failed = 0
+        self.last_error = ""
+        self.started_at = time.monotonic()
+    
+    @property
+    def finished(self) -> int:
+        return self.completed + self.failed
+    
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started_at
+    
+    @property
+    def throughput(self) -> float:
+        """Finished searches per second since the counters were reset."""
+        elapsed = self.elapsed
+        return self.finished / elapsed if elapsed > 0 else 0.0
+    
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "total": self.total,
+            "in_flight": self.in_flight,
+            "completed": self.completed,
+            "failed": self.failed,
+            "throughput": round(self.throughput, 2),
+            "elapsed": round(self.elapsed, 2),
+        }
 
-def deduplicate_results(results: List[SearchResult]) -> List[SearchResult]:
-    """Remove duplicate results based on content similarity."""
-    seen_content = set()
-    unique_results = []
+@dataclass
+class StreamMetrics:
+    """Timing of a single streamed completion, measured from when the request is sent."""
+    started_at: float = 0.0
+    first_token_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    characters: int = 0
+    completion_tokens: Optional[int] = None  # As reported by the API, if it sends usage
+    complete: bool = False  # The server ended the stream itself
+    from_cache: bool = False
     
-    for result in results:
+    @property
+    def time_to_first_token(self) -> Optional[float]:
+        """Seconds from sending the request to the first content token."""
+        if self.first_token_at is None:
+            return None
+        return self.first_token_at - self.started_at
+    
+    @property
+    def tokens_per_second(self) -> Optional[float]:
+        """Generation speed after the first token (estimated at 4 characters per token without usage)."""
+        if self.first_token_at is None or self.finished_at is None:
+            return None
+        elapsed = self.finished_at - self.first_token_at
+        if elapsed <= 0:
+            return None
+        tokens = self.completion_tokens if self.completion_tokens else self.characters / 4
+        return tokens / elapsed
+
+def percentile(values: List[float], pct: float) -> float:
+    """Return the `pct` percentile (0-100) of `values` using the nearest-rank method."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct * len(ordered) / 100))
+    return ordered[min(rank, len(ordered)) - 1]
+
+class ContentDeduplicator:
+    """Incremental duplicate detector based on a hash of the content prefix."""
+    
+    def __init__(self):
+        self.seen_content = set()
+    
+    def is_duplicate(self, result: SearchResult) -> bool:
+        """Return True if an equivalent result was already seen, otherwise remember this one."""
         # Simple deduplication based on content hash
         content_hash = hash(result.content[:200])  # First 200 chars
-        if content_hash not in seen_content:
-            seen_content.add(content_hash)
-            unique_results.append(result)
-    
-    return unique_results
+        if content_hash in self.seen_content:
+            return True
+        self.seen_content.add(content_hash)
+        return False
+
+def deduplicate_results(results: List[SearchResult]) -> List[SearchResult]:
+    """Remove duplicate results based on content similarity."""
+    deduplicator = ContentDeduplicator()
+    return [result for result in results if not deduplicator.is_duplicate(result)]
+
+def score_result(result: SearchResult) -> SearchResult:
+    """Apply the content-length bonus used for ranking to a single result."""
+    # Boost score for longer, more detailed content
+    length_bonus = min(len(result.content) / 1000, 1.0)  # Max 1.0 bonus
+    result.relevance_score += length_bonus
+    return result
 
 def rank_results(results: List[SearchResult]) -> List[SearchResult]:
     """Rank results by relevance and quality."""
     # Simple ranking based on content length and relevance score
     for result in results:
-        # Boost score for longer, more detailed content
-        length_bonus = min(len(result.content) / 1000, 1.0)  # Max 1.0 bonus
-        result.relevance_score += length_bonus
+        score_result(result)
     
     return sorted(results, key=lambda x: x.relevance_score, reverse=True)
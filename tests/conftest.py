@@ -0,0 +1,35 @@
+"""
+Shared fixtures for ULTRA DEEP RESEARCH tests.
+"""
+
+import pytest
+
+from src.rate_limiter import reset_rate_limiter
+from src.retry import reset_retry_state
+from config import config
+
+@pytest.fixture(autouse=True)
+def disable_response_cache(monkeypatch):
+    """Keep tests from reading or writing the on-disk response cache."""
+    monkeypatch.setattr(config, "cache_enabled", False)
+
+@pytest.fixture(autouse=True)
+def isolate_runs_dir(monkeypatch, tmp_path):
+    """Write run checkpoints to a temporary directory."""
+    monkeypatch.setattr(config, "runs_dir", str(tmp_path / "runs"))
+
+@pytest.fixture(autouse=True)
+def unlimited_rate_limiter(monkeypatch):
+    """Give each test a fresh, unthrottled shared rate limiter."""
+    monkeypatch.setattr(config, "api_rate_limit", 0)
+    reset_rate_limiter()
+    yield
+    reset_rate_limiter()
+
+@pytest.fixture(autouse=True)
+def fast_retries(monkeypatch):
+    """Retry without backoff delays and start every test with closed circuit breakers."""
+    monkeypatch.setattr(config, "retry_base_delay", 0.0)
+    reset_retry_state()
+    yield
+    reset_retry_state()
@@ -0,0 +1,88 @@
+"""
+Tests for the mock OpenRouter and the benchmark harness.
+"""
+
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from benchmarks.mock_openrouter import MockOpenRouter, MockSettings
+from benchmarks.run_benchmarks import parse_scenario, run_pipeline_benchmark
+from config import config
+
+def chat_request(system_prompt: str, user_prompt: str = "hello") -> dict:
+    return {
+        "model": "test-model",
+        "messages": [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt},
+        ],
+    }
+
+class TestMockOpenRouter:
+    """Test cases for the mock chat completions endpoint."""
+
+    def setup_method(self):
+        self.mock = MockOpenRouter(MockSettings(latency_median=0.001, latency_sigma=0.1, response_chars=500))
+        self.client = httpx.AsyncClient(transport=self.mock.transport())
+
+    def teardown_method(self):
+        asyncio.run(self.client.aclose())
+
+    @pytest.mark.asyncio
+    async def test_query_generation_returns_requested_count(self):
+        request = chat_request("You are an expert research query generator.\nGenerate exactly 25 diverse search queries")
+        response = await self.client.post("https://openrouter.test/chat", json=request)
+        queries = response.json()["choices"][0]["message"]["content"].split("\n")
+        assert len(queries) == 25
+        assert len(set(queries)) == 25
+
+    @pytest.mark.asyncio
+    async def test_search_answer_size(self):
+        response = await self.client.post("https://openrouter.test/chat", json=chat_request("You are a research assistant."))
+        data = response.json()
+        assert len(data["choices"][0]["message"]["content"]) >= 500
+        assert data["usage"]["total_tokens"] > 0
+        assert self.mock.stats.requests == 1
+
+    @pytest.mark.asyncio
+    async def test_error_and_rate_limit_rates(self):
+        mock = MockOpenRouter(MockSettings(latency_median=0.001, error_rate=0.3, rate_limit_rate=0.3, seed=1))
+        async with httpx.AsyncClient(transport=mock.transport()) as client:
+            statuses = []
+            for _ in range(200):
+                response = await client.post("https://openrouter.test/chat", json=chat_request("x"))
+                statuses.append(response.status_code)
+        assert statuses.count(429) == mock.stats.rate_limited
+        assert statuses.count(500) == mock.stats.errors
+        assert 30 < mock.stats.rate_limited < 90
+        assert 30 < mock.stats.errors < 90
+
+class TestBenchmarkHarness:
+    """Test cases for running the pipeline against the mock."""
+
+    def test_parse_scenario(self):
+        assert parse_scenario("100") == 100
+        assert parse_scenario("1k") == 1000
+        assert parse_scenario(" 10K ") == 10000
+
+    @pytest.mark.asyncio
+    async def test_small_pipeline_run(self, monkeypatch, tmp_path):
+        # The harness reconfigures the process; let monkeypatch restore everything it touches
+        for name in ("num_queries", "query_shards", "query_dedup", "pdf_mode", "max_concurrent_searches",
+                     "reports_dir"):
+            monkeypatch.setattr(config, name, getattr(config, name))
+        monkeypatch.setattr("tempfile.mkdtemp", lambda prefix="": str(tmp_path))
+
+        settings = MockSettings(latency_median=0.001, latency_sigma=0.1, response_chars=300)
+        metrics = await run_pipeline_benchmark(10, settings, concurrency=5)
+
+        assert metrics["status"] == "completed"
+        assert metrics["queries"] == 10
+        # Initial search, query generation, 10 searches, report and filename
+        assert metrics["requests"] >= 14
+        assert metrics["requests_per_second"] > 0
+        assert metrics["peak_rss_mb"] > 0
+        json.dumps(metrics)
@@ -0,0 +1,124 @@
+"""
+Tests for the checkpoint module.
+"""
+
+import os
+import pytest
+
+from src.checkpoint import RunCheckpoint
+from src.utils import SearchResult
+
+def make_result(query: str, source: str = "perplexity/sonar via OpenRouter") -> SearchResult:
+    return SearchResult(query=query, content=f"Findings for {query}", source=source, timestamp=1.0)
+
+class TestRunCheckpoint:
+    """Test cases for RunCheckpoint."""
+    
+    def test_create_and_load(self, tmp_path):
+        """Test that a new run can be reopened by its run ID."""
+        checkpoint = RunCheckpoint.create("Space Exploration!", str(tmp_path))
+        
+        assert checkpoint.run_id.endswith("space_exploration")
+        loaded = RunCheckpoint.load(checkpoint.run_id, str(tmp_path))
+        assert loaded.topic == "Space Exploration!"
+    
+    def test_create_same_topic_twice(self, tmp_path):
+        """Test that runs started together get separate directories."""
+        first = RunCheckpoint.create("topic", str(tmp_path))
+        second = RunCheckpoint.create("topic", str(tmp_path))
+        
+        assert first.run_id != second.run_id
+    
+    def test_old_runs_are_pruned(self, tmp_path):
+        """Test that pruning deletes only runs past the retention period."""
+        old = RunCheckpoint.create("old topic", str(tmp_path))
+        recent = RunCheckpoint.create("recent topic", str(tmp_path))
+        (tmp_path / "notes").mkdir()
+        stale = 10 * 86400
+        for entry in os.scandir(old.run_dir):
+            os.utime(entry.path, (entry.stat().st_atime - stale, entry.stat().st_mtime - stale))
+        
+        RunCheckpoint.create("new topic", str(tmp_path))
+        assert os.path.exists(old.run_dir)  # Runs are kept unless retention is configured
+        assert RunCheckpoint.prune(str(tmp_path), max_age_days=0) == []
+        assert RunCheckpoint.prune(str(tmp_path), max_age_days=7) == [old.run_id]
+        assert not os.path.exists(old.run_dir)
+        assert os.path.exists(recent.run_dir)
+        assert (tmp_path / "notes").exists()
+    
+    def test_load_missing_run(self, tmp_path):
+        """Test that loading an unknown run fails clearly."""
+        with pytest.raises(FileNotFoundError):
+            RunCheckpoint.load("no_such_run", str(tmp_path))
+    
+    def test_stage_round_trip(self, tmp_path):
+        """Test that context, queries and report path survive a reload."""
+        checkpoint = RunCheckpoint.create("topic", str(tmp_path))
+        assert checkpoint.load_context() is None
+        assert checkpoint.load_queries() is None
+        
+        report_file = tmp_path / "report.md"
+        report_file.write_text("# Report")
+        checkpoint.save_context("initial query", "some context")
+        checkpoint.save_queries(["q1", "q2"])
+        checkpoint.save_report_file(str(report_file))
+        
+        loaded = RunCheckpoint.load(checkpoint.run_id, str(tmp_path))
+        assert loaded.load_context() == "some context"
+        assert loaded.load_queries() == ["q1", "q2"]
+        assert loaded.load_report_file() == str(report_file)
+    
+    def test_report_file_must_exist(self, tmp_path):
+        """Test that a deleted report is generated again on resume."""
+        checkpoint = RunCheckpoint.create("topic", str(tmp_path))
+        checkpoint.save_report_file(str(tmp_path / "deleted.md"))
+        
+        assert checkpoint.load_report_file() is None
+    
+    def test_results_skip_errors_and_truncated_lines(self, tmp_path):
+        """Test that failed searches and a line cut short by a crash are not restored."""
+        checkpoint = RunCheckpoint.create("topic", str(tmp_path))
+        checkpoint.append_result(make_result("q1"))
+        checkpoint.append_result(make_result("q2", source="Error"))
+        checkpoint.append_result(make_result("q3"))
+        checkpoint.close()
+        with open(os.path.join(checkpoint.run_dir, "results.jsonl"), 'a', encoding='utf-8') as f:
+            f.write('{"query": "q4", "cont')
+        
+        results = checkpoint.load_results()
+        
+        assert [result.query for result in results] == ["q1", "q3"]
+        assert results[0].content == "Findings for q1"
+    
+    @pytest.mark.asyncio
+    async def test_results_are_written_in_batches(self, tmp_path):
+        """Test that queued results reach disk on flush, not on every append."""
+        checkpoint = RunCheckpoint.create("topic", str(tmp_path))
+        path = os.path.join(checkpoint.run_dir, "results.jsonl")
+        checkpoint.RESULTS_FLUSH_LINES = 3
+        
+        checkpoint.append_result(make_result("q1"))
+        checkpoint.append_result(make_result("q2"))
+        assert not checkpoint.flush_due()
+        assert not os.path.exists(path)
+        
+        checkpoint.append_result(make_result("q3"))
+        assert checkpoint.flush_due()
+        await checkpoint.flush_results()
+        checkpoint.append_result(make_result("q4"))
+        checkpoint.close()
+        
+        with open(path, 'r', encoding='utf-8') as f:
+            assert len(f.readlines()) == 4
+        assert not checkpoint.flush_due()
+    
+    def test_results_retried_query_replaces_error(self, tmp_path):
+        """Test that a query which failed and then succeeded is restored once."""
+        checkpoint = RunCheckpoint.create("topic", str(tmp_path))
+        checkpoint.append_result(make_result("q1", source="Error"))
+        checkpoint.append_result(make_result("q1"))
+        
+        results = checkpoint.load_results()
+        
+        assert len(results) == 1
+        assert results[0].source != "Error"
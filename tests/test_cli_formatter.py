@@ -0,0 +1,126 @@
+"""
+Tests for the CLI formatter's search progress display.
+"""
+
+import json
+
+from src import cli_formatter, output
+from src.cli_formatter import CLIFormatter
+from src.output import configure_output
+
+class TestSearchProgressDisplay:
+    """Test cases for the live and JSON search progress."""
+    
+    def test_json_progress_lines(self, capsys, monkeypatch):
+        """Test that JSON mode writes the counters and nothing else."""
+        monkeypatch.setattr(cli_formatter, "JSON_PROGRESS_INTERVAL", 0.01)
+        formatter = CLIFormatter(json_progress=True)
+        
+        progress = formatter.begin_searches()
+        progress.total = 3
+        progress.completed = 2
+        progress.failed = 1
+        formatter.print_stage_start("Search Execution", 3, 5)
+        formatter.print_info("not shown")
+        formatter.end_searches(progress)
+        
+        lines = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+        assert lines
+        assert all(line["event"] == "search_progress" for line in lines)
+        assert lines[-1]["total"] == 3
+        assert lines[-1]["completed"] == 2
+        assert lines[-1]["failed"] == 1
+    
+    def test_shared_view_stops_with_last_pipeline(self):
+        """Test that concurrent pipelines share one live view but keep their own counters."""
+        formatter = CLIFormatter()
+        
+        first = formatter.begin_searches()
+        live = formatter._live
+        assert live is not None
+        second = formatter.begin_searches()
+        assert second is not first
+        first.total, second.total = 3, 4
+        assert formatter.search_progress.total == 7
+        
+        formatter.end_searches(first)
+        assert formatter._live is live
+        assert formatter.search_progress.total == 4
+        formatter.end_searches(second)
+        assert formatter._live is None
+    
+    def test_next_pipeline_starts_from_zero(self):
+        """Test that a finished pipeline's searches are not counted in the next one's view."""
+        formatter = CLIFormatter(quiet=True)
+        first = formatter.begin_searches()
+        first.total = first.completed = 5
+        formatter.end_searches(first)
+        
+        formatter.begin_searches()
+        assert (formatter.search_progress.total, formatter.search_progress.completed) == (0, 0)
+    
+    def test_render_counts(self):
+        """Test the live view's status line."""
+        formatter = CLIFormatter(quiet=True)
+        progress = formatter.begin_searches()
+        progress.total = 10
+        progress.completed = 4
+        progress.failed = 1
+        progress.in_flight = 3
+        progress.last_error = "Search failed: HTTP 500"
+        
+        with cli_formatter.console.capture() as capture:
+            cli_formatter.console.print(formatter._render_search_progress())
+        
+        output = capture.get()
+        assert "5/10 | 3 in flight | 1 failed" in output
+        assert "Last error: Search failed: HTTP 500" in output
+    
+    def test_quiet_keeps_errors(self, capsys):
+        """Test that quiet mode drops stage chatter but keeps errors."""
+        formatter = CLIFormatter(quiet=True)
+        formatter.print_welcome()
+        formatter.print_stage_start("Search Execution", 3, 5)
+        formatter.print_info("not shown")
+        formatter.print_error("shown")
+        
+        assert capsys.readouterr().out.strip() == "❌ shown"
+
+class TestOutputMode:
+    """Test cases for applying --quiet and --json-progress to every module."""
+    
+    def teardown_method(self):
+        configure_output()
+    
+    def test_quiet_silences_module_status(self, capsys):
+        """Test that quiet mode hides other modules' status lines but keeps their errors."""
+        configure_output(quiet=True)
+        output.console.print("Starting 10 searches with 5 concurrent workers...")
+        output.notice_console.print("❌ Search failed: HTTP 500")
+        
+        assert capsys.readouterr().out.strip() == "❌ Search failed: HTTP 500"
+    
+    def test_json_progress_keeps_stdout_json_only(self, capsys, monkeypatch):
+        """Test that JSON mode moves all other output to stderr."""
+        monkeypatch.setattr(cli_formatter, "JSON_PROGRESS_INTERVAL", 60)
+        configure_output(json_progress=True)
+        formatter = CLIFormatter(json_progress=True)
+        
+        progress = formatter.begin_searches()
+        output.console.print("All searches completed.")
+        formatter.print_error("Search execution failed")
+        formatter.end_searches(progress)
+        formatter.print_final_summary("topic", "report.md", 1.0)
+        
+        captured = capsys.readouterr()
+        assert [json.loads(line)["event"] for line in captured.out.splitlines()] == ["search_progress"]
+        assert "Search execution failed" in captured.err
+        assert "Research complete" in captured.err
+        assert "All searches completed" not in captured.err
+    
+    def test_cached_answers_are_reported_in_quiet_mode(self, capsys):
+        """Test that reuse of cached answers is always visible."""
+        configure_output(quiet=True)
+        CLIFormatter(quiet=True).print_statistics({"cache_hits": 3, "cache_misses": 1})
+        
+        assert "3 answers were reused from the response cache" in capsys.readouterr().out
@@ -0,0 +1,194 @@
+"""
+Tests for the shared concurrency budget.
+"""
+
+import pytest
+import asyncio
+import httpx
+import json
+import time
+
+from src.api_client import create_http_client
+from src.concurrency import AIMDController, ConcurrencyBudget
+from src.rate_limiter import RateLimiter
+from src.search_executor import SearchExecutor
+from src.utils import SearchResult
+from config import config
+
+class TestConcurrencyBudget:
+    """Test cases for ConcurrencyBudget."""
+    
+    @pytest.mark.asyncio
+    async def test_limits_in_flight_work(self):
+        """Test that no more than `limit` slots are held at once."""
+        budget = ConcurrencyBudget(2)
+        peak = 0
+        
+        async def work():
+            nonlocal peak
+            async with budget.slot("topic"):
+                peak = max(peak, budget.in_flight)
+                await asyncio.sleep(0.01)
+        
+        await asyncio.gather(*(work() for _ in range(6)))
+        
+        assert peak == 2
+        assert budget.in_flight == 0
+    
+    @pytest.mark.asyncio
+    async def test_shares_slots_fairly_between_keys(self):
+        """Test that a key queued behind a large backlog still gets slots promptly."""
+        budget = ConcurrencyBudget(2)
+        order = []
+        
+        async def work(key):
+            async with budget.slot(key):
+                order.append(key)
+                await asyncio.sleep(0.01)
+        
+        big = [asyncio.create_task(work("big")) for _ in range(10)]
+        await asyncio.sleep(0)
+        small = [asyncio.create_task(work("small")) for _ in range(2)]
+        await asyncio.gather(*big, *small)
+        
+        # Without fairness "small" would only run after all ten "big" tasks
+        assert order.index("small") <= 3
+        assert order[:6].count("small") == 2
+    
+    @pytest.mark.asyncio
+    async def test_cancelled_waiter_releases_nothing(self):
+        """Test that cancelling a queued waiter leaves the budget consistent."""
+        budget = ConcurrencyBudget(1)
+        await budget.acquire("a")
+        waiter = asyncio.create_task(budget.acquire("b"))
+        await asyncio.sleep(0)
+        
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        budget.release("a")
+        
+        assert budget.in_flight == 0
+        assert budget.waiting == 0
+    
+    @pytest.mark.asyncio
+    async def test_raising_limit_wakes_waiters(self):
+        """Test that increasing the limit immediately grants queued slots."""
+        budget = ConcurrencyBudget(1)
+        await budget.acquire("a")
+        waiter = asyncio.create_task(budget.acquire("b"))
+        await asyncio.sleep(0)
+        
+        budget.limit = 2
+        await asyncio.wait_for(waiter, 1)
+        
+        assert budget.in_flight == 2
+
+class TestAIMDController:
+    """Test cases for AIMDController."""
+    
+    def test_increases_after_healthy_window(self):
+        """Test that the limit grows by one after a window of successes."""
+        budget = ConcurrencyBudget(4)
+        controller = AIMDController(budget, min_limit=1, max_limit=6)
+        
+        for _ in range(4):
+            controller.record(1.0, True, time.monotonic())
+        assert budget.limit == 5
+        for _ in range(5):
+            controller.record(1.0, True, time.monotonic())
+        assert budget.limit == 6
+        for _ in range(20):
+            controller.record(1.0, True, time.monotonic())
+        assert budget.limit == 6
+    
+    def test_error_halves_once_per_window(self):
+        """Test that failures from searches started before a cut don't cut again."""
+        budget = ConcurrencyBudget(16)
+        controller = AIMDController(budget, min_limit=3, max_limit=32)
+        started_at = time.monotonic()
+        
+        controller.record(1.0, False, started_at)
+        controller.record(1.0, False, started_at)
+        assert budget.limit == 8
+        
+        controller.record(1.0, False, time.monotonic())
+        controller.record(1.0, False, time.monotonic())
+        assert budget.limit == 3
+        assert [limit for _, limit in controller.history] == [16, 8, 4, 3]
+    
+    def test_latency_spike_and_429_cut_limit(self):
+        """Test that slow responses and rate limiting count as congestion."""
+        budget = ConcurrencyBudget(10)
+        limiter = RateLimiter(requests_per_minute=0)
+        controller = AIMDController(budget, min_limit=1, max_limit=20, rate_limiter=limiter, warmup=3)
+        for _ in range(3):
+            controller.record(1.0, True, time.monotonic())
+        
+        controller.record(10.0, True, time.monotonic())
+        assert budget.limit == 5
+        
+        limiter.retried_429s += 1
+        controller.record(1.0, True, time.monotonic())
+        assert budget.limit == 2
+    
+    @pytest.mark.asyncio
+    async def test_executor_logs_limit_changes(self):
+        """Test that limit changes during a batch are recorded in the stats."""
+        budget = ConcurrencyBudget(2)
+        AIMDController(budget, min_limit=1, max_limit=4)
+        executor = SearchExecutor(budget=budget)
+        
+        async def fake_search(query, search_num=None, total_searches=None):
+            return SearchResult(query=query, content="ok", source="test", timestamp=0.0)
+        
+        executor.execute_search = fake_search
+        await executor.execute_batch_searches([f"q{i}" for i in range(10)])
+        await executor.close()
+        
+        assert executor.controller is budget.controller
+        assert executor.stats.concurrency_limits[0] == 2
+        assert executor.stats.concurrency_limits[-1] > 2
+    
+    @pytest.mark.asyncio
+    async def test_only_congestion_cuts_limit(self):
+        """Test that a 4xx leaves the limit alone while a 503 cuts it."""
+        async def handler(request):
+            prompt = json.loads(request.content)["messages"][-1]["content"]
+            status = 503 if "overloaded" in prompt else 400
+            return httpx.Response(status, json={"error": {"message": "failed"}})
+        
+        budget = ConcurrencyBudget(8)
+        controller = AIMDController(budget, min_limit=1, max_limit=8)
+        async with create_http_client(httpx.MockTransport(handler)) as client:
+            executor = SearchExecutor(client, budget=budget, stream=False, hedge=False)
+            await executor.execute_batch_searches(["bad request"] * 3)
+            assert [limit for _, limit in controller.history] == [8]
+            
+            await executor.execute_batch_searches(["overloaded"])
+            assert budget.limit == 4
+
+class TestConnectionPool:
+    """Test cases for sizing the HTTP connection pool."""
+    
+    def pool_size(self, **kwargs) -> int:
+        client = create_http_client(**kwargs)
+        try:
+            return client._transport._pool._max_connections
+        finally:
+            asyncio.run(client.aclose())
+    
+    def test_pool_fits_configured_concurrency(self, monkeypatch):
+        """Test that the real transport's pool holds every concurrent search."""
+        monkeypatch.setattr(config, "max_concurrent_searches", 2)
+        monkeypatch.setattr(config, "adaptive_concurrency", False)
+        assert self.pool_size() == 7
+        assert self.pool_size(concurrency=20) == 25
+    
+    def test_pool_fits_adaptive_ceiling(self, monkeypatch):
+        """Test that the pool leaves room for the highest adaptive limit."""
+        monkeypatch.setattr(config, "max_concurrent_searches", 2)
+        monkeypatch.setattr(config, "adaptive_concurrency", True)
+        monkeypatch.setattr(config, "max_adaptive_concurrency", 50)
+        assert self.pool_size() == 55
+        assert self.pool_size(concurrency=80) == 85
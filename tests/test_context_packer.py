@@ -0,0 +1,90 @@
+"""
+Tests for the context packer module.
+"""
+
+from src import context_packer
+from src.context_packer import ContextPacker, estimate_tokens, trim_to_tokens
+from src.utils import SearchResult
+
+def make_result(query: str, content: str, score: float) -> SearchResult:
+    return SearchResult(query=query, content=content, source="source", timestamp=0.0, relevance_score=score)
+
+class TestTokenEstimation:
+    """Test cases for estimate_tokens and trim_to_tokens."""
+    
+    def test_estimate_tokens(self):
+        """Test that long words count as several tokens and punctuation counts separately."""
+        assert estimate_tokens("") == 0
+        assert estimate_tokens("a cat sat.") == 4
+        assert estimate_tokens("internationalization") == 4
+    
+    def test_trim_at_sentence_boundary(self):
+        """Test that trimming keeps whole sentences."""
+        text = "First sentence here. Second sentence here. Third sentence here."
+        
+        trimmed, tokens = trim_to_tokens(text, 12)
+        
+        assert trimmed == "First sentence here. Second sentence here."
+        assert tokens == estimate_tokens(trimmed) == 10
+    
+    def test_trim_falls_back_to_whole_words(self):
+        """Test that a single long sentence is cut between words, not inside one."""
+        text = "one two three four five six seven eight nine ten"
+        
+        trimmed, tokens = trim_to_tokens(text, 4)
+        
+        assert trimmed == "one two three four"
+        assert tokens == 4
+    
+    def test_text_within_budget_is_unchanged(self):
+        """Test that short text is returned whole."""
+        assert trim_to_tokens("Short text.", 100) == ("Short text.", 3)
+
+class TestContextPacker:
+    """Test cases for ContextPacker."""
+    
+    def test_prefers_score_per_token(self):
+        """Test that a short, relevant result beats a long result with a similar score."""
+        long_result = make_result("long", "Padding words go here. " * 40, 0.9)
+        short_result = make_result("short", "Dense key fact.", 0.8)
+        packer = ContextPacker(token_budget=60, max_item_tokens=1000, min_item_tokens=50)
+        
+        packed = packer.pack([long_result, short_result])
+        
+        assert [result.query for result, _ in packed] == ["short"]
+    
+    def test_fills_budget_and_trims_last_item(self):
+        """Test that leftover space is filled with a sentence-trimmed result."""
+        results = [make_result(f"q{i}", "A useful sentence. " * 30, 1.0 - i / 10) for i in range(5)]
+        packer = ContextPacker(token_budget=300, max_item_tokens=1000, min_item_tokens=20)
+        
+        packed = packer.pack(results)
+        used = sum(estimate_tokens(content) + packer._overhead(result) for result, content in packed)
+        
+        assert used <= 300
+        assert used > 250
+        assert packed[-1][1].endswith("sentence.")
+        assert [result.relevance_score for result, _ in packed] == sorted(
+            (result.relevance_score for result, _ in packed), reverse=True)
+    
+    def test_fits(self):
+        """Test the whole-result budget check."""
+        results = [make_result("q", "word " * 100, 0.5)] * 3
+        
+        assert ContextPacker(token_budget=1000).fits(results)
+        assert not ContextPacker(token_budget=200).fits(results)
+    
+    def test_results_are_tokenized_once(self, monkeypatch):
+        """Test that the cost table is shared by fits and pack."""
+        results = [make_result(f"q{i}", f"Finding number {i}. " * 20, 0.5) for i in range(5)]
+        counted = []
+        monkeypatch.setattr(context_packer, "estimate_tokens",
+                            lambda text: counted.append(text) or estimate_tokens(text))
+        packer = ContextPacker(token_budget=10000)
+        
+        costs = packer.measure(results)
+        assert packer.fits(results, costs)
+        packed = packer.pack(results, costs)
+        
+        assert len(packed) == 5
+        assert sum(text == result.content for result in results for text in counted) == 5
@@ -0,0 +1,79 @@
+"""
+Tests for convert_reports.py and the shared PDF renderer.
+"""
+
+import os
+
+import convert_reports
+from src.pdf_renderer import REPORT_CSS, render_html
+
+class TestRenderHtml:
+    """Test cases for render_html."""
+    
+    def test_renders_markdown_with_shared_styles(self):
+        """Test that tables are rendered and the shared stylesheet is embedded."""
+        html = render_html("# Title\n\n| a | b |\n|---|---|\n| 1 | 2 |", title="Report <1>")
+        
+        assert "<h1>Title</h1>" in html
+        assert "<table>" in html
+        assert REPORT_CSS in html
+        assert "<title>Report &lt;1&gt;</title>" in html
+
+class TestConvertReports:
+    """Test cases for convert_reports."""
+    
+    def setup_method(self):
+        """Set up test fixtures."""
+        self.rendered = []
+    
+    def fake_write_pdf(self, markdown_text, pdf_path, title="Research Report"):
+        self.rendered.append(os.path.basename(pdf_path))
+        with open(pdf_path, 'w') as f:
+            f.write(markdown_text)
+    
+    def make_reports(self, tmp_path, names):
+        reports_dir = tmp_path / "reports"
+        reports_dir.mkdir(exist_ok=True)
+        for name in names:
+            (reports_dir / name).write_text(f"# {name}")
+        return str(reports_dir), str(tmp_path / "pdf")
+    
+    def test_skips_unchanged_reports(self, tmp_path, monkeypatch):
+        """Test that only new or edited reports are converted on a second run."""
+        monkeypatch.setattr(convert_reports, "write_pdf", self.fake_write_pdf)
+        reports_dir, pdf_dir = self.make_reports(tmp_path, ["a.md", "b.md", "notes.txt"])
+        
+        counts = convert_reports.convert_reports(reports_dir, pdf_dir)
+        assert counts == {"converted": 2, "skipped": 0, "failed": 0}
+        
+        # Touched but identical content is skipped by hash; edited content is converted
+        os.utime(os.path.join(reports_dir, "a.md"), (1, 1))
+        with open(os.path.join(reports_dir, "b.md"), 'a') as f:
+            f.write("\nmore")
+        self.rendered.clear()
+        
+        counts = convert_reports.convert_reports(reports_dir, pdf_dir)
+        assert counts == {"converted": 1, "skipped": 1, "failed": 0}
+        assert self.rendered == ["b.pdf"]
+    
+    def test_force_and_missing_pdf(self, tmp_path, monkeypatch):
+        """Test that --force and a deleted PDF both trigger conversion."""
+        monkeypatch.setattr(convert_reports, "write_pdf", self.fake_write_pdf)
+        reports_dir, pdf_dir = self.make_reports(tmp_path, ["a.md", "b.md"])
+        convert_reports.convert_reports(reports_dir, pdf_dir)
+        
+        os.remove(os.path.join(pdf_dir, "a.pdf"))
+        assert convert_reports.convert_reports(reports_dir, pdf_dir)["converted"] == 1
+        assert convert_reports.convert_reports(reports_dir, pdf_dir, force=True)["converted"] == 2
+    
+    def test_failed_conversion_is_retried_next_run(self, tmp_path, monkeypatch):
+        """Test that a report that failed to convert is not marked up to date."""
+        def failing_write_pdf(markdown_text, pdf_path, title="Research Report"):
+            raise OSError("no fonts")
+        
+        monkeypatch.setattr(convert_reports, "write_pdf", failing_write_pdf)
+        reports_dir, pdf_dir = self.make_reports(tmp_path, ["a.md"])
+        assert convert_reports.convert_reports(reports_dir, pdf_dir)["failed"] == 1
+        
+        monkeypatch.setattr(convert_reports, "write_pdf", self.fake_write_pdf)
+        assert convert_reports.convert_reports(reports_dir, pdf_dir)["converted"] == 1
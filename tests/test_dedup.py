@@ -0,0 +1,124 @@
+"""
+Tests for the near-duplicate detection module.
+"""
+
+import pytest
+
+from src.dedup import (MinHashDeduplicator, cluster_queries, deduplicate_near_duplicates, deduplicate_queries,
+                       optimal_bands, query_terms, shingle)
+from src.result_aggregator import ResultAggregator
+from src.utils import SearchResult
+
+ANSWER = (
+    "Solid-state batteries replace the liquid electrolyte with a solid ceramic or polymer layer. "
+    "This improves energy density and safety because the solid electrolyte is not flammable. "
+    "Manufacturers still struggle with dendrite growth, interface resistance and high production costs, "
+    "and most analysts expect mass-market vehicles to adopt the technology after 2030."
+)
+
+PARAPHRASE = ANSWER.replace("Manufacturers still struggle", "Producers continue to struggle").replace(
+    "most analysts expect", "many analysts predict"
+)
+
+UNRELATED = (
+    "Coral reefs cover less than one percent of the ocean floor but support about a quarter of marine species. "
+    "Rising sea temperatures cause bleaching events, and ocean acidification slows skeleton growth."
+)
+
+class TestMinHashDeduplicator:
+    """Test cases for MinHashDeduplicator."""
+    
+    def test_detects_paraphrase(self):
+        """Test that a lightly reworded answer is flagged as a duplicate."""
+        deduplicator = MinHashDeduplicator(threshold=0.5)
+        
+        assert not deduplicator.is_duplicate_text(ANSWER)
+        assert deduplicator.is_duplicate_text(PARAPHRASE)
+        assert not deduplicator.is_duplicate_text(UNRELATED)
+    
+    def test_similarity_tracks_jaccard(self):
+        """Test that the signature similarity approximates the true Jaccard similarity."""
+        deduplicator = MinHashDeduplicator(num_perm=256)
+        first, second = shingle(ANSWER), shingle(PARAPHRASE)
+        jaccard = len(first & second) / len(first | second)
+        
+        estimate = deduplicator.similarity(deduplicator.signature(ANSWER), deduplicator.signature(PARAPHRASE))
+        
+        assert estimate == pytest.approx(jaccard, abs=0.15)
+    
+    def test_optimal_bands(self):
+        """Test that band parameters put the LSH threshold near the requested one."""
+        bands, rows = optimal_bands(0.5, 128)
+        
+        assert bands * rows <= 128
+        assert (1 / bands) ** (1 / rows) == pytest.approx(0.5, abs=0.05)
+    
+    def test_aggregator_selects_minhash(self):
+        """Test that the aggregator can be switched between dedup methods."""
+        results = [
+            SearchResult("query 1", ANSWER, "source", 123456789, 0.5),
+            SearchResult("query 2", PARAPHRASE, "source", 123456789, 0.5),
+        ]
+        
+        exact, _ = ResultAggregator().aggregate_results(list(results), dedup_method="exact")
+        near, statistics = ResultAggregator().aggregate_results(list(results), dedup_method="minhash")
+        
+        assert len(exact) == 2
+        assert len(near) == 1
+        assert statistics["duplicates_removed"] == 1
+    
+    def test_deduplicate_near_duplicates(self):
+        """Test the list-based helper keeps the first of each near-duplicate group."""
+        results = [
+            SearchResult("query 1", ANSWER, "source", 123456789, 0.5),
+            SearchResult("query 2", UNRELATED, "source", 123456789, 0.5),
+            SearchResult("query 3", PARAPHRASE, "source", 123456789, 0.5),
+        ]
+        
+        unique = deduplicate_near_duplicates(results)
+        
+        assert [r.query for r in unique] == ["query 1", "query 2"]
+
+class TestQueryDeduplication:
+    """Test cases for near-duplicate query elimination."""
+    
+    def test_paraphrases_are_merged(self):
+        """Test that reworded queries end up in one cluster with the first as representative."""
+        queries = [
+            "Impact of AI on jobs",
+            "History of AI",
+            "How AI affects jobs",
+            "Latest developments in AI",
+            "Recent developments in AI",
+        ]
+        
+        clusters = cluster_queries(queries)
+        
+        assert clusters == [
+            ["Impact of AI on jobs", "How AI affects jobs"],
+            ["History of AI"],
+            ["Latest developments in AI", "Recent developments in AI"],
+        ]
+    
+    def test_shared_topic_words_do_not_merge(self):
+        """Test that queries differing only in their distinguishing word stay apart."""
+        queries = [
+            "machine learning applications in healthcare",
+            "machine learning applications in finance",
+            "machine learning applications in agriculture",
+            "machine learning applications in education",
+        ]
+        
+        assert deduplicate_queries(queries) == queries
+    
+    def test_threshold_controls_merging(self):
+        """Test that a stricter threshold keeps partial overlaps apart."""
+        queries = ["solar panel efficiency records", "solar panel efficiency costs"]
+        
+        assert len(deduplicate_queries(queries, threshold=0.3)) == 1
+        assert len(deduplicate_queries(queries, threshold=0.9)) == 2
+    
+    def test_query_terms_normalization(self):
+        """Test stopword removal, stemming and synonym mapping."""
+        assert query_terms("What are the benefits of solar panels?") == {"benefit", "solar", "panel"}
+        assert query_terms("the of and") == set()
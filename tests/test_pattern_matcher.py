@@ -0,0 +1,50 @@
+"""
+Tests for the pattern matcher module.
+"""
+
+from src.pattern_matcher import PatternMatcher
+from src.result_aggregator import ResultAggregator
+from src.utils import SearchResult
+
+class TestPatternMatcher:
+    """Test cases for PatternMatcher."""
+    
+    def test_counts_match_per_pattern_scans(self):
+        """Test that one pass finds overlapping and nested patterns."""
+        patterns = ["research", "research shows", "search failed", "failed", "data"]
+        matcher = PatternMatcher({"all": patterns})
+        text = "Research shows the research failed. Data, data and more DATA."
+        
+        hits = matcher.count(text)
+        
+        assert hits == {
+            "research": 2,
+            "research shows": 1,
+            "search failed": 1,
+            "failed": 1,
+            "data": 3
+        }
+    
+    def test_classify_groups_hits_by_label(self):
+        """Test that hits are reported per pattern set."""
+        matcher = PatternMatcher({"error": ["timeout", "error"], "substantive": ["study", "evidence"]})
+        
+        hits = matcher.classify("A study with strong evidence and one more study.")
+        
+        assert hits == {"error": {}, "substantive": {"study": 2, "evidence": 1}}
+    
+    def test_empty_pattern_set(self):
+        """Test that a matcher without patterns reports no hits."""
+        assert PatternMatcher({"error": []}).classify("anything") == {"error": {}}
+    
+    def test_aggregator_uses_custom_patterns(self):
+        """Test that the aggregator's quality filter can be configured."""
+        content = "The committee published a detailed overview of the proposal and its budget. " * 3
+        results = [SearchResult("query", content, "source", 123456789, 0.5)]
+        
+        kept, _ = ResultAggregator().aggregate_results(list(results))
+        rejected, statistics = ResultAggregator(error_indicators=["budget"]).aggregate_results(list(results))
+        
+        assert len(kept) == 1
+        assert rejected == []
+        assert statistics["error_pattern_hits"] == {"budget": 3}
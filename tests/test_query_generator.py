@@ -6,7 +6,7 @@ import pytest
 import asyncio
 from unittest.mock import Mock, patch
 
-from src.query_generator import QueryGenerator
+from src.query_generator import QUERY_FACETS, QueryGenerator
 from config import config
 
 class TestQueryGenerator:
@@ -18,7 +18,7 @@ class TestQueryGenerator:
     
     def teardown_method(self):
         """Clean up after tests."""
-        self.generator.close()
+        asyncio.run(self.generator.close())
     
     @pytest.mark.asyncio
     async def test_generate_initial_search_query(self):
@@ -66,3 +66,71 @@ class TestQueryGenerator:
         assert len(queries) == config.num_queries
         assert all(topic.lower() in q.lower() for q in queries)
         assert all(isinstance(q, str) for q in queries)
+
+class TestShardedQueryGeneration:
+    """Test cases for sharded query generation."""
+    
+    def setup_method(self):
+        """Set up test fixtures."""
+        self.generator = QueryGenerator()
+        self.prompts = []
+    
+    def teardown_method(self):
+        """Clean up after tests."""
+        asyncio.run(self.generator.close())
+    
+    def fake_requests(self, per_facet):
+        """Answer each facet prompt with `per_facet(facet)` queries, and top-ups with fresh ones."""
+        async def fake_request_queries(system_prompt, user_prompt):
+            self.prompts.append(system_prompt)
+            for facet, _ in QUERY_FACETS:
+                if f"Facet: {facet} " in system_prompt:
+                    return per_facet(facet)
+            return [f"Top-up query number {len(self.prompts)} {i}" for i in range(50)]
+        return fake_request_queries
+    
+    @pytest.mark.asyncio
+    async def test_shards_run_concurrently_and_merge(self, monkeypatch):
+        """Test that each facet gets a share and every facet appears in the result."""
+        monkeypatch.setattr(config, "num_queries", 12)
+        monkeypatch.setattr(config, "query_shards", 4)
+        monkeypatch.setattr(self.generator, "_request_queries", self.fake_requests(
+            lambda facet: [f"{facet} question number {i}" for i in range(3)]
+        ))
+        
+        queries = await self.generator.generate_diverse_queries("topic")
+        
+        assert len(queries) == 12
+        assert len(self.prompts) == 4
+        assert all("generate 3 diverse search queries" in prompt for prompt in self.prompts)
+        assert {query.split(" question")[0] for query in queries} == {facet for facet, _ in QUERY_FACETS[:4]}
+    
+    @pytest.mark.asyncio
+    async def test_cross_shard_duplicates_are_topped_up(self, monkeypatch):
+        """Test that duplicates across shards are dropped and the shortfall refilled."""
+        monkeypatch.setattr(config, "num_queries", 10)
+        monkeypatch.setattr(config, "query_shards", 2)
+        monkeypatch.setattr(self.generator, "_request_queries", self.fake_requests(
+            lambda facet: ["The same shared query?", "the same SHARED query", f"{facet} specific query"]
+        ))
+        
+        queries = await self.generator.generate_diverse_queries("topic")
+        
+        assert len(queries) == 10
+        assert sum(1 for q in queries if "shared query" in q.lower()) == 1
+        assert "Existing queries" in self.prompts[-1]
+    
+    @pytest.mark.asyncio
+    async def test_failed_shards_fall_back(self, monkeypatch):
+        """Test that the target is still met when every request fails."""
+        monkeypatch.setattr(config, "num_queries", 15)
+        monkeypatch.setattr(config, "query_shards", 3)
+        
+        async def failing_request_queries(system_prompt, user_prompt):
+            return []
+        
+        monkeypatch.setattr(self.generator, "_request_queries", failing_request_queries)
+        
+        queries = await self.generator.generate_diverse_queries("topic")
+        
+        assert len(queries) == 15
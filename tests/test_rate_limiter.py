@@ -0,0 +1,80 @@
+"""
+Tests for the shared rate limiter module.
+"""
+
+import pytest
+import time
+from unittest.mock import Mock, AsyncMock
+
+from src.rate_limiter import RateLimiter, TokenBucket, parse_retry_after, estimate_request_tokens
+
+class TestRateLimiter:
+    """Test cases for RateLimiter."""
+
+    def test_token_bucket_reserves_into_debt(self):
+        """Test that reservations beyond capacity return a wait time."""
+        bucket = TokenBucket(rate_per_minute=60, capacity=2)
+        now = bucket.updated_at
+
+        assert bucket.reserve(1, now) == 0.0
+        assert bucket.reserve(1, now) == 0.0
+        assert bucket.reserve(1, now) == pytest.approx(1.0)
+        assert bucket.reserve(1, now) == pytest.approx(2.0)
+
+    @pytest.mark.asyncio
+    async def test_acquire_spaces_out_requests(self):
+        """Test that requests beyond the burst are paced by the refill rate."""
+        limiter = RateLimiter(requests_per_minute=600, burst=1)
+
+        start = time.monotonic()
+        for _ in range(3):
+            await limiter.acquire()
+        elapsed = time.monotonic() - start
+
+        # 600/min is one request every 0.1s after the first
+        assert elapsed >= 0.18
+        assert limiter.throttled_calls == 2
+
+    @pytest.mark.asyncio
+    async def test_execute_retries_after_429(self):
+        """Test that a 429 response is retried after the Retry-After delay."""
+        limiter = RateLimiter(requests_per_minute=0, max_retries=2)
+
+        throttled = Mock(status_code=429, headers={"retry-after": "0.05"})
+        ok = Mock(status_code=200)
+        ok.json.return_value = {"choices": [{"message": {"content": "ok"}}]}
+        send = AsyncMock(side_effect=[throttled, ok])
+
+        response = await limiter.execute(send)
+
+        assert response is ok
+        assert send.call_count == 2
+        assert limiter.retried_429s == 1
+
+    @pytest.mark.asyncio
+    async def test_execute_gives_up_after_max_retries(self):
+        """Test that the last 429 response is returned once retries are exhausted."""
+        limiter = RateLimiter(requests_per_minute=0, max_retries=1)
+
+        throttled = Mock(status_code=429, headers={"retry-after": "0"})
+        send = AsyncMock(return_value=throttled)
+
+        response = await limiter.execute(send)
+
+        assert response.status_code == 429
+        assert send.call_count == 2
+
+    def test_parse_retry_after(self):
+        """Test parsing of Retry-After header values."""
+        assert parse_retry_after(Mock(headers={"retry-after": "3"})) == 3.0
+        assert parse_retry_after(Mock(headers={})) is None
+        assert parse_retry_after(Mock(headers={"retry-after": "Wed, 21 Oct 2015 07:28:00 GMT"})) == 0.0
+
+    def test_estimate_request_tokens(self):
+        """Test token estimation for a request payload."""
+        request_data = {
+            "messages": [{"role": "user", "content": "x" * 400}],
+            "max_tokens": 200
+        }
+
+        assert estimate_request_tokens(request_data) > 300
@@ -4,10 +4,18 @@ Tests for the report generator module.
 
 import pytest
 import asyncio
+import httpx
+import json
+import os
+import sys
 from unittest.mock import Mock, patch
 
-from src.report_generator import ReportGenerator
+from src.pdf_renderer import get_render_pool, shutdown_render_pool
+from src import report_generator
+from src.report_generator import REPORT_FOOTER, ReportGenerator
+from src.result_store import ResultStore
 from src.utils import SearchResult
+from config import config
 
 class TestReportGenerator:
     """Test cases for ReportGenerator."""
@@ -18,7 +26,7 @@ class TestReportGenerator:
     
     def teardown_method(self):
         """Clean up after tests."""
-        self.generator.close()
+        asyncio.run(self.generator.close())
     
     @pytest.mark.asyncio
     async def test_generate_final_report(self):
@@ -52,19 +60,93 @@ class TestReportGenerator:
             assert "Test Report" in report
     
     @pytest.mark.asyncio
-    async def test_save_report(self):
+    async def test_save_report(self, tmp_path, monkeypatch):
         """Test report saving functionality."""
+        monkeypatch.setattr(config, "reports_dir", str(tmp_path / "reports"))
+        self.generator.pdf_mode = "off"
         report_content = "# Test Report\n\nThis is a test report."
         filename = "test_report.md"
         
-        # Mock file writing
-        with patch("builtins.open", create=True) as mock_file:
-            mock_file.return_value.__enter__.return_value.write = Mock()
+        saved_filename = await self.generator.save_report(report_content, filename=filename)
+        
+        assert saved_filename == str(tmp_path / "reports" / filename)
+        assert (tmp_path / "reports" / filename).read_text(encoding='utf-8') == report_content
+    
+    @pytest.mark.asyncio
+    async def test_save_report_renders_pdf_in_background(self, tmp_path, monkeypatch):
+        """Test that async mode returns before the PDF is done and reports completion."""
+        monkeypatch.setattr(config, "reports_dir", str(tmp_path / "reports"))
+        monkeypatch.setattr(config, "reports_pdf_dir", str(tmp_path / "pdf"))
+        render_started = asyncio.Event()
+        release_render = asyncio.Event()
+        completed = []
+        
+        async def fake_render(report, pdf_filepath):
+            render_started.set()
+            await release_render.wait()
+            completed.append(pdf_filepath)
+            self.generator.on_pdf_complete(pdf_filepath, None)
+        
+        self.generator.pdf_mode = "async"
+        self.generator.on_pdf_complete = lambda path, error: completed.append(error)
+        
+        with patch.object(self.generator, '_save_pdf_report', side_effect=fake_render):
+            saved = await self.generator.save_report("# Report", filename="report.md")
+            await render_started.wait()
             
-            saved_filename = await self.generator.save_report(report_content, filename)
+            # The Markdown is written and returned while the PDF is still pending
+            assert os.path.exists(saved)
+            assert completed == []
             
-            assert saved_filename == filename
-            mock_file.assert_called_once_with(filename, 'w', encoding='utf-8')
+            release_render.set()
+            await self.generator.wait_for_pdfs()
+        
+        assert completed == [str(tmp_path / "pdf" / "report.pdf"), None]
+    
+    @pytest.mark.asyncio
+    async def test_pdf_renders_in_worker_process(self, tmp_path, monkeypatch):
+        """Test the real render path: write_pdf in the render pool, then the completion callback."""
+        # A stand-in for weasyprint that writes the HTML it was given
+        stub = tmp_path / "stub" / "weasyprint"
+        stub.mkdir(parents=True)
+        (stub / "__init__.py").write_text(
+            "class HTML:\n"
+            "    def __init__(self, string):\n"
+            "        self.string = string\n"
+            "    def write_pdf(self, path):\n"
+            "        with open(path, 'w', encoding='utf-8') as f:\n"
+            "            f.write(self.string)\n"
+        )
+        monkeypatch.syspath_prepend(str(tmp_path / "stub"))
+        monkeypatch.delitem(sys.modules, "weasyprint", raising=False)
+        monkeypatch.setattr(config, "reports_dir", str(tmp_path / "reports"))
+        monkeypatch.setattr(config, "reports_pdf_dir", str(tmp_path / "pdf"))
+        monkeypatch.setattr(config, "pdf_workers", 1)
+        completed = []
+        self.generator.pdf_mode = "async"
+        self.generator.on_pdf_complete = lambda path, error: completed.append((path, error))
+        
+        # Start fresh workers that can import the stub
+        shutdown_render_pool()
+        try:
+            await self.generator.save_report("# Worker Report\n\nBody", filename="report.md")
+            await self.generator.wait_for_pdfs()
+        finally:
+            shutdown_render_pool()
+        
+        pdf_path = str(tmp_path / "pdf" / "report.pdf")
+        assert completed == [(pdf_path, None)]
+        with open(pdf_path, encoding='utf-8') as f:
+            assert "<h1>Worker Report</h1>" in f.read()
+    
+    def test_render_pool_spawns_workers(self, monkeypatch):
+        """Test that render workers start fresh instead of forking the running pipeline."""
+        monkeypatch.setattr(config, "pdf_workers", 1)
+        shutdown_render_pool()
+        try:
+            assert get_render_pool()._mp_context.get_start_method() == "spawn"
+        finally:
+            shutdown_render_pool()
     
     def test_generate_fallback_report(self):
         """Test fallback report generation."""
@@ -86,3 +168,177 @@ class TestReportGenerator:
         assert topic in fallback_report
         assert "content 1" in fallback_report
         assert "content 2" in fallback_report
+
+def sse_body(*chunks: str, done: bool = True) -> bytes:
+    events = ["data: " + json.dumps({"choices": [{"delta": {"content": chunk}}]}) for chunk in chunks]
+    if done:
+        events.append("data: [DONE]")
+    return ("\n\n".join(events) + "\n\n").encode()
+
+class TestReportStreaming:
+    """Test cases for streaming the final report to disk."""
+    
+    def setup_method(self):
+        """Set up test fixtures."""
+        self.generator = ReportGenerator()
+        self.results = [SearchResult("query 1", "content 1 with research findings", "source 1", 123456789, 0.8)]
+        self.statistics = {"total_results": 1, "average_relevance_score": 0.8}
+    
+    def teardown_method(self):
+        """Clean up after tests."""
+        asyncio.run(self.generator.close())
+    
+    def use_body(self, body: bytes):
+        self.generator.client = httpx.AsyncClient(
+            transport=httpx.MockTransport(lambda request: httpx.Response(200, content=body))
+        )
+    
+    @pytest.mark.asyncio
+    async def test_streamed_report_matches_buffered_format(self, tmp_path, monkeypatch):
+        """Test that the streamed report is written as it arrives and returned in the usual format."""
+        monkeypatch.setattr(config, "reports_dir", str(tmp_path))
+        monkeypatch.setattr(config, "cache_enabled", False)
+        self.use_body(sse_body("# Test Report\n\n", "Streamed ", "findings."))
+        
+        report = await self.generator.generate_final_report("test topic", self.results, self.statistics, stream=True)
+        
+        expected = self.generator._add_report_metadata("test topic", "# Test Report\n\nStreamed findings.", self.statistics)
+        assert report.split("**Generated:**")[0] == expected.split("**Generated:**")[0]
+        assert report.endswith("# Test Report\n\nStreamed findings." + REPORT_FOOTER)
+        partial = self.generator.partial_report_path
+        assert partial.endswith(".partial.md")
+        with open(partial, encoding='utf-8') as f:
+            assert f.read() == report
+        
+        self.generator.pdf_mode = "off"
+        await self.generator.save_report(report, filename="report.md")
+        assert not os.path.exists(partial)
+        assert self.generator.partial_report_path is None
+    
+    @pytest.mark.asyncio
+    async def test_interrupted_stream_keeps_partial_report(self, tmp_path, monkeypatch):
+        """Test that text received before the stream broke is kept and marked incomplete."""
+        monkeypatch.setattr(config, "reports_dir", str(tmp_path))
+        monkeypatch.setattr(config, "cache_enabled", False)
+        self.use_body(sse_body("# Test Report\n\n", "First half", done=False))
+        
+        report = await self.generator.generate_final_report("test topic", self.results, self.statistics, stream=True)
+        
+        assert "First half\n\n*Report incomplete: generation stopped early" in report
+        with open(self.generator.partial_report_path, encoding='utf-8') as f:
+            assert f.read() == report
+    
+    @pytest.mark.asyncio
+    async def test_partial_file_writes_are_batched(self, tmp_path, monkeypatch):
+        """Test that deltas are appended in batches from a worker thread, not one write each."""
+        monkeypatch.setattr(config, "reports_dir", str(tmp_path))
+        monkeypatch.setattr(config, "cache_enabled", False)
+        appends = []
+        original_append = report_generator._append_text_file
+        
+        def recording_append(path, content):
+            appends.append(content)
+            original_append(path, content)
+        
+        monkeypatch.setattr(report_generator, "_append_text_file", recording_append)
+        self.use_body(sse_body(*(f"word{i} " for i in range(50)), "\nlast line"))
+        
+        report = await self.generator.generate_final_report("test topic", self.results, self.statistics, stream=True)
+        
+        assert len(appends) <= 2
+        with open(self.generator.partial_report_path, encoding='utf-8') as f:
+            assert f.read() == report
+    
+    @pytest.mark.asyncio
+    async def test_empty_stream_falls_back(self, tmp_path, monkeypatch):
+        """Test that an empty stream produces the fallback report and no partial file."""
+        monkeypatch.setattr(config, "reports_dir", str(tmp_path))
+        monkeypatch.setattr(config, "cache_enabled", False)
+        self.use_body(sse_body())
+        
+        report = await self.generator.generate_final_report("test topic", self.results, self.statistics, stream=True)
+        
+        assert "content 1 with research findings" in report
+        assert self.generator.partial_report_path is None
+        assert os.listdir(tmp_path) == []
+
+class TestMapReduceSynthesis:
+    """Test cases for map-reduce report synthesis."""
+    
+    def setup_method(self):
+        """Set up test fixtures."""
+        self.generator = ReportGenerator()
+        self.results = [
+            SearchResult(f"query {i}", f"finding number {i} " * 20, "source", 0.0, i / 100)
+            for i in range(50)
+        ]
+    
+    def teardown_method(self):
+        """Clean up after tests."""
+        asyncio.run(self.generator.close())
+    
+    @pytest.mark.asyncio
+    async def test_tree_reduction(self, monkeypatch):
+        """Test that every result is mapped and summaries are merged down to the fan-in."""
+        monkeypatch.setattr(config, "map_chunk_size", 8)
+        monkeypatch.setattr(config, "reduce_fan_in", 3)
+        monkeypatch.setattr(config, "synthesis_concurrency", 2)
+        calls = []
+        in_flight = 0
+        peak = 0
+        
+        async def fake_summarize(topic, content, max_words=400):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.001)
+            in_flight -= 1
+            calls.append(content)
+            return f"summary {len(calls)}"
+        
+        monkeypatch.setattr(self.generator.fast_ai, "summarize_research_chunk", fake_summarize)
+        summary = await self.generator._map_reduce_summary("topic", self.results)
+        
+        # 50 results / 8 per chunk = 7 map calls, then 7 -> 3 in one merge round
+        assert len(calls) == 10
+        assert all(f"query {i}\n" in "".join(calls[:7]) for i in range(50))
+        assert summary.count("Partial Synthesis") == 3
+        assert peak == 2
+    
+    @pytest.mark.asyncio
+    async def test_failed_chunk_keeps_material(self, monkeypatch):
+        """Test that a chunk the fast model fails on is passed through unsummarized."""
+        monkeypatch.setattr(config, "map_chunk_size", 25)
+        
+        async def flaky_summarize(topic, content, max_words=400):
+            return None if "query 49\n" in content else "condensed"
+        
+        monkeypatch.setattr(self.generator.fast_ai, "summarize_research_chunk", flaky_summarize)
+        summary = await self.generator._map_reduce_summary("topic", self.results)
+        
+        assert "condensed" in summary
+        assert "query 49" in summary
+    
+    def test_mode_selection(self, monkeypatch):
+        """Test that auto mode only switches to map-reduce when results overflow the token budget."""
+        monkeypatch.setattr(config, "synthesis_mode", "auto")
+        assert not self.generator._use_map_reduce(self.results)
+        self.generator.context_packer.token_budget = 1000
+        assert self.generator._use_map_reduce(self.results)
+        
+        monkeypatch.setattr(config, "synthesis_mode", "single")
+        assert not self.generator._use_map_reduce(self.results)
+    
+    def test_sources_read_stored_content_once(self, monkeypatch):
+        """Test that formatting spooled results decodes each one's content once."""
+        reads = []
+        read_content = ResultStore.read_content
+        monkeypatch.setattr(ResultStore, "read_content",
+                            lambda store, index: reads.append(index) or read_content(store, index))
+        
+        with ResultStore() as store:
+            stored = [store.append(result) for result in self.results]
+            sources = self.generator._format_sources(stored, 1, max_chars=20)
+        
+        assert sources.count("...") == len(stored)
+        assert sorted(reads) == list(range(len(stored)))
@@ -0,0 +1,112 @@
+"""
+Tests for the response cache module.
+"""
+
+import pytest
+import asyncio
+import time
+from unittest.mock import Mock, AsyncMock, patch
+
+from src import response_cache
+from src.api_client import send_chat_request
+from src.response_cache import ResponseCache, track_cache_usage
+from config import config
+
+REQUEST = {
+    "model": "test/model",
+    "messages": [{"role": "user", "content": "What is caching?"}],
+    "temperature": 0.1
+}
+
+class TestResponseCache:
+    """Test cases for ResponseCache."""
+    
+    def test_get_and_set(self, tmp_path):
+        """Test that a stored response is returned for an identical request."""
+        cache = ResponseCache(str(tmp_path / "cache.sqlite"), ttl=60, max_bytes=0)
+        
+        assert cache.get(REQUEST) is None
+        cache.set(REQUEST, {"choices": [{"message": {"content": "cached"}}]})
+        
+        assert cache.get(dict(REQUEST))["choices"][0]["message"]["content"] == "cached"
+        assert cache.get({**REQUEST, "temperature": 0.9}) is None
+        assert (cache.hits, cache.misses) == (1, 2)
+        cache.close()
+    
+    def test_key_covers_whole_request(self):
+        """Test that every request field except the volatile ones changes the key."""
+        key = ResponseCache.make_key(REQUEST)
+        
+        assert ResponseCache.make_key({**REQUEST, "max_tokens": 100}) != key
+        assert ResponseCache.make_key({**REQUEST, "response_format": {"type": "json_object"}}) != key
+        assert ResponseCache.make_key({**REQUEST, "stream": True, "stream_options": {"include_usage": True}}) == key
+    
+    @pytest.mark.asyncio
+    async def test_usage_is_counted_per_pipeline(self, tmp_path):
+        """Test that concurrent pipelines each see only their own hits and misses."""
+        cache = ResponseCache(str(tmp_path / "cache.sqlite"), ttl=60, max_bytes=0)
+        cache.set(REQUEST, {"content": "cached"})
+        
+        async def pipeline(lookups):
+            usage = track_cache_usage()
+            for request in lookups:
+                await cache.aget(request)
+            return usage
+        
+        first, second = await asyncio.gather(
+            pipeline([REQUEST, REQUEST]),
+            pipeline([{**REQUEST, "model": "other"}] * 3)
+        )
+        
+        assert (first.hits, first.misses) == (2, 0)
+        assert (second.hits, second.misses) == (0, 3)
+        assert (cache.hits, cache.misses) == (2, 3)
+        cache.close()
+    
+    def test_expired_entries_are_misses(self, tmp_path):
+        """Test that entries older than the TTL are not served."""
+        cache = ResponseCache(str(tmp_path / "cache.sqlite"), ttl=10, max_bytes=0)
+        cache.set(REQUEST, {"content": "old"})
+        
+        with patch("src.response_cache.time.time", return_value=time.time() + 60):
+            assert cache.get(REQUEST) is None
+        cache.close()
+    
+    def test_lru_eviction(self, tmp_path):
+        """Test that the least recently used entry is evicted over the size cap."""
+        cache = ResponseCache(str(tmp_path / "cache.sqlite"), ttl=0, max_bytes=250)
+        first = {**REQUEST, "model": "first"}
+        second = {**REQUEST, "model": "second"}
+        third = {**REQUEST, "model": "third"}
+        
+        cache.set(first, {"content": "a" * 100})
+        cache.set(second, {"content": "b" * 100})
+        cache.get(first)  # first is now more recently used than second
+        cache.set(third, {"content": "c" * 100})
+        
+        assert cache.get(first) is not None
+        assert cache.get(second) is None
+        assert cache.get(third) is not None
+        cache.close()
+    
+    @pytest.mark.asyncio
+    async def test_send_chat_request_uses_cache(self, tmp_path, monkeypatch):
+        """Test that a repeated request is served without calling the API."""
+        monkeypatch.setattr(config, "cache_enabled", True)
+        monkeypatch.setattr(config, "cache_path", str(tmp_path / "cache.sqlite"))
+        response_cache.reset_response_cache()
+        
+        mock_response = Mock(status_code=200)
+        mock_response.json.return_value = {"choices": [{"message": {"content": "fresh"}}]}
+        client = Mock()
+        client.post = AsyncMock(return_value=mock_response)
+        
+        try:
+            first = await send_chat_request(client, REQUEST)
+            second = await send_chat_request(client, REQUEST)
+        finally:
+            response_cache.reset_response_cache()
+        
+        assert first is mock_response
+        assert second.json()["choices"][0]["message"]["content"] == "fresh"
+        assert client.post.call_count == 1
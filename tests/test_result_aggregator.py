@@ -0,0 +1,62 @@
+"""
+Tests for the result aggregator module.
+"""
+
+from src.result_aggregator import ResultAggregator
+from src.result_store import ResultStore, StoredResult
+from src.utils import SearchResult
+
+SUBSTANTIVE = "According to recent research, the study found strong evidence in the data. " * 5
+
+class TestResultAggregator:
+    """Test cases for ResultAggregator."""
+    
+    def setup_method(self):
+        """Set up test fixtures."""
+        self.aggregator = ResultAggregator()
+    
+    def _results(self):
+        return [
+            SearchResult("query 1", SUBSTANTIVE, "source", 123456789, 0.5),
+            SearchResult("query 2", SUBSTANTIVE, "source", 123456789, 0.5),
+            SearchResult("query 3", "Search failed: HTTP 500", "Error", 123456789, 0.0),
+            SearchResult("query 4", "Short answer", "source", 123456789, 0.5),
+            SearchResult("query 5", "Independent analysis of the market. " * 40, "source", 123456789, 0.5),
+        ]
+    
+    def test_aggregate_results(self):
+        """Test that duplicates, errors and short content are removed."""
+        results, statistics = self.aggregator.aggregate_results(self._results())
+        
+        assert [r.query for r in results] == ["query 5", "query 1"]
+        assert statistics["total_results"] == 2
+        assert statistics["duplicates_removed"] == 1
+        assert self.aggregator.stats.failed_searches == 1
+        assert self.aggregator.stats.completed_searches == 4
+    
+    def test_incremental_matches_batch(self):
+        """Test that adding results one at a time gives the same ranking as batch aggregation."""
+        batch_results, batch_statistics = ResultAggregator().aggregate_results(self._results())
+        
+        self.aggregator.reset()
+        for result in reversed(self._results()):
+            self.aggregator.add_result(result)
+        incremental_results, incremental_statistics = self.aggregator.finalize()
+        
+        assert [r.query for r in incremental_results] == ["query 5", "query 2"]
+        assert [r.relevance_score for r in incremental_results] == [r.relevance_score for r in batch_results]
+        assert incremental_statistics["total_results"] == batch_statistics["total_results"]
+    
+    def test_store_holds_accepted_results(self, tmp_path):
+        """Test that accepted results are spooled and ranked the same as in-memory results."""
+        expected, expected_statistics = ResultAggregator().aggregate_results(self._results())
+        
+        with ResultStore(str(tmp_path)) as store:
+            results, statistics = ResultAggregator(store=store).aggregate_results(self._results())
+            
+            assert len(store) == 2
+            assert all(isinstance(result, StoredResult) for result in results)
+            assert [(r.query, r.content, r.relevance_score) for r in results] == [
+                (r.query, r.content, r.relevance_score) for r in expected
+            ]
+            assert statistics == expected_statistics
@@ -0,0 +1,75 @@
+"""
+Tests for the spooled result store.
+"""
+
+import os
+
+import pytest
+
+from src.result_store import SPOOL_BUFFER_BYTES, ResultStore
+from src.utils import SearchResult
+
+class TestResultStore:
+    """Test cases for ResultStore."""
+
+    def setup_method(self):
+        self.store = ResultStore()
+
+    def teardown_method(self):
+        self.store.close()
+
+    def test_round_trip(self):
+        result = SearchResult("query", "Café résumé — ünïcode content", "perplexity/sonar-pro", 123.5, 0.8,
+                              time_to_first_token=0.4)
+        stored = self.store.append(result)
+
+        assert stored.query == "query"
+        assert stored.content == result.content
+        assert stored.source == "perplexity/sonar-pro"
+        assert stored.timestamp == 123.5
+        assert stored.relevance_score == 0.8
+        assert stored.time_to_first_token == 0.4
+        assert stored.tokens_per_second is None
+        assert stored.to_search_result() == result
+
+    def test_spool_writes_are_buffered(self):
+        stored = [self.store.append(SearchResult(f"q{i}", "content " * 100, "source", 1.0)) for i in range(50)]
+        assert self.store.spool_size < SPOOL_BUFFER_BYTES
+        assert os.fstat(self.store._file.fileno()).st_size == 0
+
+        assert stored[-1].content == "content " * 100
+        assert os.fstat(self.store._file.fileno()).st_size == self.store.spool_size
+
+    def test_reads_after_more_appends(self):
+        first = self.store.append(SearchResult("q1", "first content", "source", 1.0))
+        assert first.content == "first content"
+
+        # Content written after the file was mapped is still readable
+        for i in range(100):
+            self.store.append(SearchResult(f"q{i}", f"content {i} " * 50, "source", 1.0))
+        assert self.store[-1].content == "content 99 " * 50
+        assert first.content == "first content"
+        assert len(self.store) == 101
+        assert self.store.spool_size == sum(len(result.content.encode()) for result in self.store)
+
+    def test_score_updates_are_stored(self):
+        stored = self.store.append(SearchResult("q", "content", "source", 1.0, 0.5))
+        stored.relevance_score += 0.3
+        assert self.store[0].relevance_score == pytest.approx(0.8)
+
+    def test_empty_content_and_sources_are_interned(self):
+        self.store.append(SearchResult("q1", "", "a", 1.0))
+        self.store.append(SearchResult("q2", "x", "b", 1.0))
+        self.store.append(SearchResult("q3", "y", "a", 1.0))
+
+        assert self.store[0].content == ""
+        assert [result.source for result in self.store] == ["a", "b", "a"]
+        assert len(self.store._source_names) == 2
+
+    def test_index_out_of_range(self):
+        with pytest.raises(IndexError):
+            self.store[0]
+
+    def test_search_result_has_slots(self):
+        result = SearchResult("q", "content", "source", 1.0)
+        assert not hasattr(result, "__dict__")
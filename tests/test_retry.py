@@ -0,0 +1,157 @@
+"""
+Tests for the retry policy and circuit breaker.
+"""
+
+import pytest
+import httpx
+
+from src import retry
+from src.api_client import create_http_client, send_chat_request
+from src.rate_limiter import RateLimiter
+from src.retry import CircuitBreaker, CircuitOpenError, RetryPolicy, get_circuit_breaker
+from config import config
+
+REQUEST = {
+    "model": "test/model",
+    "messages": [{"role": "user", "content": "Hello"}],
+    "temperature": 0.1
+}
+
+def scripted_transport(responses):
+    """Serve the given statuses (or exceptions) in order, then 200s."""
+    calls = []
+    
+    def handler(request):
+        calls.append(request)
+        outcome = responses.pop(0) if responses else 200
+        if isinstance(outcome, Exception):
+            raise outcome
+        return httpx.Response(outcome, json={"choices": [{"message": {"content": "ok"}}]})
+    
+    return httpx.MockTransport(handler), calls
+
+class TestRetryPolicy:
+    """Test cases for RetryPolicy."""
+    
+    def test_stops_after_max_attempts(self):
+        """Test that the attempt limit is respected."""
+        policy = RetryPolicy(max_attempts=3)
+        policy.record_request()
+        
+        assert policy.should_retry(0)
+        assert policy.should_retry(1)
+        assert not policy.should_retry(2)
+    
+    def test_retry_budget(self):
+        """Test that retries beyond the budget are refused."""
+        policy = RetryPolicy(max_attempts=5, budget_ratio=0.5, min_retries=0)
+        for _ in range(4):
+            policy.record_request()
+        
+        assert policy.should_retry(0)
+        assert policy.should_retry(0)
+        assert not policy.should_retry(0)
+        assert policy.retries_denied == 1
+    
+    def test_jittered_delay_is_capped(self):
+        """Test that delays stay within the exponential cap."""
+        policy = RetryPolicy(base_delay=1.0, max_delay=5.0)
+        
+        assert all(0 <= policy.delay(1) <= 2.0 for _ in range(50))
+        assert all(0 <= policy.delay(10) <= 5.0 for _ in range(50))
+    
+    def test_retryable_classification(self):
+        """Test which statuses and exceptions are retried."""
+        policy = RetryPolicy()
+        
+        assert policy.is_retryable_status(503)
+        assert not policy.is_retryable_status(400)
+        assert not policy.is_retryable_status(429)  # Handled by the rate limiter
+        assert policy.is_retryable_exception(httpx.ConnectError("refused"))
+        assert not policy.is_retryable_exception(httpx.ReadTimeout("slow"))
+
+class TestCircuitBreaker:
+    """Test cases for CircuitBreaker."""
+    
+    def test_opens_after_threshold_and_recovers(self, monkeypatch):
+        """Test closed -> open -> half-open -> closed."""
+        clock = [100.0]
+        monkeypatch.setattr(retry.time, "monotonic", lambda: clock[0])
+        breaker = CircuitBreaker("model", failure_threshold=2, reset_timeout=10)
+        
+        breaker.record_failure()
+        breaker.before_call()
+        breaker.record_failure()
+        assert breaker.state == "open"
+        with pytest.raises(CircuitOpenError):
+            breaker.before_call()
+        
+        clock[0] += 10
+        breaker.before_call()  # The single trial call
+        with pytest.raises(CircuitOpenError):
+            breaker.before_call()
+        breaker.record_success()
+        assert breaker.state == "closed"
+    
+    def test_failed_trial_reopens(self, monkeypatch):
+        """Test that a failing trial call opens the circuit again."""
+        clock = [0.0]
+        monkeypatch.setattr(retry.time, "monotonic", lambda: clock[0])
+        breaker = CircuitBreaker("model", failure_threshold=1, reset_timeout=5)
+        breaker.record_failure()
+        
+        clock[0] += 5
+        breaker.before_call()
+        breaker.record_failure()
+        
+        assert breaker.state == "open"
+
+class TestSendWithRetries:
+    """Test cases for retries in send_chat_request."""
+    
+    @pytest.mark.asyncio
+    async def test_transient_errors_are_retried(self):
+        """Test that a 503 and a connection error are retried until success."""
+        transport, calls = scripted_transport([503, httpx.ConnectError("reset")])
+        async with create_http_client(transport) as client:
+            response = await send_chat_request(client, REQUEST)
+        
+        assert response.status_code == 200
+        assert len(calls) == 3
+    
+    @pytest.mark.asyncio
+    async def test_client_errors_are_not_retried(self):
+        """Test that a 400 is returned immediately."""
+        transport, calls = scripted_transport([400])
+        async with create_http_client(transport) as client:
+            response = await send_chat_request(client, REQUEST)
+        
+        assert response.status_code == 400
+        assert len(calls) == 1
+    
+    @pytest.mark.asyncio
+    async def test_open_circuit_fails_fast(self, monkeypatch):
+        """Test that an open circuit rejects calls without touching the network."""
+        monkeypatch.setattr(config, "breaker_failure_threshold", 3)
+        transport, calls = scripted_transport([500] * 10)
+        async with create_http_client(transport) as client:
+            response = await send_chat_request(client, REQUEST)
+            assert response.status_code == 500
+            
+            with pytest.raises(CircuitOpenError):
+                await send_chat_request(client, REQUEST)
+        
+        assert len(calls) == 3
+        assert get_circuit_breaker("test/model").rejected == 1
+    
+    @pytest.mark.asyncio
+    async def test_rate_limit_retries_are_shared_and_trip_the_breaker(self):
+        """Test that 429 retries are capped per call and an exhausted 429 counts as a failure."""
+        limiter = RateLimiter(requests_per_minute=0, max_retries=2, default_backoff=0.0)
+        transport, calls = scripted_transport([429, 503, 429, 429, 429, 429])
+        async with create_http_client(transport) as client:
+            response = await send_chat_request(client, REQUEST, rate_limiter=limiter)
+        
+        assert response.status_code == 429
+        assert len(calls) == 4  # One 429 retry left for the second attempt, none for a third
+        assert get_circuit_breaker("test/model").failures == 2
@@ -4,10 +4,16 @@ Tests for the search executor module.
 
 import pytest
 import asyncio
+import httpx
+import json
 from unittest.mock import Mock, patch, AsyncMock
 
+from src import api_client
+from src.api_client import create_http_client
+from src.response_cache import ResponseCache
 from src.search_executor import SearchExecutor
-from src.utils import SearchResult
+from src.utils import SearchProgress, SearchResult
+from config import config
 
 class TestSearchExecutor:
     """Test cases for SearchExecutor."""
@@ -18,17 +24,13 @@ class TestSearchExecutor:
     
     def teardown_method(self):
         """Clean up after tests."""
-        asyncio.create_task(self.executor.close())
+        asyncio.run(self.executor.close())
     
     @pytest.mark.asyncio
     async def test_execute_search_success(self):
         """Test successful search execution."""
         query = "test query"
         
-        # Mock progress and task_id
-        mock_progress = Mock()
-        mock_task_id = "test_task"
-        
         # Mock HTTP response
         mock_response = Mock()
         mock_response.status_code = 200
@@ -37,30 +39,28 @@ class TestSearchExecutor:
         }
         
         with patch.object(self.executor.client, 'post', return_value=mock_response):
-            result = await self.executor.execute_search(query, mock_progress, mock_task_id)
+            result = await self.executor.execute_search(query)
             
             assert isinstance(result, SearchResult)
             assert result.query == query
             assert result.content == "Test search result content"
-            assert result.source == "Perplexity via OpenRouter"
-            mock_progress.update.assert_called_once_with(mock_task_id, advance=1)
+            assert result.source == f"{config.search_model} via OpenRouter"
     
     @pytest.mark.asyncio
     async def test_execute_search_failure(self):
         """Test search execution failure."""
         query = "test query"
         
-        # Mock progress and task_id
-        mock_progress = Mock()
-        mock_task_id = "test_task"
-        
         # Mock HTTP response failure
         mock_response = Mock()
         mock_response.status_code = 500
+        mock_response.aclose = AsyncMock()
         
-        with patch.object(self.executor.client, 'post', return_value=mock_response):
-            result = await self.executor.execute_search(query, mock_progress, mock_task_id)
+        with patch.object(self.executor.client, 'post', return_value=mock_response) as mock_post:
+            result = await self.executor.execute_search(query)
             
+            # Server errors are retried before the search is given up
+            assert mock_post.call_count == config.retry_max_attempts
             assert isinstance(result, SearchResult)
             assert result.query == query
             assert "Search failed: HTTP 500" in result.content
@@ -72,10 +72,6 @@ class TestSearchExecutor:
         """Test batch search execution."""
         queries = ["query 1", "query 2", "query 3"]
         
-        # Mock progress
-        mock_progress = Mock()
-        mock_task_id = "test_task"
-        
         # Mock individual search results
         mock_results = [
             SearchResult("query 1", "content 1", "source 1", 123456789, 0.5),
@@ -84,8 +80,281 @@ class TestSearchExecutor:
         ]
         
         with patch.object(self.executor, 'execute_search', side_effect=mock_results):
-            results = await self.executor.execute_batch_searches(queries, mock_progress, mock_task_id)
+            results = await self.executor.execute_batch_searches(queries)
             
             assert len(results) == 3
             assert all(isinstance(r, SearchResult) for r in results)
             assert self.executor.stats.total_queries == 3
+    
+    @pytest.mark.asyncio
+    async def test_stream_searches_yields_in_completion_order(self):
+        """Test that streamed results arrive as each search completes."""
+        queries = ["slow query", "fast query"]
+        
+        async def fake_search(query, search_num=None, total_searches=None):
+            await asyncio.sleep(0.05 if query == "slow query" else 0)
+            return SearchResult(query, f"content for {query}", "source", 123456789, 0.5)
+        
+        with patch.object(self.executor, 'execute_search', side_effect=fake_search):
+            streamed = [result.query async for result in self.executor.stream_searches(queries)]
+        
+        assert streamed == ["fast query", "slow query"]
+        assert self.executor.stats.total_queries == 2
+    
+    @pytest.mark.asyncio
+    async def test_batch_counts_progress_instead_of_printing(self, capsys):
+        """Test that batch searches only update the progress counters."""
+        progress = SearchProgress()
+        executor = SearchExecutor(progress=progress)
+        in_flight = []
+        
+        async def fake_search(query, search_num=None, total_searches=None):
+            in_flight.append(progress.in_flight)
+            if query == "broken query":
+                return SearchResult(query, "Search failed: HTTP 500", "Error", 123456789, 0.0)
+            return SearchResult(query, f"content for {query}", "source", 123456789, 0.5)
+        
+        with patch.object(executor, 'execute_search', side_effect=fake_search):
+            await executor.execute_batch_searches(["first query", "broken query", "third query"])
+        await executor.close()
+        
+        assert (progress.total, progress.completed, progress.failed, progress.in_flight) == (3, 2, 1, 0)
+        assert progress.last_error == "Search failed: HTTP 500"
+        assert all(count >= 1 for count in in_flight)
+        assert "first query" not in capsys.readouterr().out
+    
+    @pytest.mark.asyncio
+    async def test_stream_counts_into_given_progress(self):
+        """Test that a stage's searches are counted apart from earlier searches."""
+        executor = SearchExecutor()
+        stage_progress = SearchProgress()
+        
+        async def fake_search(query, search_num=None, total_searches=None):
+            return SearchResult(query, f"content for {query}", "source", 123456789, 0.5)
+        
+        with patch.object(executor, 'execute_search', side_effect=fake_search):
+            await executor.execute_batch_searches(["initial query"])
+            async for _ in executor.stream_searches(["q1", "q2"], stage_progress):
+                pass
+        await executor.close()
+        
+        assert (stage_progress.total, stage_progress.completed) == (2, 2)
+        assert executor.progress.total == 1
+    
+    @pytest.mark.asyncio
+    async def test_shared_client_is_not_closed(self):
+        """Test that an injected client is left open for its owner."""
+        shared_client = Mock()
+        shared_client.aclose = AsyncMock()
+        executor = SearchExecutor(shared_client)
+        
+        await executor.close()
+        
+        assert executor.client is shared_client
+        shared_client.aclose.assert_not_called()
+
+def sse_transport(chunks, delay: float = 0.0, status_code: int = 200, state: dict = None):
+    """Build a transport that serves `chunks` as an OpenRouter-style SSE stream."""
+    state = state if state is not None else {}
+    
+    async def body():
+        state["sent"] = 0
+        yield b": OPENROUTER PROCESSING\n\n"
+        for chunk in chunks:
+            await asyncio.sleep(delay)
+            payload = {"choices": [{"delta": {"content": chunk}}]}
+            yield f"data: {json.dumps(payload)}\n\n".encode()
+            state["sent"] += 1
+        usage = {"choices": [], "usage": {"completion_tokens": len(chunks), "total_tokens": 50}}
+        yield f"data: {json.dumps(usage)}\n\n".encode()
+        yield b"data: [DONE]\n\n"
+    
+    def handler(request):
+        state["request"] = json.loads(request.content)
+        if status_code != 200:
+            return httpx.Response(status_code, json={"error": {"message": "failed"}})
+        return httpx.Response(200, headers={"content-type": "text/event-stream"}, content=body())
+    
+    return httpx.MockTransport(handler)
+
+class TestStreamingSearch:
+    """Test cases for streamed searches against a local SSE stand-in."""
+    
+    @pytest.mark.asyncio
+    async def test_stream_assembles_content_and_metrics(self):
+        """Test that streamed chunks are joined and timings are recorded."""
+        state = {}
+        partial = []
+        async with create_http_client(sse_transport(["Solar ", "power ", "grows."], delay=0.01, state=state)) as client:
+            executor = SearchExecutor(client, stream=True, max_chars=0, max_seconds=0,
+                                      on_partial=lambda query, text: partial.append(text))
+            result = await executor.execute_search("solar")
+        
+        assert state["request"]["stream"] is True
+        assert result.content == "Solar power grows."
+        assert partial == ["Solar ", "power ", "grows."]
+        assert result.time_to_first_token is not None and result.time_to_first_token > 0
+        assert result.tokens_per_second is not None
+        assert executor.stats.first_token_times == [result.time_to_first_token]
+        assert executor.stats.truncated_streams == 0
+    
+    @pytest.mark.asyncio
+    async def test_max_chars_closes_stream_early(self):
+        """Test that the character cap stops reading and closes the stream."""
+        state = {}
+        chunks = ["x" * 10] * 100
+        async with create_http_client(sse_transport(chunks, delay=0.001, state=state)) as client:
+            executor = SearchExecutor(client, stream=True, max_chars=25, max_seconds=0)
+            result = await executor.execute_search("long answer")
+        
+        assert result.content == "x" * 25
+        assert state["sent"] < len(chunks)
+        assert executor.stats.truncated_streams == 1
+    
+    @pytest.mark.asyncio
+    async def test_max_seconds_keeps_partial_content(self):
+        """Test that the time cap returns what arrived before it fired."""
+        state = {}
+        async with create_http_client(sse_transport(["first "] * 50, delay=0.02, state=state)) as client:
+            executor = SearchExecutor(client, stream=True, max_chars=0, max_seconds=0.1)
+            result = await executor.execute_search("slow answer")
+        
+        assert result.source != "Error"
+        assert result.content.startswith("first ")
+        assert state["sent"] < 50
+        assert executor.stats.truncated_streams == 1
+    
+    @pytest.mark.asyncio
+    async def test_max_seconds_starts_at_send(self):
+        """Test that time queued in the rate limiter does not count against the time cap."""
+        class QueueingLimiter:
+            max_retries = 0
+            
+            async def execute(self, send, request_data=None, max_retries=None):
+                await asyncio.sleep(0.2)
+                return await send()
+            
+            def record_usage(self, estimated_tokens, actual_tokens):
+                pass
+        
+        async with create_http_client(sse_transport(["quick "] * 3)) as client:
+            executor = SearchExecutor(client, stream=True, max_chars=0, max_seconds=0.1)
+            executor.rate_limiter = QueueingLimiter()
+            result = await executor.execute_search("queued answer")
+        
+        assert result.content == "quick " * 3
+        assert executor.stats.truncated_streams == 0
+    
+    @pytest.mark.asyncio
+    async def test_stream_http_error(self):
+        """Test that a failed streamed request becomes an error result."""
+        async with create_http_client(sse_transport([], status_code=500)) as client:
+            executor = SearchExecutor(client, stream=True)
+            result = await executor.execute_search("broken")
+        
+        assert result.source == "Error"
+        assert "500" in result.content
+        assert executor.stats.failed_searches == 1
+    
+    @pytest.mark.asyncio
+    async def test_only_complete_streams_are_cached(self, tmp_path, monkeypatch):
+        """Test that a cut-off answer is not stored in the response cache."""
+        cache = ResponseCache(str(tmp_path / "cache.sqlite"), ttl=60, max_bytes=0)
+        monkeypatch.setattr(api_client, "get_response_cache", lambda: cache)
+        
+        async with create_http_client(sse_transport(["abc"] * 10)) as client:
+            await SearchExecutor(client, stream=True, max_chars=5).execute_search("q")
+            assert cache.hits + cache.misses == 1 and cache.misses == 1
+            await SearchExecutor(client, stream=True, max_chars=0, max_seconds=0).execute_search("q")
+            cached = await SearchExecutor(client, stream=True, max_chars=0).execute_search("q")
+        
+        assert cache.hits == 1
+        assert cached.content == "abc" * 10
+
+class TestHedgedSearch:
+    """Test cases for hedged search requests."""
+    
+    def slow_first_transport(self, slow: float, state: dict):
+        """Serve a transport whose first request is slow and the rest are fast."""
+        async def handler(request):
+            state["calls"] = state.get("calls", 0) + 1
+            if state["calls"] == 1:
+                await asyncio.sleep(slow)
+                return httpx.Response(200, json={"choices": [{"message": {"content": "original"}}]})
+            return httpx.Response(200, json={"choices": [{"message": {"content": "hedge"}}]})
+        
+        return httpx.MockTransport(handler)
+    
+    @pytest.mark.asyncio
+    async def test_slow_request_is_hedged(self, monkeypatch):
+        """Test that a request past the latency percentile is duplicated and the first answer wins."""
+        monkeypatch.setattr(config, "hedge_min_samples", 5)
+        monkeypatch.setattr(config, "hedge_max_ratio", 1.0)
+        state = {}
+        async with create_http_client(self.slow_first_transport(5.0, state)) as client:
+            executor = SearchExecutor(client, stream=False, hedge=True)
+            executor.latencies.extend([0.01] * 5)
+            
+            start = asyncio.get_running_loop().time()
+            result = await executor.execute_search("tail query")
+            elapsed = asyncio.get_running_loop().time() - start
+        
+        assert result.content == "hedge"
+        assert elapsed < 1.0
+        assert state["calls"] == 2
+        assert executor.stats.hedged_requests == 1
+        assert executor.stats.hedge_wins == 1
+    
+    @pytest.mark.asyncio
+    async def test_no_hedge_before_warmup(self):
+        """Test that nothing is hedged until enough latencies are known."""
+        state = {}
+        async with create_http_client(self.slow_first_transport(0.05, state)) as client:
+            executor = SearchExecutor(client, stream=False, hedge=True)
+            result = await executor.execute_search("query")
+        
+        assert result.content == "original"
+        assert state["calls"] == 1
+        assert executor.stats.hedged_requests == 0
+        assert len(executor.latencies) == 1
+    
+    @pytest.mark.asyncio
+    async def test_hedge_budget_cap(self, monkeypatch):
+        """Test that hedging stops once the extra request budget is spent."""
+        monkeypatch.setattr(config, "hedge_min_samples", 5)
+        monkeypatch.setattr(config, "hedge_max_ratio", 0.1)
+        state = {}
+        async with create_http_client(self.slow_first_transport(0.05, state)) as client:
+            executor = SearchExecutor(client, stream=False, hedge=True)
+            executor.latencies.extend([0.001] * 5)
+            result = await executor.execute_search("query")
+        
+        # One request sent, and 10% of one request leaves no room for a hedge
+        assert result.content == "original"
+        assert executor.stats.hedged_requests == 0
+        assert state["calls"] == 1
+    
+    @pytest.mark.asyncio
+    async def test_rate_limiter_queueing_is_not_latency(self, monkeypatch):
+        """Test that time queued in the rate limiter neither triggers a hedge nor counts as latency."""
+        monkeypatch.setattr(config, "hedge_min_samples", 5)
+        monkeypatch.setattr(config, "hedge_max_ratio", 1.0)
+        
+        class QueueingLimiter:
+            max_retries = 0
+            
+            async def execute(self, send, request_data=None, max_retries=None):
+                await asyncio.sleep(0.2)
+                return await send()
+        
+        state = {}
+        async with create_http_client(self.slow_first_transport(0.0, state)) as client:
+            executor = SearchExecutor(client, stream=False, hedge=True)
+            executor.rate_limiter = QueueingLimiter()
+            executor.latencies.extend([0.01] * 5)
+            result = await executor.execute_search("queued query")
+        
+        assert result.content == "original"
+        assert state["calls"] == 1
+        assert executor.stats.hedged_requests == 0
+        assert executor.latencies[-1] < 0.1
@@ -0,0 +1,168 @@
+"""
+Tests for the research service and its HTTP API.
+"""
+
+import asyncio
+
+import httpx
+import pytest
+
+from src.service import ResearchService
+from config import config
+
+def completed_summary(topic: str, report_file: str = "") -> dict:
+    return {"topic": topic, "status": "completed", "report_file": report_file}
+
+class TestResearchService:
+    """Test cases for the job queue and workers."""
+
+    def setup_method(self):
+        self.calls = []
+
+    async def fake_pipeline(self, topic, client, search_budget):
+        self.calls.append((topic, client, search_budget))
+        await asyncio.sleep(0)
+        return completed_summary(topic)
+
+    @pytest.mark.asyncio
+    async def test_jobs_share_client_and_budget(self):
+        service = ResearchService(self.fake_pipeline, workers=2, concurrency=5)
+        await service.start()
+        jobs = [service.submit(f"topic {i}") for i in range(5)]
+        await service.queue.join()
+        client = service.client
+        await service.close()
+
+        assert [job.status for job in jobs] == ["completed"] * 5
+        assert all(job.finished_at >= job.started_at >= job.submitted_at for job in jobs)
+        assert sorted(topic for topic, _, _ in self.calls) == [f"topic {i}" for i in range(5)]
+        assert all(call_client is client for _, call_client, _ in self.calls)
+        assert all(budget is service.budget for _, _, budget in self.calls)
+        assert client.is_closed
+
+    @pytest.mark.asyncio
+    async def test_connection_pool_fits_concurrency(self, monkeypatch):
+        monkeypatch.setattr(config, "adaptive_concurrency", False)
+        service = ResearchService(self.fake_pipeline, workers=1, concurrency=40)
+        await service.start()
+        max_connections = service.client._transport._pool._max_connections
+        await service.close()
+
+        assert max_connections == 45
+
+    @pytest.mark.asyncio
+    async def test_failed_pipeline_marks_job_failed(self):
+        async def failing_pipeline(topic, client, search_budget):
+            raise RuntimeError("boom")
+
+        service = ResearchService(failing_pipeline, workers=1)
+        await service.start()
+        job = service.submit("topic")
+        await service.queue.join()
+        await service.close()
+
+        assert job.status == "failed"
+        assert job.error == "boom"
+
+    @pytest.mark.asyncio
+    async def test_cancel_queued_job(self):
+        release = asyncio.Event()
+
+        async def blocking_pipeline(topic, client, search_budget):
+            self.calls.append(topic)
+            await release.wait()
+            return completed_summary(topic)
+
+        service = ResearchService(blocking_pipeline, workers=1)
+        await service.start()
+        running = service.submit("first")
+        queued = service.submit("second")
+        await asyncio.sleep(0.01)
+
+        assert not service.cancel(running.id)
+        assert service.cancel(queued.id)
+        release.set()
+        await service.queue.join()
+        await service.close()
+
+        assert running.status == "completed"
+        assert queued.status == "cancelled"
+        assert self.calls == ["first"]
+
+class TestServiceAPI:
+    """Test cases for the HTTP API."""
+
+    async def start_service(self, tmp_path, socket_path=None):
+        report = tmp_path / "report.md"
+        report.write_text("# Report\n\nFindings.", encoding="utf-8")
+
+        async def pipeline(topic, client, search_budget):
+            return completed_summary(topic, str(report))
+
+        service = ResearchService(pipeline, workers=2)
+        await service.start()
+        server = await service.serve("127.0.0.1", 0, socket_path)
+        return service, server
+
+    @pytest.mark.asyncio
+    async def test_submit_status_and_report(self, tmp_path):
+        service, server = await self.start_service(tmp_path)
+        port = server.sockets[0].getsockname()[1]
+        try:
+            async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}") as client:
+                response = await client.post("/jobs", json={"topics": ["AI  safety", "  ", "Fusion"]})
+                assert response.status_code == 202
+                jobs = response.json()["jobs"]
+                assert [job["topic"] for job in jobs] == ["AI safety", "Fusion"]
+
+                await service.queue.join()
+                status = (await client.get(f"/jobs/{jobs[0]['id']}")).json()
+                assert status["status"] == "completed"
+                assert status["summary"]["topic"] == "AI safety"
+
+                report = await client.get(f"/jobs/{jobs[0]['id']}/report")
+                assert report.status_code == 200
+                assert report.headers["content-type"].startswith("text/markdown")
+                assert report.text == "# Report\n\nFindings."
+
+                assert len((await client.get("/jobs")).json()["jobs"]) == 2
+                assert (await client.get("/health")).json()["jobs"] == {"completed": 2}
+        finally:
+            await service.close()
+
+    @pytest.mark.asyncio
+    async def test_errors(self, tmp_path):
+        service, server = await self.start_service(tmp_path)
+        port = server.sockets[0].getsockname()[1]
+        try:
+            async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}") as client:
+                assert (await client.post("/jobs", content=b"not json")).status_code == 400
+                assert (await client.post("/jobs", json={"topics": []})).status_code == 400
+                assert (await client.get("/jobs/missing")).status_code == 404
+                assert (await client.get("/nowhere")).status_code == 404
+                assert (await client.put("/jobs")).status_code == 405
+        finally:
+            await service.close()
+
+    @pytest.mark.asyncio
+    async def test_report_of_unfinished_job(self, tmp_path):
+        service, _ = await self.start_service(tmp_path)
+        job = service.submit("topic")
+        job.status = "running"
+        status, payload = await service.handle_request("GET", f"/jobs/{job.id}/report", b"")
+        await service.close()
+
+        assert status == 409
+        assert "running" in payload["error"]
+
+    @pytest.mark.asyncio
+    async def test_unix_socket(self, tmp_path):
+        socket_path = str(tmp_path / "service.sock")
+        service, _ = await self.start_service(tmp_path, socket_path)
+        try:
+            transport = httpx.AsyncHTTPTransport(uds=socket_path)
+            async with httpx.AsyncClient(transport=transport, base_url="http://service") as client:
+                response = await client.post("/jobs", json={"topic": "Quantum computing"})
+                assert response.status_code == 202
+        finally:
+            await service.close()
@@ -0,0 +1,25 @@
+"""
+Startup cost of the CLI: fast paths must not load the pipeline.
+"""
+
+from benchmarks.startup_time import cli_import_times
+
+# Needed only once a command actually runs research
+HEAVY_MODULES = {"asyncio", "httpx", "rich.live", "rich.table", "markdown", "weasyprint",
+                 "src.api_client", "src.report_generator", "src.search_executor", "src.service"}
+
+class TestStartup:
+    """Test cases for the CLI startup cost."""
+    
+    def test_help_skips_heavy_imports(self):
+        """Test that --help loads neither the pipeline nor config."""
+        modules = cli_import_times("--help")
+        assert "click" in modules
+        assert not HEAVY_MODULES & modules.keys()
+        assert "config" not in modules
+    
+    def test_validation_error_skips_pipeline(self):
+        """Test that a configuration error exits before the pipeline is imported."""
+        modules = cli_import_times("research", "some topic")
+        assert "config" in modules
+        assert not HEAVY_MODULES & modules.keys()
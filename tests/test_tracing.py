@@ -0,0 +1,146 @@
+"""
+Tests for stage and API call tracing.
+"""
+
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from src.api_client import send_chat_request, stream_chat_request
+from src.tracing import RequestTiming, StageSpans, get_tracer, start_tracing, stop_tracing
+
+def ok_response(request: httpx.Request) -> httpx.Response:
+    return httpx.Response(200, json={"choices": [{"message": {"content": "answer"}}]})
+
+class TestTracing:
+    """Test cases for the tracer."""
+
+    def setup_method(self):
+        self.tracer = start_tracing()
+
+    def teardown_method(self):
+        stop_tracing()
+
+    def test_disabled_by_default(self):
+        stop_tracing()
+        assert get_tracer() is None
+        stages = StageSpans("topic")
+        stages.start("Stage")
+        stages.finish()
+        assert self.tracer.spans == []
+
+    @pytest.mark.asyncio
+    async def test_api_calls_are_tagged_with_their_stage(self):
+        stages = StageSpans("Quantum computing")
+        async with httpx.AsyncClient(transport=httpx.MockTransport(ok_response)) as client:
+            stages.start("Query Generation")
+            await send_chat_request(client, {"model": "test-model", "messages": []})
+            stages.start("Search Execution")
+            await asyncio.gather(*(
+                send_chat_request(client, {"model": "other-model", "messages": []}) for _ in range(3)
+            ))
+            stages.finish()
+
+        assert [span.name for span in self.tracer.spans_by("stage")] == ["Query Generation", "Search Execution"]
+        api_spans = self.tracer.spans_by("api")
+        assert len(api_spans) == 4
+        first = api_spans[0].attributes
+        assert first["stage"] == "Query Generation"
+        assert first["topic"] == "Quantum computing"
+        assert first["status"] == 200
+        assert first["bytes_received"] > 0
+        assert first["queue_wait"] >= 0
+        assert all(span.attributes["stage"] == "Search Execution" for span in api_spans[1:])
+        assert {model: len(values) for model, values in self.tracer.latencies_by_model().items()} == {
+            "test-model": 1, "other-model": 3
+        }
+
+    @pytest.mark.asyncio
+    async def test_failed_attempts_are_recorded(self):
+        responses = iter([httpx.Response(503), httpx.Response(200, json={"choices": []})])
+        transport = httpx.MockTransport(lambda request: next(responses))
+        async with httpx.AsyncClient(transport=transport) as client:
+            response = await send_chat_request(client, {"model": "test-model", "messages": []})
+
+        assert response.status_code == 200
+        assert [(span.attributes["attempt"], span.attributes["status"]) for span in self.tracer.spans] == [
+            (1, 503), (2, 200)
+        ]
+        assert self.tracer.latencies_by_model() == {"test-model": [self.tracer.spans[1].duration]}
+
+    @pytest.mark.asyncio
+    async def test_streamed_span_covers_the_whole_stream(self):
+        body = (
+            'data: {"choices": [{"delta": {"content": "Hello"}}]}\n\n'
+            'data: {"choices": [{"delta": {"content": " world"}}]}\n\n'
+            'data: [DONE]\n\n'
+        )
+        transport = httpx.MockTransport(lambda request: httpx.Response(200, content=body.encode()))
+        async with httpx.AsyncClient(transport=transport) as client:
+            parts = [part async for part in stream_chat_request(client, {"model": "test-model", "messages": []})]
+
+        assert "".join(parts) == "Hello world"
+        span = self.tracer.spans_by("api")[0]
+        assert span.attributes["stream"] is True
+        assert span.attributes["complete"] is True
+        assert span.attributes["bytes_received"] == len(body)
+
+    def test_export_json_lines(self, tmp_path):
+        self.tracer.record("Search Execution", "stage", self.tracer.origin, self.tracer.origin + 1.5, topic="t")
+        path = tmp_path / "trace.jsonl"
+        self.tracer.export(str(path))
+
+        records = [json.loads(line) for line in path.read_text().splitlines()]
+        assert records == [{
+            "name": "Search Execution",
+            "category": "stage",
+            "start": 0.0,
+            "duration": 1.5,
+            "timestamp": round(self.tracer.wall_origin, 6),
+            "topic": "t",
+        }]
+
+    def test_export_chrome_trace(self, tmp_path):
+        origin = self.tracer.origin
+        self.tracer.record("Search Execution", "stage", origin, origin + 2.0, topic="t")
+        # Two overlapping calls need two rows; the third fits after the first
+        self.tracer.record("chat completion", "api", origin, origin + 1.0, model="m", status=200)
+        self.tracer.record("chat completion", "api", origin + 0.5, origin + 1.5, model="m", status=200)
+        self.tracer.record("chat completion", "api", origin + 1.2, origin + 1.8, model="m", status=200)
+        path = tmp_path / "trace.json"
+        self.tracer.export(str(path))
+
+        events = json.loads(path.read_text())["traceEvents"]
+        assert all(event["ph"] == "X" for event in events)
+        assert events[0]["dur"] == 2000000
+        assert [event["tid"] for event in events if event["cat"] == "api"] == [1000, 1001, 1000]
+
+class TestRequestTiming:
+    """Test cases for reading httpcore trace events."""
+
+    @pytest.mark.asyncio
+    async def test_connect_and_server_time(self):
+        timing = RequestTiming()
+        events = {
+            "connection.connect_tcp.started": 1.0,
+            "connection.connect_tcp.complete": 1.1,
+            "connection.start_tls.complete": 1.3,
+            "http11.send_request_body.complete": 1.4,
+            "http11.receive_response_headers.complete": 2.4,
+        }
+        for name in events:
+            await timing(name, {})
+        assert "connect_tcp.started" in timing.events
+        assert "receive_response_headers.complete" in timing.events
+        # Replace the recorded clock readings with known ones
+        timing.events = {name.split(".", 1)[1]: value for name, value in events.items()}
+
+        assert timing.connect_time == pytest.approx(0.3)
+        assert timing.server_time == pytest.approx(1.0)
+
+    def test_reused_connection_has_no_connect_time(self):
+        timing = RequestTiming()
+        assert timing.connect_time is None
+        assert timing.server_time is None